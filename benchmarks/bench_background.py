@@ -0,0 +1,71 @@
+# benchmarks/bench_background.py
+#
+# Kernel responsiveness while an alignment scan runs on the simulated
+# beamline. An asyncio heartbeat (what a Jupyter kernel's loop does between
+# cells) ticks every 10 ms; the scan runs once blocking (session.run inside
+# a cell) and once via session.submit, the cell awaiting the handle. The
+# longest heartbeat gap is how long the notebook could not answer a widget
+# or a new cell; the scan's wall time shows what the hand-off costs.
+# Run from the repo root:  python -m benchmarks.bench_background [steps]
+
+import os
+os.environ.setdefault("BLUESKY_SIM", "1")
+
+import asyncio
+import sys
+from time import perf_counter
+import matplotlib
+matplotlib.use("Agg")
+
+from config.sim_devices import beamline
+from config.motors import sample_y
+from config.counters import i0
+from config.runengine import get_session
+from plans.alignment_modular import run_monitor_scan
+
+TICK = 0.01
+
+
+async def heartbeat(gaps, stop):
+    last = perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(TICK)
+        now = perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+async def measure(session, steps, background):
+    gaps, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(gaps, stop))
+    await asyncio.sleep(0.05)
+    t0 = perf_counter()
+    if background:
+        handle = session.submit(run_monitor_scan, sample_y, -1, 1, steps, i0, count_time=0.01)
+        while not handle.done():
+            await asyncio.sleep(TICK)
+        plot = handle.result()
+    else:
+        plot = run_monitor_scan(sample_y, -1, 1, steps, i0, count_time=0.01)
+    wall = perf_counter() - t0
+    stop.set()
+    await beat
+    assert len(plot) == steps, len(plot)
+    return wall, max(gaps), sum(g > 0.1 for g in gaps)
+
+
+def main(steps=41):
+    beamline.time_scale = 1.0
+    session = get_session()
+    session.bec.disable_plots()
+    session.bec.disable_table()
+    print(f"🔁 run_monitor_scan, {steps} points, heartbeat every {TICK * 1e3:.0f} ms")
+    print(f"  {'mode':<12} {'wall s':>7} {'longest stall s':>16} {'stalls > 100 ms':>16}")
+    for background in (False, True):
+        wall, worst, n_stalls = asyncio.run(measure(session, steps, background))
+        mode = "submit" if background else "blocking"
+        print(f"  {mode:<12} {wall:7.2f} {worst:16.3f} {n_stalls:16d}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
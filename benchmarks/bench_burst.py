@@ -0,0 +1,57 @@
+# benchmarks/bench_burst.py
+#
+# Per-frame burst data on the simulated Eiger: one trigger-and-read per
+# frame (count(num=N) with one image per trigger) vs one burst of N frames
+# read back in bulk by BurstReadout, from the stats time-series buffers and
+# from the HDF5 file. Runs on a bare RunEngine (no live table or plots) with
+# time_scale 0, so the numbers are pure software overhead per frame.
+# Bursts longer than the sim's 2048-point TS buffers (as on the IOC) show
+# the timeseries readout falling back to the HDF5 file.
+# Run from the repo root:  python -m benchmarks.bench_burst [n_frames ...]
+
+import os
+os.environ.setdefault("BLUESKY_SIM", "1")
+
+import sys
+from time import perf_counter
+from bluesky import RunEngine
+from bluesky.plans import count
+from config.sim_devices import beamline, eiger
+from plans.burst import BurstReadout, burst_timeseries_plan
+
+
+def main(sizes=(500, 2000, 5000)):
+    beamline.time_scale = 0.0
+    eiger.hdf5.enable.put(1)
+    eiger.hdf5.file_name.put("bench_burst")
+    RE = RunEngine()
+    n_events = []
+    RE.subscribe(lambda name, doc: n_events.append(len(doc["seq_num"])) if name == "event_page"
+                 else n_events.append(1) if name == "event" else None)
+
+    for n in sizes:
+        print(f"📸 {n} frames")
+        eiger.cam.num_images.put(1)
+        eiger.hdf5.enable.put(0)   # the per-frame loop would write n one-frame files
+        n_events.clear()
+        t0 = perf_counter()
+        RE(count([eiger], num=n))
+        dt = perf_counter() - t0
+        print(f"  {'per-frame trigger+read':<24} {dt:6.2f} s  ({n / dt:7.0f} frames/s, "
+              f"{len(n_events)} documents)")
+
+        eiger.cam.num_images.put(n)
+        eiger.hdf5.enable.put(1)
+        for source in ("timeseries", "hdf5"):
+            readout = BurstReadout(eiger, n, 0.001, source)
+            n_events.clear()
+            t0 = perf_counter()
+            RE(burst_timeseries_plan(readout))
+            dt = perf_counter() - t0
+            assert sum(n_events) == n, (source, sum(n_events))
+            print(f"  {'burst, bulk ' + source:<24} {dt:6.2f} s  ({n / dt:7.0f} frames/s, "
+                  f"{len(n_events)} event page)")
+
+
+if __name__ == "__main__":
+    main(tuple(int(a) for a in sys.argv[1:]) or (500, 2000, 5000))
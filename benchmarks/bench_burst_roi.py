@@ -0,0 +1,74 @@
+# benchmarks/bench_burst_roi.py
+#
+# ROI time series from a 500-frame Eiger-style HDF5 burst: loading the whole
+# stack and slicing every ROI vs extract_rois() (chunk-aligned streaming +
+# summed-area tables or per-ROI slicing), for 2 to 256 ROIs, on a chunked
+# and a contiguous (memory-mapped) file. Checks that every method gives the
+# same sums and reports the peak Python-side memory of each.
+# Run from the repo root:  python -m benchmarks.bench_burst_roi [frame_side] [n_frames]
+
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+import h5py
+import numpy as np
+from utils.burst_roi import extract_rois, DATASET
+from benchmarks.bench_gixrd import write_burst
+
+
+def random_rois(n, side, seed=1):
+    rng = np.random.default_rng(seed)
+    rois = {}
+    for i in range(n):
+        w, h = rng.integers(8, side // 4, size=2)
+        x, y = rng.integers(0, side - w), rng.integers(0, side - h)
+        rois[f"r{i}"] = (int(x), int(y), int(w), int(h))
+    return rois
+
+
+def load_and_slice(path, rois):
+    with h5py.File(path, "r") as f:
+        stack = f[DATASET][()]
+    return {name: stack[:, y:y + h, x:x + w].sum(axis=(1, 2)) for name, (x, y, w, h) in rois.items()}
+
+
+def measure(func, *args, **kwargs):
+    tracemalloc.start()
+    t0 = perf_counter()
+    result = func(*args, **kwargs)
+    dt = perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return result, dt, peak
+
+
+def main(side=512, n_frames=500):
+    with tempfile.TemporaryDirectory() as tmp:
+        chunked = Path(tmp) / "burst_chunked.h5"
+        write_burst(chunked, side, n_frames)
+        contiguous = Path(tmp) / "burst_contiguous.h5"
+        with h5py.File(chunked, "r") as src, h5py.File(contiguous, "w") as dst:
+            dst.create_dataset(DATASET, data=src[DATASET][()])
+        print(f"📦 {n_frames} frames of {side}x{side} uint32 "
+              f"({n_frames * side * side * 4 / 2 ** 20:.0f} MB)")
+
+        for n_rois in (2, 16, 64, 256):
+            rois = random_rois(n_rois, side)
+            ref, t_ref, m_ref = measure(load_and_slice, chunked, rois)
+            print(f"  {n_rois:>3} ROIs  {'load + slice':<21} {t_ref:6.2f} s  "
+                  f"({n_frames / t_ref:6.0f} frames/s)  peak {m_ref:7.1f} MB")
+            runs = (("stream sat, chunked", chunked, "sat"),
+                    ("stream slice, chunked", chunked, "slice"),
+                    ("stream auto, memmap", contiguous, "auto"))
+            for label, path, method in runs:
+                df, dt, peak = measure(extract_rois, path, rois, method=method, budget_mb=32)
+                for name in rois:
+                    assert np.array_equal(df[f"{name}_sum"].to_numpy(), ref[name]), name
+                print(f"  {n_rois:>3} ROIs  {label:<21} {dt:6.2f} s  "
+                      f"({n_frames / dt:6.0f} frames/s)  peak {peak:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
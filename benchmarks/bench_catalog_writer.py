@@ -0,0 +1,57 @@
+# benchmarks/bench_catalog_writer.py
+#
+# A 141-point scan and a 500-frame count against a catalog insert with
+# per-call latency (like a database round trip): direct per-document
+# insert on the RunEngine thread vs BatchedCatalogWriter. Checks that every
+# event is stored by the time the plan returns.
+# Run from the repo root:  python -m benchmarks.bench_catalog_writer [latency_ms]
+
+import sys
+from time import perf_counter, sleep
+from bluesky import RunEngine
+from bluesky.plans import scan, count
+from ophyd.sim import SynAxis, SynGauss
+from utils.catalog_writer import BatchedCatalogWriter
+
+
+class SlowStore:
+    """Counts stored events; every insert call costs `latency` seconds plus a little per event."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.n_events = 0
+
+    def insert(self, name, doc):
+        n = len(doc["seq_num"]) if name == "event_page" else 1
+        sleep(self.latency + 2e-5 * n)
+        if name in ("event", "event_page"):
+            self.n_events += n
+
+
+def main(latency_ms=2.0):
+    motor = SynAxis(name="motor")
+    det = SynGauss("det", motor, "motor", center=0, Imax=1, sigma=1)
+    plans = [("141-pt scan", lambda: scan([det], motor, -1, 1, 141), 141),
+             ("500-frame count", lambda: count([det], num=500), 500)]
+    for label, make_plan, n in plans:
+        for mode in ("direct", "batched"):
+            store = SlowStore(latency_ms / 1e3)
+            RE = RunEngine()
+            writer = None
+            if mode == "direct":
+                RE.subscribe(store.insert)
+            else:
+                writer = BatchedCatalogWriter(store.insert)
+                RE.subscribe(writer)
+            t0 = perf_counter()
+            RE(make_plan())
+            dt = perf_counter() - t0
+            readable = store.n_events == n
+            if writer is not None:
+                writer.close()
+            print(f"🗄️ {label:<16} {mode:<8} {dt:6.2f} s  ({n / dt:7.1f} points/s), "
+                  f"all events stored at return: {readable}")
+
+
+if __name__ == "__main__":
+    main(*(float(a) for a in sys.argv[1:]))
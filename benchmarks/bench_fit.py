@@ -0,0 +1,56 @@
+# benchmarks/bench_fit.py
+#
+# Fits per second: per-call lmfit (old fit_data path) vs fast_fit, single and
+# batched. Run from the repo root:  python -m benchmarks.bench_fit
+
+from time import perf_counter
+import numpy as np
+from lmfit.models import GaussianModel, PseudoVoigtModel
+from plans.fitting import fast_fit, gaussian, pvoigt
+
+
+def make_signals(n_signals=200, n_points=51, model_type="gaussian", noise=0.02, seed=0):
+    rng = np.random.default_rng(seed)
+    xs = np.linspace(-1, 1, n_points)
+    centers = rng.uniform(-0.3, 0.3, n_signals)
+    widths = rng.uniform(0.1, 0.25, n_signals)
+    if model_type == "gaussian":
+        ys = gaussian(xs, 1.0, centers[:, None], widths[:, None])
+    else:
+        ys = pvoigt(xs, 1.0, centers[:, None], widths[:, None], 0.3)
+    ys += noise * ys.max() * rng.standard_normal(ys.shape)
+    return xs, ys, centers
+
+
+def old_fit(xs, ys, model_type):
+    model = GaussianModel() if model_type == "gaussian" else PseudoVoigtModel()
+    params = model.guess(ys, x=xs)
+    return model.fit(ys, params, x=xs)
+
+
+def timed(label, fn, n):
+    t0 = perf_counter()
+    out = fn()
+    dt = perf_counter() - t0
+    print(f"  {label:<22} {n / dt:10.1f} fits/s")
+    return out
+
+
+def main(n_signals=200):
+    for model_type in ("gaussian", "pvoigt"):
+        xs, ys, centers = make_signals(n_signals, model_type=model_type)
+        print(f"📈 {model_type}: {n_signals} signals x {len(xs)} points")
+        old = timed("lmfit per call", lambda: [old_fit(xs, y, model_type) for y in ys], n_signals)
+        single = timed("fast_fit per call", lambda: [fast_fit(xs, y, model_type) for y in ys], n_signals)
+        batch = timed("fast_fit batched", lambda: fast_fit(xs, ys, model_type), n_signals)
+
+        old_err = np.array([r.params["center"].value for r in old]) - centers
+        new_err = np.array([r.params["center"].value for r in batch]) - centers
+        n_fallback = sum(r.method == "lmfit" for r in batch)
+        print(f"  center RMS error: lmfit {np.sqrt(np.mean(old_err ** 2)):.2e}, "
+              f"fast {np.sqrt(np.mean(new_err ** 2)):.2e} ({n_fallback} lmfit fallbacks)")
+        assert len(single) == n_signals
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_gixrd.py
+#
+# Writes a 500-frame Eiger-style HDF5 burst, then times the (q_xy, q_z)
+# lookup-table build (first call vs cached) and the reduction in one
+# process vs the process pool. The target is the detector rate: 500 frames
+# at 2 ms = 500 frames/s, judged on the pixel throughput scaled to full
+# Eiger 4M frames (the benchmark frames are downscaled).
+# Run from the repo root:  python -m benchmarks.bench_gixrd [frame_side] [n_frames]
+
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+import h5py
+import numpy as np
+from utils.gixrd import Geometry, EIGER_4M, get_table, reduce_file, DATASET
+
+DETECTOR_RATE = 500   # frames/s: 2 ms frames
+
+
+def write_burst(path, side, n_frames, seed=0):
+    rng = np.random.default_rng(seed)
+    yy, xx = np.indices((side, side))
+    r = np.hypot(yy - side / 2, xx - side / 2)
+    rings = 50 * sum(np.exp(-0.5 * ((r - f * side) / 2.0) ** 2) for f in (0.2, 0.35))
+    with h5py.File(path, "w") as f:
+        dset = f.create_dataset(DATASET, (n_frames, side, side), dtype="uint32",
+                                chunks=(1, side, side))
+        for i in range(0, n_frames, 50):
+            n = min(50, n_frames - i)
+            dset[i:i + n] = rng.poisson(rings + 1, size=(n, side, side))
+
+
+def main(side=512, n_frames=500):
+    # Same angular coverage as an Eiger 4M, fewer (larger) pixels
+    scale = EIGER_4M.shape[1] / side
+    geometry = Geometry(EIGER_4M.distance, EIGER_4M.pixel_size * scale, side / 2, side / 2,
+                        EIGER_4M.wavelength, (side, side))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "burst_000000.h5"
+        write_burst(path, side, n_frames)
+
+        t0 = perf_counter()
+        table = get_table(geometry, 0.3, bins=(300, 300))
+        t_build = perf_counter() - t0
+        t0 = perf_counter()
+        get_table(geometry, 0.3, bins=(300, 300))
+        t_cached = perf_counter() - t0
+        print(f"🗺️ Lookup table {side}x{side} -> 300x300: built in {t_build:.2f} s, "
+              f"cached lookup {t_cached * 1e6:.0f} µs, {table.matrix.nnz:,} entries")
+
+        for label, workers in (("1 process", 0), ("process pool", None)):
+            reduced, rate = reduce_file(path, table, workers=workers)
+            mpix = rate * side * side / 1e6
+            eiger_rate = mpix * 1e6 / (EIGER_4M.shape[0] * EIGER_4M.shape[1])
+            verdict = "keeps up with" if eiger_rate >= DETECTOR_RATE else "slower than"
+            print(f"  {label:<13} {rate:8.0f} frames/s ({mpix:6.0f} Mpix/s, "
+                  f"≈{eiger_rate:5.0f} Eiger 4M frames/s) — {verdict} {DETECTOR_RATE} Eiger 4M frames/s")
+        assert reduced.shape == (n_frames, 300, 300)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,81 @@
+# benchmarks/bench_import.py
+#
+# Startup budget: time to `import startup` in a fresh interpreter (median
+# of --repeat runs), the slowest first-party modules by cumulative import
+# time (python -X importtime), and a check that the libraries the plans
+# and utils defer to first use are still not loaded by the import.
+# Exits 1 if the median exceeds --budget or a deferred library was loaded.
+# Runs on the simulated beamline unless BLUESKY_SIM is already set.
+# Run from the repo root:  python -m benchmarks.bench_import [--budget S] [--repeat N]
+
+import os
+os.environ.setdefault("BLUESKY_SIM", "1")
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+DEFERRED = ("matplotlib.pyplot", "pandas", "scipy.signal", "lmfit", "ipywidgets",
+            "databroker", "IPython")
+FIRST_PARTY = ("startup", "config", "plans", "utils")
+
+_PROBE = f"""
+import json, sys, time
+t0 = time.perf_counter()
+import startup
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {DEFERRED!r} if m in sys.modules]}}))
+"""
+
+
+def _probe(importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _PROBE]
+    proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def _slowest(importtime_log, n=8):
+    """(cumulative s, module) of the slowest first-party modules in an -X importtime log."""
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if name.split(".")[0] in FIRST_PARTY:
+            rows.append((int(cumulative) / 1e6, name))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=float, default=2.0, help="max median seconds for `import startup`")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    runs = [_probe()[0] for _ in range(args.repeat)]
+    median = statistics.median(r["elapsed"] for r in runs)
+    _, log = _probe(importtime=True)
+
+    print(f"🚀 import startup: median {median:.3f} s over {args.repeat} runs "
+          f"(min {min(r['elapsed'] for r in runs):.3f} s, budget {args.budget:.2f} s)")
+    print("  slowest first-party imports (cumulative):")
+    for seconds, name in _slowest(log):
+        print(f"    {seconds:7.3f} s  {name}")
+
+    loaded = sorted(set().union(*(r["loaded"] for r in runs)))
+    failed = False
+    if loaded:
+        print(f"  ❌ loaded at import, should be deferred: {', '.join(loaded)}")
+        failed = True
+    if median > args.budget:
+        print(f"  ❌ over budget by {median - args.budget:.3f} s")
+        failed = True
+    if not failed:
+        print("✅ Within the startup budget; heavy libraries stay deferred")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# benchmarks/bench_optimizer.py
+#
+# Coupled th/sy beam profile on simulated motors: repeated 1-D COM passes
+# (the fine_align_flatten pattern) vs one simplex_optimize run. Reports total
+# counts and the final distance to the true optimum. Exits 1 unless the
+# simplex ends within --tol of the optimum using fewer counts than the
+# 1-D passes, at every noise level.
+# Run from the repo root:  python -m benchmarks.bench_optimizer [--tol D]
+
+import argparse
+import sys
+import numpy as np
+from bluesky import RunEngine
+from bluesky.plans import rel_scan
+from bluesky.callbacks import CallbackBase
+from ophyd.sim import SynAxis, SynSignal
+from plans.adaptive import STATISTICS
+from plans.optimize import simplex_optimize
+
+TH0, SY0 = 0.12, -0.05   # true optimum
+COUPLING = 0.8           # th offset that moving sy by 1 unit compensates
+
+
+def make_beamline(noise=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    th = SynAxis(name="th")
+    sy = SynAxis(name="sy")
+
+    def profile():
+        dth = th.position - TH0 - COUPLING * (sy.position - SY0)
+        dsy = sy.position - SY0
+        value = 1e4 * np.exp(-dth ** 2 / (2 * 0.05 ** 2) - dsy ** 2 / (2 * 0.15 ** 2))
+        return value + noise * rng.standard_normal()
+
+    return th, sy, SynSignal(func=profile, name="i2")
+
+
+class Collect(CallbackBase):
+    def __init__(self, x_field, y_field):
+        self.x_field, self.y_field = x_field, y_field
+        self.xs, self.ys = [], []
+
+    def event(self, doc):
+        self.xs.append(doc["data"][self.x_field])
+        self.ys.append(doc["data"][self.y_field])
+
+
+def one_d_passes(RE, th, sy, mon, tol=0.005, max_rounds=6):
+    counts = 0
+    for _ in range(max_rounds):
+        before = np.array([th.position, sy.position])
+        for motor, half, steps in ((th, 0.5, 51), (sy, 0.3, 41)):
+            col = Collect(motor.name, mon.name)
+            RE(rel_scan([mon], motor, -half, half, steps), col)
+            counts += steps
+            xs, ys = np.array(col.xs), np.array(col.ys)
+            RE(_mv(motor, STATISTICS["com"](xs, ys)))
+        if np.all(np.abs(np.array([th.position, sy.position]) - before) < tol):
+            break
+    return counts
+
+
+def _mv(motor, x):
+    from bluesky.plan_stubs import mv
+    yield from mv(motor, x)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tol", type=float, default=0.01,
+                        help="max distance of the simplex result from the optimum (th/sy units)")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for noise in (0.0, 50.0):
+        RE = RunEngine()
+        th, sy, mon = make_beamline(noise)
+        counts_1d = one_d_passes(RE, th, sy, mon)
+        err_1d = np.hypot(th.position - TH0, sy.position - SY0)
+
+        th.set(0.0)
+        sy.set(0.0)
+        result = {}
+
+        def plan():
+            result.update((yield from simplex_optimize(
+                [mon], [th, sy], signal="i2", initial_steps=[0.1, 0.06], limits=[0.5, 0.3])))
+
+        RE(plan())
+        err_nm = np.hypot(th.position - TH0, sy.position - SY0)
+        print(f"🔁 noise={noise:g}: 1-D passes {counts_1d} counts (error {err_1d:.4f}) | "
+              f"simplex {result['n_evals']} counts (error {err_nm:.4f})")
+        if err_nm > args.tol:
+            print(f"  ❌ simplex ended {err_nm:.4f} from the optimum (tolerance {args.tol:g})")
+            failed = True
+        if result["n_evals"] >= counts_1d:
+            print(f"  ❌ simplex used {result['n_evals']} counts, the 1-D passes {counts_1d}")
+            failed = True
+    if not failed:
+        print(f"✅ Simplex within {args.tol:g} of the optimum in fewer counts than the 1-D passes")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# benchmarks/bench_plans.py
+#
+# End-to-end plan throughput on the simulated beamline (BLUESKY_SIM=1 is set
+# here, before anything under config/ is imported). Each plan runs at two
+# sizes; fitting wall time = overhead + n / rate gives points/s and the fixed
+# per-plan overhead. The full flash sequence is timed once.
+# --fast sets the simulation time_scale to 0, leaving pure software overhead.
+# --save/--compare keep a JSON baseline; a >20% regression exits non-zero.
+# Run from the repo root:  python -m benchmarks.bench_plans [--fast] [--save F] [--compare F]
+
+import os
+os.environ.setdefault("BLUESKY_SIM", "1")
+
+import argparse
+import json
+import sys
+from time import perf_counter
+import matplotlib
+matplotlib.use("Agg")
+
+from config.sim_devices import beamline
+from config.motors import sample_y, sx
+from config.counters import i2
+from config.detectors import eiger, configure_eiger_for_burst
+from config.runengine import get_session
+from plans.alignment_modular import run_monitor_scan
+from plans.scan_functions import run_burst_scan
+from plans.wrapped_scan import run_scan_with_counters, run_fly_scan_with_counters
+
+SIZES = (11, 51)
+TOLERANCE = 0.2
+
+
+def _timed(func):
+    t0 = perf_counter()
+    func()
+    return perf_counter() - t0
+
+
+def bench_plan(label, make_run):
+    times = [_timed(lambda: make_run(n)) for n in SIZES]
+    (n1, n2), (t1, t2) = SIZES, times
+    per_point = (t2 - t1) / (n2 - n1)
+    return {"plan": label, "points_per_s": 1 / per_point if per_point > 0 else float("inf"),
+            "overhead_s": t1 - n1 * per_point, "wall_s": times}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fast", action="store_true", help="time_scale=0: no simulated waits")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON; exit 1 on a >20%% regression")
+    parser.add_argument("--plots", action="store_true",
+                        help="keep BestEffortCallback plots (Agg redraws every event)")
+    parser.add_argument("--skip-sequence", action="store_true")
+    args = parser.parse_args(argv)
+    beamline.time_scale = 0.0 if args.fast else 1.0
+    session = get_session()
+    if not args.plots:
+        session.bec.disable_plots()
+
+    cases = [
+        ("run_monitor_scan", lambda n: run_monitor_scan(sample_y, -1, 1, n, i2, count_time=0.01)),
+        ("run_burst_scan", lambda n: run_burst_scan("bench", -1, 1, steps=n, nframes=5,
+                                                     frame_time=0.001)),
+        ("run_scan_with_counters", lambda n: (configure_eiger_for_burst(5, 0.001),
+                                              run_scan_with_counters([eiger], sx, -5, 5, n))),
+        ("run_fly_scan_with_counters", lambda n: (configure_eiger_for_burst(n, 0.01, trigger_mode=0),
+                                                  run_fly_scan_with_counters(eiger, sx, -5, 5, n, 0.01))),
+    ]
+    results = [bench_plan(label, run) for label, run in cases]
+
+    if not args.skip_sequence:
+        from full_sequence import run_gixrd_flash_sequence
+        wall = _timed(run_gixrd_flash_sequence)
+        results.append({"plan": "run_gixrd_flash_sequence", "points_per_s": None,
+                        "overhead_s": None, "wall_s": [wall]})
+    session.exporter.flush()
+
+    mode = "fast (no simulated waits)" if args.fast else "real-time simulation"
+    print(f"\n📊 Plan benchmarks, {mode}, sizes {SIZES}")
+    print(f"  {'plan':<28} {'points/s':>9} {'overhead s':>11} {'wall s':>16}")
+    for r in results:
+        rate = f"{r['points_per_s']:9.1f}" if r["points_per_s"] is not None else f"{'-':>9}"
+        over = f"{r['overhead_s']:11.3f}" if r["overhead_s"] is not None else f"{'-':>11}"
+        walls = " / ".join(f"{w:.2f}" for w in r["wall_s"])
+        print(f"  {r['plan']:<28} {rate} {over} {walls:>16}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"fast": args.fast, "results": results}, f, indent=2)
+    if args.compare:
+        return 1 if report_regressions(results, args.compare) else 0
+    return 0
+
+
+def report_regressions(results, baseline_file):
+    with open(baseline_file) as f:
+        baseline = {r["plan"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        old = baseline.get(r["plan"])
+        if old is None:
+            continue
+        if r["points_per_s"] and old["points_per_s"] and \
+                r["points_per_s"] < (1 - TOLERANCE) * old["points_per_s"]:
+            regressions.append(f"{r['plan']}: {old['points_per_s']:.1f} -> {r['points_per_s']:.1f} points/s")
+        if sum(r["wall_s"]) > (1 + TOLERANCE) * sum(old["wall_s"]) + 0.1:
+            regressions.append(f"{r['plan']}: wall {sum(old['wall_s']):.2f} -> {sum(r['wall_s']):.2f} s")
+    for line in regressions:
+        print(f"  ❌ regression {line}")
+    if not regressions:
+        print("✅ No regressions against baseline")
+    return regressions
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+# benchmarks/bench_roi_preview.py
+#
+# Cost of one ROI slider move in create_eiger_roi_gui on a 4M-pixel frame:
+# sum/mean/max by slicing the frame vs RoiPreview (summed-area table plus
+# block-max sparse table, built once per grabbed frame). Boxes are random
+# with the given side length, so the slicing cost grows with the ROI while
+# the preview's stays flat.
+# Run from the repo root:  python -m benchmarks.bench_roi_preview
+
+import sys
+from time import perf_counter
+import numpy as np
+from utils.eiger_roi_gui import RoiPreview
+
+SHAPE = (2167, 2070)   # Eiger 4M
+N_MOVES = 200
+
+
+def _per_move(func, boxes):
+    t0 = perf_counter()
+    for box in boxes:
+        func(*box)
+    return (perf_counter() - t0) / len(boxes)
+
+
+def _sliced(frame):
+    def stats(x, y, w, h):
+        region = frame[y:y + h, x:x + w]
+        total = region.sum()
+        return total, total / region.size, region.max()
+    return stats
+
+
+def main(sides=(50, 300, 1000, 2000)):
+    rng = np.random.default_rng(0)
+    frame = rng.poisson(20, SHAPE).astype(np.uint32)
+    t0 = perf_counter()
+    preview = RoiPreview(frame)
+    build = perf_counter() - t0
+    print(f"🔍 {SHAPE[0]}x{SHAPE[1]} frame, preview built in {build * 1e3:.0f} ms "
+          f"(block {preview.block} px)")
+    print(f"  {'ROI side':>8} {'slice ms':>9} {'preview ms':>11} {'speedup':>8}")
+    for side in sides:
+        xs = rng.integers(0, SHAPE[1] - side, N_MOVES)
+        ys = rng.integers(0, SHAPE[0] - side, N_MOVES)
+        boxes = [(x, y, side, side) for x, y in zip(xs, ys)]
+        sliced = _per_move(_sliced(frame), boxes)
+        cached = _per_move(preview.stats, boxes)
+        print(f"  {side:8d} {sliced * 1e3:9.3f} {cached * 1e3:11.3f} {sliced / cached:7.1f}x")
+
+
+if __name__ == "__main__":
+    main(tuple(int(a) for a in sys.argv[1:]) or (50, 300, 1000, 2000))
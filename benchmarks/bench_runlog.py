@@ -0,0 +1,54 @@
+# benchmarks/bench_runlog.py
+#
+# Fills a scratch RunLogStore with alignment/scan rows whose keys drift over
+# time, then times typical history queries.
+# Run from the repo root:  python -m benchmarks.bench_runlog [n_rows]
+
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+import numpy as np
+from utils.logger import RunLogStore
+
+
+def main(n_rows=200_000):
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RunLogStore(Path(tmp) / "run_log.sqlite", batch_size=1000)
+        samples = [f"S{i:03d}" for i in range(200)]
+        motors = ["th", "sx", "sy"]
+
+        t0 = perf_counter()
+        for i in range(n_rows):
+            md = {
+                "plan": "alignment_scan",
+                "sample_name": samples[i % len(samples)],
+                "motor": motors[i % 3],
+                "fit_center": float(rng.normal()),
+                "fit_fwhm": float(rng.uniform(0.01, 0.1)),
+            }
+            if i > n_rows // 2:
+                md["adaptive"] = True  # new key mid-log: schema grows
+            store.append("alignment_log", md)
+        store.flush()
+        dt = perf_counter() - t0
+        print(f"📝 {n_rows} rows in {dt:.2f} s ({n_rows / dt:,.0f} rows/s)")
+
+        for label, kwargs in [
+            ("last 50 th for S042", dict(log="alignment_log", motor="th", sample_name="S042")),
+            ("last 50 sx (any sample)", dict(log="alignment_log", motor="sx")),
+            ("last 10 rows", dict(limit=10)),
+        ]:
+            t0 = perf_counter()
+            rows = store.query(**kwargs)
+            print(f"  {label:<26} {len(rows):3d} rows in {(perf_counter() - t0) * 1e3:.2f} ms")
+
+        t0 = perf_counter()
+        store.export_csv(Path(tmp) / "alignment_log.csv", log="alignment_log")
+        print(f"  CSV export: {perf_counter() - t0:.2f} s")
+        store.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
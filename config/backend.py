@@ -0,0 +1,15 @@
+# config/backend.py
+#
+# Selects real EPICS devices or the simulated beamline. Set BLUESKY_SIM=1 in
+# the environment (or call use_simulation() before anything under config/ is
+# imported) to build every device from config/sim_devices.py instead.
+
+import os
+
+SIMULATED = os.environ.get("BLUESKY_SIM", "").lower() in ("1", "true", "yes")
+
+
+def use_simulation(enabled=True):
+    """Switch backends; only affects config modules imported afterwards."""
+    global SIMULATED
+    SIMULATED = enabled
@@ -0,0 +1,44 @@
+# config/catalog.py
+#
+# One catalog handle shared by every plan module, resolved on first use
+# rather than at import: importing the plans (startup.py) neither pays for
+# databroker's catalog discovery nor builds the RunEngine session.
+
+
+class LazyCatalog:
+    """
+    Stands in for the session's catalog (get_session().cat), the one the
+    RunEngine writes every run to, in simulation and on the beamline
+    alike; the first item or attribute access resolves it. Lookups by uid
+    (exports, alignment metadata) therefore always find the runs just
+    taken.
+    """
+
+    def __init__(self):
+        self._catalog = None
+
+    def resolve(self):
+        if self._catalog is None:
+            from config.runengine import get_session
+
+            self._catalog = get_session().cat
+        return self._catalog
+
+    def reset(self):
+        """Resolve again on next use (e.g. after the session was rebuilt)."""
+        self._catalog = None
+
+    def __getitem__(self, key):
+        return self.resolve()[key]
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):   # not resolved for copy/pickle probes
+            raise AttributeError(attr)
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        state = "resolved" if self._catalog is not None else "not resolved yet"
+        return f"<LazyCatalog of the session catalog, {state}>"
+
+
+cat = LazyCatalog()
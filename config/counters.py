@@ -1,8 +1,13 @@
 from ophyd import EpicsSignalRO
+from config.backend import SIMULATED
 
-i0 = EpicsSignalRO("I0:PV", name="i0")
-i1 = EpicsSignalRO("I1:PV", name="i1")
-monitor = EpicsSignalRO("MON:PV", name="monitor")
-temp = EpicsSignalRO("TEMP:PV", name="temperature")
+if SIMULATED:
+    from config.sim_devices import i0, i1, i2, monitor, temp
+else:
+    i0 = EpicsSignalRO("I0:PV", name="i0")
+    i1 = EpicsSignalRO("I1:PV", name="i1")
+    i2 = EpicsSignalRO("I2:PV", name="i2")
+    monitor = EpicsSignalRO("MON:PV", name="monitor")
+    temp = EpicsSignalRO("TEMP:PV", name="temperature")
 
-counters = [i0, i1, monitor, temp]
\ No newline at end of file
+counters = [i0, i1, monitor, temp]
@@ -1,33 +1,136 @@
 from ophyd.areadetector.detectors import EigerDetector
 from ophyd.areadetector.plugins import HDF5Plugin, ImagePlugin, StatsPlugin, ROIPlugin
-from ophyd import Component as Cpt
+from ophyd.areadetector.trigger_mixins import SingleTrigger
+from ophyd import Component as Cpt, EpicsSignalRO
+from functools import reduce
+from time import perf_counter
+import operator
+from config.backend import SIMULATED
 
-class MyEiger(EigerDetector):
+class TimeSeriesStats(StatsPlugin):
+    # Per-frame NDArray timestamps of the time-series buffers (ADCore 3.x)
+    ts_timestamp = Cpt(EpicsSignalRO, "TSTimestamp", kind="omitted")
+
+
+class MyEiger(SingleTrigger, EigerDetector):
     hdf5 = Cpt(HDF5Plugin, "HDF1:")
     image = Cpt(ImagePlugin, "IMAGE1:")
-    stats1 = Cpt(StatsPlugin, "Stats1:")
-    stats2 = Cpt(StatsPlugin, "Stats2:")
+    stats1 = Cpt(TimeSeriesStats, "Stats1:")
+    stats2 = Cpt(TimeSeriesStats, "Stats2:")
     roi1 = Cpt(ROIPlugin, "ROI1:")
     roi2 = Cpt(ROIPlugin, "ROI2:")
 
-eiger = MyEiger("EIGER:DET:", name="eiger4M")
-
-def configure_eiger_for_burst(num_images=100, frame_time=0.001, file_path="/data/", base_filename="scan"):
-    eiger.hdf5.warmup()
-    eiger.hdf5.enable.put(1)
-    eiger.hdf5.create_directory.put(-1)
-    eiger.hdf5.file_write_mode.put(2)
-    eiger.hdf5.auto_increment.put(1)
-    eiger.hdf5.auto_save.put(1)
-    eiger.hdf5.file_path.put(file_path)
-    eiger.hdf5.write_path_template.put(file_path)
-    eiger.hdf5.file_name.put(base_filename)
-    eiger.hdf5.file_number.put(0)
-    eiger.cam.acquire_time.put(frame_time)
-    eiger.cam.acquire_period.put(frame_time + 0.0002)
-    eiger.cam.num_images.put(num_images)
-    eiger.cam.trigger_mode.put(1)
-    eiger.cam.image_mode.put(1)
-    eiger.stats1.enable.put(1)
-    eiger.stats2.enable.put(1)
-    return eiger
\ No newline at end of file
+if SIMULATED:
+    from config.sim_devices import eiger
+else:
+    eiger = MyEiger("EIGER:DET:", name="eiger4M")
+
+
+# -------------------------------
+# Diff-aware, parallel configuration
+# -------------------------------
+_UNSET = object()
+
+class EigerConfigurator:
+    """
+    Applies settings to a MyEiger, writing only the PVs whose value differs
+    from the last one applied. Puts in one group are issued together and
+    waited on as a single status; groups run in order. Paths in `volatile`
+    (changed by the IOC itself, e.g. auto-incremented file numbers) are always
+    written. Call invalidate() if PVs may have been changed from elsewhere.
+    """
+
+    def __init__(self, det, timeout=10, volatile=()):
+        self.det = det
+        self.timeout = timeout
+        self.volatile = set(volatile)
+        self._applied = {}
+        self.last_report = {}
+
+    def invalidate(self):
+        self._applied.clear()
+
+    def _signal(self, path):
+        return reduce(getattr, path.split("."), self.det)
+
+    def apply(self, *groups, force=False):
+        """Apply ordered groups of {dotted.path: value}; returns the number of puts."""
+        n_puts = 0
+        for group in groups:
+            changed = {
+                path: value for path, value in group.items()
+                if force or path in self.volatile or self._applied.get(path, _UNSET) != value
+            }
+            statuses = [self._signal(path).set(value) for path, value in changed.items()]
+            if statuses:
+                reduce(operator.and_, statuses).wait(self.timeout)
+            self._applied.update(changed)
+            n_puts += len(changed)
+        return n_puts
+
+    def is_primed(self):
+        """True if the HDF5 plugin has already seen a frame of the current size and dtype."""
+        hdf5, cam = self.det.hdf5, self.det.cam
+        _, height, width = hdf5.array_size.get()
+        if not (height and width):
+            return False
+        frame = (cam.array_size.array_size_y.get(), cam.array_size.array_size_x.get())
+        return (height, width) == frame and hdf5.data_type.get() == cam.data_type.get(as_string=True)
+
+    def warmup(self):
+        """Prime the HDF5 plugin only if needed; returns True if warmup ran."""
+        if self.is_primed():
+            return False
+        self.det.hdf5.warmup()
+        self.invalidate()  # warmup toggles cam settings behind our back
+        return True
+
+eiger_config = EigerConfigurator(eiger)
+
+def configure_eiger_for_burst(num_images=100, frame_time=0.001, file_path="/data/", base_filename="scan",
+                              trigger_mode=1):
+    t0 = perf_counter()
+    warmed = eiger_config.warmup()
+    t_warm = perf_counter() - t0
+    n_puts = eiger_config.apply(
+        {
+            "hdf5.enable": 1,
+            "hdf5.create_directory": -1,
+            "hdf5.file_write_mode": 2,
+            "hdf5.auto_increment": 1,
+            "hdf5.auto_save": 1,
+            "hdf5.file_path": file_path,
+            "hdf5.write_path_template": file_path,
+            "hdf5.file_name": base_filename,   # file_number auto-increments: no burst reuses a name
+            "cam.acquire_time": frame_time,
+            "cam.num_images": num_images,
+            "cam.trigger_mode": trigger_mode,
+            "cam.image_mode": 1,
+            "stats1.enable": 1,
+            "stats2.enable": 1,
+        },
+        # The IOC clamps the period against the exposure, so set it afterwards
+        {"cam.acquire_period": frame_time + 0.0002},
+    )
+    elapsed = perf_counter() - t0
+    eiger_config.last_report = {
+        "config_time": elapsed, "warmup_time": t_warm, "warmup_ran": warmed, "n_puts": n_puts,
+    }
+    print(f"⚙️ Eiger configured in {elapsed * 1e3:.1f} ms "
+          f"({n_puts} PV writes, warmup {'ran' if warmed else 'skipped'})")
+    return eiger
+
+
+def configure_eiger_single(exposure=0.1):
+    """One internally triggered frame per trigger, e.g. for Eiger stats at each scan point."""
+    n_puts = eiger_config.apply(
+        {
+            "cam.acquire_time": exposure,
+            "cam.num_images": 1,
+            "cam.trigger_mode": 0,
+            "cam.image_mode": 1,
+        },
+        {"cam.acquire_period": exposure + 0.0002},
+    )
+    print(f"⚙️ Eiger set to single {exposure * 1e3:g} ms exposures ({n_puts} PV writes)")
+    return eiger
@@ -1,5 +1,13 @@
 from ophyd import EpicsMotor
+from config.backend import SIMULATED
 
-sample_y = EpicsMotor("SAMPLE:Y:PV", name="sample_y")
-th = EpicsMotor("SAMPLE:TH:PV", name="th")
-motor_list = [sample_y, th]
\ No newline at end of file
+if SIMULATED:
+    from config.sim_devices import sample_y, sx, th
+else:
+    sample_y = EpicsMotor("SAMPLE:Y:PV", name="sample_y")
+    sx = EpicsMotor("SAMPLE:X:PV", name="sx")
+    th = EpicsMotor("SAMPLE:TH:PV", name="th")
+
+sy = sample_y      # short name used by the alignment sequences
+motor = sample_y   # default scan axis for run_burst_scan
+motor_list = [sample_y, sx, th]
@@ -1,43 +1,144 @@
 from bluesky import RunEngine
-from bluesky.callbacks.best_effort import BestEffortCallback
-from databroker.manager import Manager
-from databroker.v2 import Broker
+from bluesky.utils import SigintHandler
 from pathlib import Path
-from bluesky.callbacks import CallbackBase
-import matplotlib.pyplot as plt
-import numpy as np
+from time import perf_counter
+import atexit
+from inspect import isgenerator
+from utils.live_plot import ThrottledLivePlot
+from utils.export_service import ExportService
+from utils.profiler import PhaseProfiler
+from utils.catalog_writer import BatchedCatalogWriter
+from utils.background_run import (
+    RunHandle, current_handle, relay, main_thread_only, MainThreadDuringTask,
+)
+from config.backend import SIMULATED
 
-def setup_runengine_with_databroker():
-    RE = RunEngine()
+def setup_runengine_with_databroker(profiler=None):
+    # Imported here rather than at module level, like databroker below:
+    # importing the plans should not load matplotlib (via the
+    # BestEffortCallback) or the catalog stack before a session is built
+    from bluesky.callbacks.best_effort import BestEffortCallback
+
+    # Ctrl-C pauses runs started from the kernel; background runs (on a
+    # worker thread) are paused or aborted through their RunHandle instead
+    RE = RunEngine(context_managers=[main_thread_only(SigintHandler)],
+                   during_task=MainThreadDuringTask())
+    # Profile first so it sees each start document before the other callbacks
+    timed = profiler.install(RE).timed if profiler else (lambda cb, *args, **kwargs: cb)
     bec = BestEffortCallback()
-    RE.subscribe(bec)
-    data_dir = Path.home() / "bluesky_data"
-    data_dir.mkdir(exist_ok=True)
-    mgr = Manager.from_config({
-        "catalog": {"metadatastore": {"dbpath": str(data_dir)}}
-    })
-    cat = Broker(mgr)
-    RE.subscribe(cat.v1.insert)
-    return RE, cat
-
-class LiveStatsPlot(CallbackBase):
-    def __init__(self, y_field, x_field='motor', label="Live Stats"):
-        self.xs, self.ys = [], []
+    # Table and plots are drawn on the notebook's thread during background runs
+    RE.subscribe(timed(relay.wrap(bec), label="BestEffortCallback"))
+    if SIMULATED:
+        from databroker import temp
+        cat = temp()  # throwaway catalog: simulated runs never reach the real one
+    else:
+        from databroker.manager import Manager
+        from databroker.v2 import Broker
+
+        data_dir = Path.home() / "bluesky_data"
+        data_dir.mkdir(exist_ok=True)
+        mgr = Manager.from_config({
+            "catalog": {"metadatastore": {"dbpath": str(data_dir)}}
+        })
+        cat = Broker(mgr)
+    # Events are paged and written on a background thread; each run is
+    # complete in the catalog by the time its plan returns
+    writer = BatchedCatalogWriter(cat.v1.insert)
+    RE.subscribe(timed(writer, "catalog", label="catalog writer"))
+    return RE, cat, bec, writer
+
+
+# -------------------------------
+# Shared session (one RE + catalog)
+# -------------------------------
+class BeamlineSession:
+    """RunEngine, BestEffortCallback and catalog built once and shared by every plan helper."""
+
+    def __init__(self, profile=True):
+        t0 = perf_counter()
+        self.profiler = PhaseProfiler() if profile else None
+        self.RE, self.cat, self.bec, self.catalog_writer = setup_runengine_with_databroker(self.profiler)
+        self.setup_time = perf_counter() - t0
+        self.n_runs = 0
+        self.exporter = ExportService()
+        self.background = None
+
+    def run(self, plan, md=None, callbacks=None):
+        """Run a plan; callbacks are subscribed for this call only."""
+        handle = current_handle()
+        if handle is None and self.background is not None and not self.background.done():
+            raise RuntimeError(f"{self.background!r} is still active; wait for it or abort() it first")
+        self.n_runs += 1
+        callbacks = list(callbacks or [])
+        if self.profiler is not None:
+            callbacks = [self.profiler.timed(cb, label=type(cb).__name__) for cb in callbacks]
+        if handle is not None:
+            return handle.call(lambda: self.RE(plan, callbacks, **(md or {})))
+        return self.RE(plan, callbacks, **(md or {}))
+
+    def submit(self, job, *args, **kwargs):
+        """
+        Run in the background and return a RunHandle at once, leaving the
+        kernel free. `job` is a plan, run as run(job, md, callbacks), or a
+        helper that runs plans (e.g. find_sample_center), called as
+        job(*args, **kwargs). Live plots keep updating on the notebook's
+        thread; handle.pause()/resume()/abort(), handle.result(). Ctrl-C
+        does not pause a background run.
+        """
+        if self.background is not None and not self.background.done():
+            raise RuntimeError(f"{self.background!r} is still active; wait for it or abort() it first")
+        if isgenerator(job):
+            plan = job
+            self.background = RunHandle(self.RE, lambda: self.run(plan, *args, **kwargs),
+                                        getattr(plan, "__name__", "plan"))
+        else:
+            self.background = RunHandle(self.RE, lambda: job(*args, **kwargs),
+                                        getattr(job, "__name__", "job"))
+        return self.background
+
+    def overhead_report(self):
+        """Setup time avoided versus rebuilding the RunEngine on every call."""
+        saved = self.setup_time * max(self.n_runs - 1, 0)
+        print(f"⏱️ Session setup: {self.setup_time:.3f} s (once)")
+        print(f"  Plans run: {self.n_runs}")
+        print(f"  Overhead saved vs per-plan setup: {saved:.3f} s")
+        return {"setup_time": self.setup_time, "n_runs": self.n_runs, "saved": saved}
+
+    def profile_report(self, last=10):
+        """Per-phase timing of the last runs (see utils.profiler.PhaseProfiler)."""
+        if self.profiler is None:
+            print("⏱️ Profiling is off for this session")
+            return []
+        return self.profiler.summary(last, export_times=self.exporter.export_times)
+
+    def close(self):
+        """Flush queued catalog writes, exports and logs; report failures (also run at exit)."""
+        if self.background is not None and not self.background.done():
+            self.background.abort("session closed")
+            self.background.wait(timeout=30)
+        self.catalog_writer.close()
+        return self.exporter.shutdown()
+
+
+_session = None
+
+def get_session():
+    global _session
+    if _session is None:
+        _session = BeamlineSession()
+        atexit.register(_session.close)
+    return _session
+
+class LiveStatsPlot(ThrottledLivePlot):
+    def __init__(self, y_field, x_field='motor', label="Live Stats", **kwargs):
         self.x_field = x_field
         self.y_field = y_field
-        self.fig, self.ax = plt.subplots()
-        self.line, = self.ax.plot([], [], 'o-')
-        self.ax.set_title(label)
-        self.ax.set_xlabel(x_field)
-        self.ax.set_ylabel(y_field)
-        plt.ion()
-        plt.show()
+        super().__init__(label=label, xlabel=x_field, ylabel=y_field, **kwargs)
 
     def event(self, doc):
         if self.x_field in doc['data'] and self.y_field in doc['data']:
-            self.xs.append(doc['data'][self.x_field])
-            self.ys.append(doc['data'][self.y_field])
-            self.line.set_data(self.xs, self.ys)
-            self.ax.relim()
-            self.ax.autoscale_view()
-            plt.pause(0.01)
\ No newline at end of file
+            self.append(doc['data'][self.x_field], doc['data'][self.y_field])
+
+def setup_live_callbacks(det, x_field="motor"):
+    """Per-run live plot of the detector's ROI1 total against x_field."""
+    return [LiveStatsPlot(y_field=det.stats1.total.name, x_field=x_field, label=f"{det.name} ROI1")]
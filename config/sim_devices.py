@@ -0,0 +1,474 @@
+# config/sim_devices.py
+
+import threading
+from pathlib import Path
+from time import sleep, time
+import numpy as np
+from scipy.special import erfc
+from ophyd import Device, Signal, Component as Cpt
+from ophyd.sim import SynSignal
+from ophyd.status import Status
+
+
+# -------------------------------
+# 1. Beam profiles
+# -------------------------------
+def gaussian_profile(x, center=0.0, sigma=0.1):
+    return np.exp(-0.5 * ((x - center) / sigma) ** 2)
+
+
+def knife_edge(x, edge=0.0, sigma=0.05):
+    """Transmitted fraction past a blade at `edge` (1 below it, 0 above it)."""
+    return 0.5 * erfc((x - edge) / (np.sqrt(2) * sigma))
+
+
+def plateau(x, center=0.0, half_width=1.0, sigma=0.05):
+    """Smooth top-hat: 1 across the sample, falling off with beam size at both ends."""
+    return knife_edge(x, center + half_width, sigma) - knife_edge(x, center - half_width, sigma)
+
+
+class SimBeamline:
+    """
+    Shared state of the simulated hutch: the true alignment the motors should
+    find, the incident flux and noise, and `time_scale`, which multiplies
+    every simulated wait (0 runs motion, counting and frames instantly).
+    """
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.lock = threading.Lock()
+        self.time_scale = 1.0
+        self.flux = 1e5              # counts/s on i0
+        self.read_noise = 5.0        # counts, gaussian
+        self.beam_sigma_y = 0.05     # vertical beam size (sy units)
+        self.beam_sigma_x = 0.1      # horizontal beam size (sx units)
+        self.sample_edge_y = 0.2     # sy of the sample surface (half-cut)
+        self.sample_center_x = 0.8   # sx of the sample center
+        self.sample_half_width = 4.0
+        self.th0 = 0.05              # flat-sample angle
+        self.lever = 5.0             # shadow growth per unit of |th - th0|
+        self.data_root = Path.home() / "bluesky_data" / "sim"
+
+    def wait(self, seconds):
+        if seconds > 0 and self.time_scale > 0:
+            sleep(seconds * self.time_scale)
+
+    def poisson(self, lam):
+        with self.lock:
+            return self.rng.poisson(lam)
+
+    def normal(self, scale, size=None):
+        with self.lock:
+            return self.rng.normal(0.0, scale, size)
+
+
+# -------------------------------
+# 2. Motors
+# -------------------------------
+class SimMotor(Device):
+    """
+    Stand-in for EpicsMotor: same readback/setpoint/velocity names, moves
+    follow a trapezoidal profile (`acceleration` seconds to reach velocity,
+    like the motor record's ACCL), then `settle_time`.
+    The readback updates during the move so monitors and fly scans see it.
+    """
+
+    user_readback = Cpt(Signal, value=0.0, kind="hinted")
+    user_setpoint = Cpt(Signal, value=0.0)
+    velocity = Cpt(Signal, value=1.0, kind="config")
+    acceleration = Cpt(Signal, value=0.1, kind="config")
+    motor_is_moving = Cpt(Signal, value=0, kind="omitted")
+
+    def __init__(self, *args, beamline, velocity=1.0, acceleration=0.1, settle_time=0.0,
+                 update_period=0.01, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_readback.name = self.name
+        self.beamline = beamline
+        self.velocity.put(velocity)
+        self.acceleration.put(acceleration)
+        self.settle_time = settle_time
+        self.update_period = update_period
+        self._stop = threading.Event()
+
+    @property
+    def position(self):
+        return self.user_readback.get()
+
+    def move_time(self, target):
+        distance, v, ta = abs(target - self.position), self.velocity.get(), self.acceleration.get()
+        if distance < v * ta:   # never reaches full speed
+            return 2 * np.sqrt(distance * ta / v)
+        return distance / v + ta
+
+    def _travelled(self, t, distance, total):
+        """Distance covered after t seconds of a trapezoidal (or triangular) profile."""
+        t = min(max(t, 0.0), total)
+        ramp = min(self.acceleration.get(), total / 2)
+        peak = distance / (total - ramp) if total > ramp else 0.0   # cruise speed reached
+        accel = peak / ramp if ramp > 0 else np.inf
+        if t < ramp:
+            return 0.5 * accel * t ** 2
+        if t > total - ramp:
+            return distance - 0.5 * accel * (total - t) ** 2
+        return 0.5 * peak * ramp + peak * (t - ramp)
+
+    def set(self, target):
+        status = Status(obj=self)
+        start, total = self.position, self.move_time(target)
+        duration = total * self.beamline.time_scale
+        distance, sign = abs(target - start), np.sign(target - start)
+        self.user_setpoint.put(target)
+        self._stop.clear()
+
+        def move():
+            self.motor_is_moving.put(1)
+            t0 = time()
+            while duration > 0 and not self._stop.is_set():
+                frac = min((time() - t0) / duration, 1.0)
+                travelled = self._travelled(frac * total, distance, total)
+                self.user_readback.put(start + sign * travelled)
+                if frac >= 1.0:
+                    break
+                sleep(self.update_period)
+            if not self._stop.is_set():
+                self.user_readback.put(target)
+                self.beamline.wait(self.settle_time)
+            self.motor_is_moving.put(0)
+            status.set_finished()
+
+        threading.Thread(target=move, name=f"sim-{self.name}", daemon=True).start()
+        return status
+
+    def stop(self, *, success=False):
+        self._stop.set()
+
+
+# -------------------------------
+# 3. Counters
+# -------------------------------
+class SimCounter(Signal):
+    """
+    Scaler channel: trigger() integrates for count_time and returns Poisson
+    counts of func() (expected counts/s from the beamline state) plus read
+    noise. While monitored it free-runs, updating once per count_time.
+    """
+
+    def __init__(self, func, *, name, beamline, count_time=0.1, **kwargs):
+        super().__init__(name=name, value=0.0, **kwargs)
+        self._func = func
+        self.beamline = beamline
+        self.count_time = Signal(name=f"{name}_count_time", value=count_time)
+        self._free_run = None
+
+    def _count(self):
+        t = self.count_time.get()
+        lam = max(self._func(), 0.0) * t
+        return float(self.beamline.poisson(lam) + self.beamline.normal(self.beamline.read_noise))
+
+    def trigger(self):
+        status = Status(obj=self)
+
+        def integrate():
+            self.beamline.wait(self.count_time.get())
+            self.put(self._count())
+            status.set_finished()
+
+        threading.Thread(target=integrate, daemon=True).start()
+        return status
+
+    def subscribe(self, callback, event_type=None, run=True):
+        cid = super().subscribe(callback, event_type=event_type, run=run)
+        if event_type in (None, self.SUB_VALUE) and self._free_run is None:
+            self._free_run = threading.Thread(target=self._run_free, daemon=True)
+            self._free_run.start()
+        return cid
+
+    def _run_free(self):
+        while self._callbacks[self.SUB_VALUE]:
+            self.beamline.wait(max(self.count_time.get(), 0.005))
+            if self.beamline.time_scale == 0:
+                sleep(0.005)
+            self.put(self._count())
+        self._free_run = None
+
+
+# -------------------------------
+# 4. Eiger stand-in
+# -------------------------------
+class _SimArraySize(Device):
+    array_size_x = Cpt(Signal, value=256)
+    array_size_y = Cpt(Signal, value=256)
+
+
+class _SimCam(Device):
+    acquire = Cpt(Signal, value=0)
+    acquire_time = Cpt(Signal, value=0.001, kind="config")
+    acquire_period = Cpt(Signal, value=0.0012, kind="config")
+    num_images = Cpt(Signal, value=1, kind="config")
+    trigger_mode = Cpt(Signal, value=0, kind="config")
+    image_mode = Cpt(Signal, value=1, kind="config")
+    array_callbacks = Cpt(Signal, value=1)
+    data_type = Cpt(Signal, value="UInt32")
+    array_size = Cpt(_SimArraySize, "")
+
+
+class _SimPluginSize(Device):
+    depth = Cpt(Signal, value=0)
+    height = Cpt(Signal, value=0)
+    width = Cpt(Signal, value=0)
+
+
+class _SimHDF5(Device):
+    enable = Cpt(Signal, value=0, kind="config")
+    create_directory = Cpt(Signal, value=0)
+    file_write_mode = Cpt(Signal, value=0)
+    auto_increment = Cpt(Signal, value=1)
+    auto_save = Cpt(Signal, value=1)
+    file_path = Cpt(Signal, value="/data/", kind="config")
+    write_path_template = Cpt(Signal, value="/data/")
+    file_name = Cpt(Signal, value="scan", kind="config")
+    file_number = Cpt(Signal, value=0)
+    num_capture = Cpt(Signal, value=0)
+    capture = Cpt(Signal, value=0)
+    full_file_name = Cpt(Signal, value="")
+    data_type = Cpt(Signal, value="")
+    array_size = Cpt(_SimPluginSize, "")
+
+    def warmup(self):
+        cam = self.parent.cam
+        self.array_size.height.put(cam.array_size.array_size_y.get())
+        self.array_size.width.put(cam.array_size.array_size_x.get())
+        self.data_type.put(cam.data_type.get())
+
+
+class _SimStats(Device):
+    """
+    Stats plugin with the NDStats time-series buffers (TSControl 0 =
+    Erase/Start, 2 = Stop). Like the IOC's waveform records, the buffers
+    hold at most TS_CAPACITY points whatever ts_num_points says.
+    """
+
+    TS_CAPACITY = 2048
+
+    enable = Cpt(Signal, value=1, kind="config")
+    total = Cpt(Signal, value=0.0, kind="hinted")
+    mean = Cpt(Signal, value=0.0, kind="hinted")
+    max_value = Cpt(Signal, value=0.0, kind="normal")
+    ts_num_points = Cpt(Signal, value=2048, kind="config")
+    ts_control = Cpt(Signal, value=2, kind="omitted")
+    ts_acquiring = Cpt(Signal, value=0, kind="omitted")
+    ts_current_point = Cpt(Signal, value=0, kind="omitted")
+    ts_read = Cpt(Signal, value=0, kind="omitted")
+    ts_total = Cpt(Signal, value=np.empty(0), kind="omitted")
+    ts_mean_value = Cpt(Signal, value=np.empty(0), kind="omitted")
+    ts_max_value = Cpt(Signal, value=np.empty(0), kind="omitted")
+    ts_timestamp = Cpt(Signal, value=np.empty(0), kind="omitted")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ts = []
+        self.ts_control.subscribe(self._on_control, run=False)
+        self.ts_read.subscribe(self._on_read, run=False)
+
+    def _on_control(self, value, **kwargs):
+        if value == 0:
+            self._ts = []
+            self.ts_current_point.put(0)
+        self.ts_acquiring.put(int(value in (0, 1)))
+
+    def _on_read(self, **kwargs):
+        columns = np.array(self._ts).reshape(-1, 4).T
+        for sig, col in zip((self.ts_total, self.ts_mean_value, self.ts_max_value,
+                             self.ts_timestamp), columns):
+            sig.put(col)
+
+    def record(self, total, mean, max_value, timestamp):
+        self.total.put(total)
+        self.mean.put(mean)
+        self.max_value.put(max_value)
+        if self.ts_acquiring.get() and len(self._ts) < min(self.ts_num_points.get(), self.TS_CAPACITY):
+            self._ts.append((total, mean, max_value, timestamp))
+            self.ts_current_point.put(len(self._ts))
+
+
+class _SimXY(Device):
+    x = Cpt(Signal, value=0)
+    y = Cpt(Signal, value=0)
+
+
+class _SimMinXY(Device):
+    min_x = Cpt(Signal, value=0)
+    min_y = Cpt(Signal, value=0)
+
+
+class _SimROI(Device):
+    min_xyz = Cpt(_SimMinXY, "")
+    size = Cpt(_SimXY, "")
+
+
+class _SimImage(Device):
+    """IMAGE1 stand-in: the last frame of each acquisition, flat, as the StdArrays plugin serves it."""
+
+    array_data = Cpt(Signal, value=np.zeros(0, dtype=np.uint32), kind="omitted")
+    array_size = Cpt(_SimPluginSize, "")
+
+    @property
+    def image(self):
+        shape = (self.array_size.height.get(), self.array_size.width.get())
+        if not all(shape):
+            raise RuntimeError("Invalid image; ensure array_callbacks are on")
+        return np.asarray(self.array_data.get()).reshape(shape)
+
+
+class SimEiger(Device):
+    """
+    MyEiger stand-in with the same cam/hdf5/image/stats/roi layout. trigger()
+    produces cam.num_images frames every cam.acquire_period (scaled by the
+    beamline time_scale), writes them to a real HDF5 file
+    (entry/data/data, one chunk per frame) when the HDF5 plugin is enabled
+    (in Stream mode, file_write_mode 2, only while capture is armed; the
+    plugin drops capture once the file is closed, like the IOC), and updates stats1/stats2 (and their time-series buffers) from roi1/roi2
+    on every frame; image holds the last frame. Frames are Debye-Scherrer rings whose intensity jumps at
+    `flash_frame`.
+    """
+
+    cam = Cpt(_SimCam, "")
+    hdf5 = Cpt(_SimHDF5, "")
+    image = Cpt(_SimImage, "")
+    stats1 = Cpt(_SimStats, "")
+    stats2 = Cpt(_SimStats, "")
+    roi1 = Cpt(_SimROI, "")
+    roi2 = Cpt(_SimROI, "")
+
+    def __init__(self, *args, beamline, shape=(256, 256), counts=50.0, flash_frame=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.beamline = beamline
+        self.counts = counts
+        self.flash_frame = flash_frame
+        self.cam.array_size.array_size_y.put(shape[0])
+        self.cam.array_size.array_size_x.put(shape[1])
+        for roi in (self.roi1, self.roi2):
+            roi.size.x.put(shape[1])
+            roi.size.y.put(shape[0])
+        yy, xx = np.indices(shape)
+        r = np.hypot(yy - shape[0] / 2, xx - shape[1] / 2)
+        rings = sum(np.exp(-0.5 * ((r - r0) / 2.0) ** 2) for r0 in (0.2, 0.35, 0.5) * np.array(min(shape)))
+        self._pattern = (rings / rings.max()).astype(np.float32)
+        self._noise = beamline.normal(1.0, (8, *shape)).astype(np.float32)
+        self.last_file = None
+        self.frame_times = np.empty(0)
+
+    def _frame(self, index, n):
+        flash = self.flash_frame if self.flash_frame is not None else n // 2
+        gain = 1.0 + (1.5 * np.exp(-(index - flash) / max(n / 10, 1)) if index >= flash else 0.0)
+        expected = self.counts * gain * self._pattern + 1.0
+        # Shot noise from a small bank of unit-variance draws: ~10x cheaper than
+        # a fresh Poisson draw per pixel, so the simulator can keep up with kHz bursts
+        noise = self._noise[index % len(self._noise)]
+        return np.maximum(expected + noise * np.sqrt(expected), 0).astype(np.uint32)
+
+    def _update_stats(self, frame, timestamp):
+        for roi, stats in ((self.roi1, self.stats1), (self.roi2, self.stats2)):
+            x0, y0 = roi.min_xyz.min_x.get(), roi.min_xyz.min_y.get()
+            region = frame[y0:y0 + roi.size.y.get(), x0:x0 + roi.size.x.get()]
+            total = float(region.sum())
+            stats.record(total, total / max(region.size, 1),
+                         float(region.max()) if region.size else 0.0, timestamp)
+
+    def stage(self):
+        import h5py  # noqa: F401  load the writer now, not inside the first trigger's arm latency
+
+        return super().stage()
+
+    def _open_file(self, n, shape):
+        import h5py
+
+        hdf5 = self.hdf5
+        folder = self.beamline.data_root / str(hdf5.file_path.get()).lstrip("/")
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{hdf5.file_name.get()}_{int(hdf5.file_number.get()):06d}.h5"
+        f = h5py.File(path, "w")
+        dset = f.create_dataset("entry/data/data", shape=(n, *shape), dtype="uint32",
+                                chunks=(1, *shape))
+        hdf5.full_file_name.put(str(path))
+        if hdf5.auto_increment.get():
+            hdf5.file_number.put(int(hdf5.file_number.get()) + 1)
+        return f, dset, path
+
+    def trigger(self):
+        status = Status(obj=self)
+        n = max(int(self.cam.num_images.get()), 1)
+        period = max(self.cam.acquire_period.get(), self.cam.acquire_time.get())
+        shape = (self.cam.array_size.array_size_y.get(), self.cam.array_size.array_size_x.get())
+
+        hdf5 = self.hdf5
+        stream = hdf5.file_write_mode.get() == 2
+        write = hdf5.enable.get() and (hdf5.capture.get() or not stream)
+
+        def acquire():
+            try:
+                f, dset, path = self._open_file(n, shape) if write else (None, None, None)
+                times = np.empty(n)
+                t0 = time()
+                for i in range(n):
+                    lag = t0 + (i + 1) * period * self.beamline.time_scale - time()
+                    if lag > 0:
+                        sleep(lag)
+                    frame = self._frame(i, n)
+                    times[i] = time()
+                    if dset is not None:
+                        dset[i] = frame
+                    self._update_stats(frame, times[i])
+                self.image.array_size.height.put(shape[0])
+                self.image.array_size.width.put(shape[1])
+                self.image.array_data.put(frame.ravel())
+                if f is not None:
+                    f.create_dataset("entry/instrument/detector/frame_times", data=times)
+                    f.close()
+                    if stream:
+                        hdf5.capture.put(0)
+                self.last_file, self.frame_times = path, times
+            except Exception as exc:
+                status.set_exception(exc)
+            else:
+                status.set_finished()
+
+        threading.Thread(target=acquire, name="sim-eiger", daemon=True).start()
+        return status
+
+
+# -------------------------------
+# 5. The simulated hutch
+# -------------------------------
+beamline = SimBeamline()
+
+sample_y = SimMotor(name="sample_y", beamline=beamline, velocity=0.5, settle_time=0.05)
+sx = SimMotor(name="sx", beamline=beamline, velocity=2.0, settle_time=0.05)
+th = SimMotor(name="th", beamline=beamline, velocity=0.5, settle_time=0.1)
+
+
+def _i0_rate():
+    return beamline.flux
+
+
+def _i2_rate():
+    """Beam past the sample: half-cut knife edge in sy that closes as th tilts, shadow in sx."""
+    dth = np.hypot(th.position - beamline.th0, 0.005)
+    edge = beamline.sample_edge_y - beamline.lever * dth
+    t_y = knife_edge(sample_y.position, edge, beamline.beam_sigma_y)
+    shadow = plateau(sx.position, beamline.sample_center_x, beamline.sample_half_width,
+                     beamline.beam_sigma_x)
+    return beamline.flux * (1 - (1 - t_y) * shadow)
+
+
+def _i1_rate():
+    return beamline.flux * gaussian_profile(sample_y.position, 0.0, 3 * beamline.beam_sigma_y)
+
+
+i0 = SimCounter(_i0_rate, name="i0", beamline=beamline)
+i1 = SimCounter(_i1_rate, name="i1", beamline=beamline)
+i2 = SimCounter(_i2_rate, name="i2", beamline=beamline)
+monitor = SimCounter(lambda: 0.1 * _i2_rate(), name="monitor", beamline=beamline)
+temp = SynSignal(func=lambda: 295.0 + beamline.normal(0.05), name="temperature")
+
+eiger = SimEiger(name="eiger4M", beamline=beamline)
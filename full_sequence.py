@@ -1,120 +1,274 @@
 # automated_gixrd_flash_sequence.py
 
-from plans.alignment_modular import run_monitor_scan, fit_data, move_to_statistic, configure_monitor
+from plans.alignment_modular import (
+    run_monitor_scan, fit_data, move_to_statistic, configure_monitor, optimize_alignment,
+    run_warm_started_scan,
+)
 from config.counters import i2
 from config.detectors import eiger, configure_eiger_for_burst
 from config.motors import sy, sx, th
-from plans.wrapped_scan import run_scan_with_counters
-from bluesky.plan_stubs import mv
-from bluesky import RunEngine
+from plans.wrapped_scan import run_scan_with_counters, run_fly_scan_with_counters
+from plans.burst import BurstReadout, burst_timeseries_plan
+from plans.concurrent_setup import concurrent_setup
+from config.runengine import get_session
+from utils.sequence_runner import SequenceRunner
+from utils.burst_roi import extract_rois, eiger_rois
+from functools import partial
 from time import sleep, strftime
-from utils.logger import append_metadata_to_csv
-from databroker import catalog
-import pandas as pd
 
-RE, _ = setup_runengine_with_databroker()
+session = get_session()
 
 
 def align_vertical_halfcut(count_time=0.1):
     print("🔧 Aligning vertically to half-cut beam...")
-    configure_monitor(i2, count_time)
-    RE(mv(sx, 0))  # center X to avoid clipping during Y scan
-    run_monitor_scan(sy, -1.5, 1.5, 51, monitor=i2, count_time=count_time)
+    # center X to avoid clipping during Y scan while the monitor is configured
+    session.run(concurrent_setup(sx, 0, configure=[partial(configure_monitor, i2, count_time)]))
+    run_monitor_scan(sy, -1.5, 1.5, 51, monitor=i2, count_time=count_time,
+                     adaptive=True, target="edge")
     sleep(0.2)
 
 
-def find_sample_center(count_time=0.1):
+def _plateau_center(xs, ys):
+    _, result = fit_data(xs, ys, model_type="pvoigt", dip=True)  # the sample blocks the beam
+    return result.params["center"].value
+
+
+def find_sample_center(count_time=0.1, sample_type=None, sample_name=None, configure=()):
     print("🔍 Scanning sx to find sample edges...")
-    run = run_monitor_scan(sx, -7, 7, 141, monitor=i2, count_time=count_time)
+    run, _ = run_warm_started_scan(sx, -7, 7, 141, monitor=i2, count_time=count_time,
+                                   target=_plateau_center, adaptive=True,
+                                   sample_type=sample_type, sample_name=sample_name)
     xs = run.xs
     ys = run.ys
-    _, result = fit_data(xs, -np.array(ys), model_type="pvoigt")  # inverted plateau
+    _, result = fit_data(xs, ys, model_type="pvoigt", dip=True)  # the sample blocks the beam
     center = result.params["center"].value
-    move_to_statistic(sx, xs, ys, mode="fit", fit_result=result)
+    # Anything in `configure` (e.g. the burst setup) overlaps the sx move
+    move_to_statistic(sx, xs, ys, mode="fit", fit_result=result, configure=configure)
     return center
 
 
-def fine_align_flatten(count_time=0.1):
+def fine_align_flatten(count_time=0.1, method="com", sample_type=None, sample_name=None):
+    """
+    th then sy to their COM, each scan warm-started from past alignments of
+    this sample (and logged for the next). method="simplex" drives both
+    together instead; it neither uses nor feeds the alignment history.
+    """
+    if method == "simplex":
+        print("🧪 Fine alignment: th and sy together (simplex)...")
+        optimize_alignment([th, sy], monitor=i2, initial_steps=[0.1, 0.06],
+                           limits=[0.5, 0.3], count_time=count_time)
+        return
+
     print("🧪 Fine alignment: th and sy with COM...")
-    run = run_monitor_scan(th, -0.5, 0.5, 51, monitor=i2, count_time=count_time, relative=True)
+    sample = {"sample_type": sample_type, "sample_name": sample_name}
+    run, _ = run_warm_started_scan(th, -0.5, 0.5, 51, monitor=i2, count_time=count_time,
+                                   relative=True, adaptive=True, target="com", **sample)
     move_to_statistic(th, run.xs, run.ys, mode="com")
 
-    run = run_monitor_scan(sy, -0.3, 0.3, 41, monitor=i2, count_time=count_time, relative=True)
+    run, _ = run_warm_started_scan(sy, -0.3, 0.3, 41, monitor=i2, count_time=count_time,
+                                   relative=True, adaptive=True, target="com", **sample)
     move_to_statistic(sy, run.xs, run.ys, mode="com")
 
 
-def trigger_flash_and_burst(nframes=500, frame_time=0.002):
+def burst_file_name(sample_name=None):
+    """HDF5 base name unique to one burst (the plugin appends the file number)."""
+    return "_".join(filter(None, ("flashburst", sample_name, strftime("%Y%m%d_%H%M%S"))))
+
+
+def acquire_flash_burst(nframes=500, frame_time=0.002, source="timeseries", base_filename=None):
+    """
+    Beam part of the flash burst: configure, tilt, trigger, acquire. The run
+    holds one event per frame (stats1/stats2 with frame times), read back in
+    bulk from `source` ("timeseries" or "hdf5"). The run ends only once the
+    HDF5 plugin has closed the file, so the file returned with the run uid
+    is complete and no later burst writes to it.
+    """
+    base_filename = base_filename or burst_file_name()
     print("⚡ Triggering flash and burst imaging...")
-    configure_eiger_for_burst(nframes, frame_time, base_filename="flashburst")
-    RE(mv(th, 0.3))  # grazing incidence angle
-    sleep(0.5)
-
-    # 💡 Here you'd trigger the delay generator via EPICS or TTL PV
-    print("⏱️ Sending trigger to delay generator...")
-    # Example: RE(mv(delaygen.trigger, 1))
-
-    # Start image burst
-    RE(trigger_and_read([eiger]))
-
-    # Save burst ROI stats
-    run = catalog['my_catalog'][-1]
-    df = run.primary.read()
-    roi_cols = [col for col in df.data_vars if "stats1" in col]
-    roi_data = {col: df[col].values for col in roi_cols}
-    roi_data["frame"] = list(range(len(df["time"].values)))
-    roi_df = pd.DataFrame(roi_data)
-    csv_name = f"roi_stats_burst_{strftime('%Y%m%d_%H%M%S')}.csv"
-    roi_df.to_csv(csv_name, index=False)
-    print(f"🧾 Saved ROI stats table to {csv_name}")
+
+    def burst_plan():
+        # Tilt to the grazing incidence angle, configure the Eiger and settle, all at once
+        yield from concurrent_setup(
+            th, 0.3,
+            configure=[partial(configure_eiger_for_burst, nframes, frame_time,
+                               base_filename=base_filename)],
+            settle=0.5,
+        )
+
+        # 💡 Here you'd trigger the delay generator via EPICS or TTL PV
+        print("⏱️ Sending trigger to delay generator...")
+        # Example: yield from mv(delaygen.trigger, 1)
+
+        # Start image burst; per-frame values arrive as one event page at the end
+        return (yield from burst_timeseries_plan(BurstReadout(eiger, nframes, frame_time, source)))
+
+    uids = session.run(burst_plan())
+    # Read the file name now: the next burst reuses the plugin
+    h5_file = eiger.hdf5.full_file_name.get()
+    if eiger.hdf5.capture.get():
+        raise RuntimeError(f"HDF5 plugin still capturing into {h5_file} after the burst")
+    return uids[0], h5_file
+
+
+def save_burst_roi_stats(uid, nframes=500, frame_time=0.002, h5_file=None, rois=None, fmt="hdf5"):
+    """
+    Analysis part: ROI time series for the burst, straight from the Eiger
+    HDF5 file. rois ({name: (x, y, width, height)}) are added to the IOC's
+    roi1/roi2 regions, so new ROIs can be defined after the fact.
+    """
+    h5_file = h5_file or eiger.hdf5.full_file_name.get()
+    all_rois = {**eiger_rois(eiger), **(rois or {})}
+    suffix = "parquet" if fmt == "parquet" else "h5"
+    out_name = f"roi_stats_burst_{uid[:8]}_{strftime('%Y%m%d_%H%M%S')}.{suffix}"
+    extract_rois(h5_file, all_rois, out=out_name, fmt=fmt, frame_time=frame_time)
+    print(f"🧾 Saved ROI stats table to {out_name}")
 
     # Return info for summary
     return {
         "nframes": nframes,
         "frame_time": frame_time,
-        "roi_stats_file": csv_name
+        "burst_file": h5_file,
+        "roi_stats_file": out_name
     }
 
 
-def post_flash_scan(step_size=0.2):
+def trigger_flash_and_burst(nframes=500, frame_time=0.002, rois=None):
+    uid, h5_file = acquire_flash_burst(nframes, frame_time)
+    return save_burst_roi_stats(uid, nframes, frame_time, h5_file, rois)
+
+
+def post_flash_scan(step_size=0.2, fly=False, frame_time=0.01, frames_per_step=1):
+    """
+    Survey sx from -5 to 5 after the flash. Step mode arms and reads the
+    Eiger at every point; fly mode sweeps once with the Eiger in series
+    trigger, frames_per_step frames per step_size of travel.
+    """
     print("📡 Scanning sample after flash to collect diffraction images...")
     n_steps = int(10 / step_size) + 1
     start = -5
     stop = 5
-    RE(mv(th, 0.3))  # ensure correct angle
-    run_scan_with_counters(
+    metadata = {
+        "scan_type": "post_flash_gixrd",
+        "timestamp": strftime("%Y%m%d_%H%M%S"),
+    }
+    if fly:
+        nframes = n_steps * frames_per_step
+        # Internal series; pass trigger_mode=2 (external series) when the controller pulses the Eiger
+        session.run(concurrent_setup(
+            th, 0.3, sx, start,
+            configure=[partial(configure_eiger_for_burst, nframes, frame_time,
+                               base_filename="postflash", trigger_mode=0)],
+        ))
+        return run_fly_scan_with_counters(
+            eiger, sx, start, stop, nframes, frame_time,
+            live_signals=[i2.name, eiger.stats1.mean.name],
+            metadata={**metadata, "scan_mode": "fly"},
+        )
+
+    session.run(concurrent_setup(th, 0.3, sx, start))  # ensure correct angle, park at start
+    return run_scan_with_counters(
         detectors=[eiger],
         motor=sx,
         start=start,
         stop=stop,
         steps=n_steps,
         live_signals=[i2.name, eiger.stats1.mean.name],
-        metadata={
-            "scan_type": "post_flash_gixrd",
-            "timestamp": strftime("%Y%m%d_%H%M%S"),
-        }
+        metadata=metadata,
     )
 
 
-def run_gixrd_flash_sequence():
+def run_gixrd_flash_sequence(sample_type=None, sample_name=None):
     print("🚀 Starting full GIXRD + flash automation sequence...")
+    sample = {"sample_type": sample_type, "sample_name": sample_name}
     align_vertical_halfcut()
-    find_sample_center()
-    fine_align_flatten()
-    trigger_flash_and_burst()
+    find_sample_center(**sample)
+    fine_align_flatten(**sample)
+    burst_info = trigger_flash_and_burst()
     post_flash_scan()
     print("✅ Sequence complete.")
+    session.overhead_report()
     
     # Save final summary
     summary = {
         "timestamp": strftime("%Y-%m-%d %H:%M:%S"),
+        **{k: v for k, v in sample.items() if v is not None},
         "final_sy": sy.position,
         "final_sx": sx.position,
         "final_th": th.position,
         **burst_info
     }
-    append_metadata_to_csv("gixrd_flash_summary.csv", summary)
+    session.exporter.log_csv("gixrd_flash_summary.csv", summary)
+    session.exporter.flush()
     print("📝 Summary log saved.")
 
 
+# -------------------------------
+# Multi-sample, pipelined
+# -------------------------------
+def acquire_sample(sample, stage):
+    """Beam lane for one sample: align, burst, post-flash scan."""
+    info = {k: sample.get(k) for k in ("sample_type", "sample_name")}
+    if "load" in sample:
+        with stage("load"):
+            sample["load"]()  # e.g. a sample changer callable
+    nframes, frame_time = sample.get("nframes", 500), sample.get("frame_time", 0.002)
+    # A file name of its own: the analysis lane reads it while the next sample's burst is written
+    base_filename = burst_file_name(sample.get("sample_name"))
+    burst_config = partial(configure_eiger_for_burst, nframes, frame_time, base_filename=base_filename)
+    with stage("align"):
+        align_vertical_halfcut()
+        # The Eiger does not depend on alignment: configure it during the sx move;
+        # the diff-aware configurator then makes the burst-time apply a no-op
+        find_sample_center(**info, configure=[burst_config])
+        fine_align_flatten(**info)
+    with stage("burst"):
+        uid, h5_file = acquire_flash_burst(nframes, frame_time, base_filename=base_filename)
+    handoff = {
+        "burst_uid": uid,
+        "burst_file": h5_file,
+        "nframes": nframes,
+        "frame_time": frame_time,
+        "final_sy": sy.position,
+        "final_sx": sx.position,
+        "final_th": th.position,
+    }
+    with stage("post_flash_scan"):
+        post_flash_scan(sample.get("step_size", 0.2), fly=sample.get("fly", False))
+    return handoff
+
+
+def analyze_sample(sample, handoff, stage):
+    """Analysis lane: ROI table for the burst, then the summary row."""
+    with stage("roi_stats"):
+        burst_info = save_burst_roi_stats(handoff["burst_uid"], handoff["nframes"],
+                                          handoff["frame_time"], handoff["burst_file"],
+                                          sample.get("rois"))
+    with stage("summary_log"):
+        summary = {
+            "timestamp": strftime("%Y-%m-%d %H:%M:%S"),
+            **{k: sample[k] for k in ("sample_type", "sample_name") if sample.get(k) is not None},
+            **{k: v for k, v in handoff.items() if k.startswith("final_")},
+            **burst_info,
+        }
+        session.exporter.log_csv("gixrd_flash_summary.csv", summary).result()
+    return summary
+
+
+def run_gixrd_flash_samples(samples, pipelined=True, max_pending=2):
+    """
+    Run the flash sequence over a list of sample dicts (sample_name,
+    sample_type, nframes, frame_time, step_size, fly, rois, optional load
+    callable).
+    The ROI table and summary for sample N are built while sample N+1 is
+    aligned and acquired. Returns (summaries, utilization report).
+    """
+    runner = SequenceRunner(acquire_sample, analyze_sample,
+                            pipelined=pipelined, max_pending=max_pending)
+    summaries = runner.run(samples)
+    util = runner.report(len(samples))
+    session.exporter.flush()
+    return summaries, util
+
+
 if __name__ == "__main__":
     run_gixrd_flash_sequence()
\ No newline at end of file
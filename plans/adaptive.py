@@ -0,0 +1,140 @@
+# plans/adaptive.py
+
+import numpy as np
+import bluesky.plan_stubs as bps
+import bluesky.preprocessors as bpp
+from bluesky.plans import scan, rel_scan
+
+
+# -------------------------------
+# 1. Target statistics
+# -------------------------------
+def _com(xs, ys):
+    # Weight by local spacing so a non-uniform grid gives the same COM
+    w = ys * np.gradient(xs)
+    return np.sum(xs * w) / np.sum(w)
+
+
+def _peak(xs, ys):
+    return xs[np.argmax(ys)]
+
+
+def _edge(xs, ys):
+    # Midpoint of the steepest interval (knife edge / half-cut transition)
+    i = np.argmax(np.abs(np.diff(ys)))
+    return 0.5 * (xs[i] + xs[i + 1])
+
+
+STATISTICS = {"com": _com, "peak": _peak, "edge": _edge}
+
+
+def _refine_scores(xs, ys, target):
+    """Score each interval between sorted points by how much signal it hides."""
+    span = np.ptp(ys) or 1.0
+    score = np.abs(np.diff(ys)) / span
+    if target != "edge":
+        # Peak-like targets also need the top of the peak resolved
+        score += 0.5 * (0.5 * (ys[1:] + ys[:-1]) - ys.min()) / span
+    return score * np.diff(xs)
+
+
+# -------------------------------
+# 2. Coarse-to-fine plan
+# -------------------------------
+def adaptive_scan(detectors, motor, start, stop, *, signal, coarse_steps=11,
+                  min_spacing=None, max_points=101, target="com",
+                  tolerance=None, refine_per_pass=None, md=None):
+    """
+    Sparse pass over [start, stop], then repeatedly add midpoints where the
+    signal changes fastest until `target` moves by less than `tolerance`.
+
+    target: "com", "peak", "edge", or a callable(xs, ys) -> position.
+    """
+    statistic = target if callable(target) else STATISTICS[target]
+    target_name = getattr(target, "__name__", target)
+    coarse_dx = abs(stop - start) / (coarse_steps - 1)
+    min_spacing = min_spacing or coarse_dx / 8
+    tolerance = tolerance or coarse_dx / 10
+    refine_per_pass = refine_per_pass or max(2, coarse_steps // 3)
+
+    _md = {
+        "plan_name": "adaptive_scan",
+        "motors": [motor.name],
+        "detectors": [det.name for det in detectors],
+        "adaptive": {"coarse_steps": coarse_steps, "target": str(target_name),
+                     "tolerance": tolerance, "max_points": max_points},
+        "hints": {"dimensions": [([motor.name], "primary")]},
+    }
+    _md.update(md or {})
+
+    measured = {}
+    outcome = {}  # run_decorator returns the run uid, not the plan's value
+
+    def measure(x):
+        yield from bps.mv(motor, x)
+        reading = yield from bps.trigger_and_read(list(detectors) + [motor])
+        measured[x] = reading[signal]["value"]
+
+    @bpp.stage_decorator(list(detectors) + [motor])
+    @bpp.run_decorator(md=_md)
+    def inner():
+        for x in np.linspace(start, stop, coarse_steps):
+            yield from measure(x)
+
+        previous = None
+        while len(measured) < max_points:
+            xs = np.array(sorted(measured))
+            ys = np.array([measured[x] for x in xs])
+            current = statistic(xs, ys)
+            if previous is not None and abs(current - previous) <= tolerance:
+                break
+            previous = current
+
+            scores = _refine_scores(xs, ys, target_name)
+            scores[np.diff(xs) < 2 * min_spacing] = -np.inf
+            order = np.argsort(scores)[::-1][:min(refine_per_pass, max_points - len(measured))]
+            order = order[np.isfinite(scores[order])]
+            if not len(order):
+                break
+            for i in order:
+                yield from measure(0.5 * (xs[i] + xs[i + 1]))
+
+        xs = np.array(sorted(measured))
+        outcome["target"] = statistic(xs, np.array([measured[x] for x in xs]))
+
+    yield from inner()
+    return outcome.get("target")
+
+
+def rel_adaptive_scan(detectors, motor, start, stop, **kwargs):
+    """adaptive_scan relative to the current position; motor is restored after."""
+    initial = motor.position
+
+    @bpp.reset_positions_decorator([motor])
+    def inner():
+        return (yield from adaptive_scan(detectors, motor, initial + start,
+                                         initial + stop, **kwargs))
+
+    return (yield from inner())
+
+
+# -------------------------------
+# 3. Dense-or-adaptive plan factory
+# -------------------------------
+def monitor_scan_plan(detectors, motor, start, stop, steps, *, signal,
+                      relative=False, adaptive=False, target="com",
+                      tolerance=None, md=None):
+    """
+    Plan for the alignment helpers. With adaptive=True, `steps` is read as the
+    dense grid it replaces: the first pass uses ~steps/5 points, refinement
+    never goes finer than the dense step, and at most `steps` points are taken.
+    """
+    if not adaptive:
+        plan = rel_scan if relative else scan
+        return plan(detectors, motor, start, stop, steps, md=md)
+
+    dense_dx = abs(stop - start) / (steps - 1)
+    plan = rel_adaptive_scan if relative else adaptive_scan
+    return plan(detectors, motor, start, stop, signal=signal,
+                coarse_steps=max(5, steps // 5 + 1), min_spacing=dense_dx,
+                max_points=steps, target=target, tolerance=tolerance, md=md)
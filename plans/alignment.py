@@ -1,23 +1,16 @@
 # plans/alignment.py
 
-from bluesky.plans import scan, rel_scan
 from bluesky.plan_stubs import mv, sleep
-from bluesky.preprocessors import run_decorator
-from bluesky import RunEngine
-from config.runengine import setup_runengine_with_databroker, LiveStatsPlot
-from utils.logger import append_metadata_to_csv
+from config.runengine import get_session, LiveStatsPlot
+from plans.adaptive import monitor_scan_plan, STATISTICS
+from plans.peak_stats import StreamingPeakStats, scan_until_peak_passed
+from config.catalog import cat
 from time import strftime
-from databroker import catalog
 import numpy as np
-import matplotlib.pyplot as plt
-from lmfit.models import GaussianModel, PseudoVoigtModel
+from plans.fitting import fast_fit
 from ophyd import Device
-from bluesky.utils import short_uid
 
-cat = catalog['my_catalog']
 
-
-@run_decorator()
 def scan_monitor_vs_motor(
     motor: Device,
     start: float,
@@ -31,9 +24,22 @@ def scan_monitor_vs_motor(
     move_to: str = "peak",  # "peak", "com", or None
     label: str = None,
     model_type: str = "gaussian",
+    adaptive: bool = False,
+    target: str = "com",
+    tolerance: float = None,
+    early_stop: bool = False,
+    stop_fraction: float = 0.1,
 ):
-    """Scan monitor vs motor with stats, fit, and optional move-to-peak/com"""
-    RE, _ = setup_runengine_with_databroker()
+    """Scan monitor vs motor with stats, fit, and optional move-to-peak/com
+
+    adaptive=True swaps the dense grid for a coarse-to-fine scan that stops
+    once `target` ("com", "peak", "edge") converges within `tolerance`.
+    early_stop=True ends the scan once the peak has been passed and the signal
+    is back below baseline + stop_fraction * peak height.
+    """
+    if adaptive and early_stop:
+        raise ValueError("adaptive and early_stop cannot be combined")
+    session = get_session()
     x_field, y_field = motor.name, monitor.name
     label = label or f"{y_field} vs {x_field}"
 
@@ -43,48 +49,63 @@ def scan_monitor_vs_motor(
     elif hasattr(monitor, "integration_time"):
         monitor.integration_time.put(count_time)
 
-    # Live plot
-    stats_plot = LiveStatsPlot(y_field=y_field, x_field=x_field, label=label)
-    RE.subscribe(stats_plot)
+    # Live plot + streaming COM/peak/FWHM
+    stats_plot = LiveStatsPlot(y_field=y_field, x_field=x_field, label=label, sort_x=adaptive)
+    peak_stats = StreamingPeakStats(x_field, y_field, stop_fraction=stop_fraction)
 
     # Metadata
     timestamp = strftime("%Y%m%d_%H%M%S")
-    uid = short_uid()
     metadata = {
         "plan": "alignment_scan",
         "monitor": y_field,
         "motor": x_field,
         "count_time": count_time,
         "timestamp": timestamp,
-        "uid": uid,
         "fit_model": model_type,
+        "adaptive": adaptive,
+        "early_stop": early_stop,
+        "relative": relative,
+        "position_before": motor.position,
     }
 
     # Run scan
-    plan = rel_scan if relative else scan
-    RE(plan([monitor], motor, start, stop, steps), metadata)
-
-    # Post-scan: analyze
+    if early_stop:
+        plan = scan_until_peak_passed(
+            [monitor], motor, start, stop, steps, stats=peak_stats, relative=relative,
+        )
+    else:
+        plan = monitor_scan_plan(
+            [monitor], motor, start, stop, steps, signal=y_field,
+            relative=relative, adaptive=adaptive, target=target, tolerance=tolerance,
+        )
+    uids = session.run(plan, metadata, [stats_plot, peak_stats])
+    metadata["uid"] = uids[0]
+    metadata["n_points"] = len(stats_plot)
+
+    # Stats are already up to date; only the adaptive (non-uniform) grid needs
+    # the spacing-weighted COM
+    order = np.argsort(stats_plot.xs)
+    xs = np.array(stats_plot.xs)[order]
+    ys = np.array(stats_plot.ys)[order]
+    com = STATISTICS["com"](xs, ys) if adaptive else peak_stats.com
+    metadata.update({"com": com, "peak": peak_stats.peak, "fwhm": peak_stats.fwhm})
+
+    # Post-scan: fit
     fit_result = None
     if fit:
-        xs = np.array(stats_plot.xs)
-        ys = np.array(stats_plot.ys)
         if len(xs) > 5:
-            model = GaussianModel() if model_type == "gaussian" else PseudoVoigtModel()
-            params = model.guess(ys, x=xs)
-            fit_result = model.fit(ys, params, x=xs)
+            fit_result = fast_fit(xs, ys, "gaussian" if model_type == "gaussian" else "pvoigt")
 
             fit_x = np.linspace(xs.min(), xs.max(), 300)
             fit_y = fit_result.eval(x=fit_x)
             stats_plot.ax.plot(fit_x, fit_y, '--', label=f"{model_type} fit")
             stats_plot.ax.legend()
-            plt.draw()
+            stats_plot.fig.canvas.draw_idle()
 
             peak_pos = fit_result.params["center"].value
             peak_amp = fit_result.params["amplitude"].value
             fwhm = fit_result.params.get("fwhm", None)
             fwhm_val = fwhm.value if fwhm else np.nan
-            com = np.sum(xs * ys) / np.sum(ys)
 
             metadata.update({
                 "fit_center": peak_pos,
@@ -100,13 +121,12 @@ def scan_monitor_vs_motor(
 
             # Optional move
             if move_to == "peak":
-                RE(mv(motor, peak_pos))
+                session.run(mv(motor, peak_pos))
             elif move_to == "com":
-                RE(mv(motor, com))
+                session.run(mv(motor, com))
 
-    # Save metadata and results
-    latest = cat[-1]
-    latest.export(f"align_{x_field}_{timestamp}.h5", fmt="hdf5")
-    append_metadata_to_csv("alignment_log.csv", metadata)
+    # Save metadata and results in the background (session.exporter.wait(uid) for the file)
+    session.exporter.export(cat, metadata["uid"], f"align_{x_field}_{timestamp}.h5")
+    session.exporter.log_csv("alignment_log.csv", metadata)
 
     return stats_plot, fit_result
\ No newline at end of file
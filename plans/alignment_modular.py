@@ -1,18 +1,19 @@
 # plans/alignment_modular.py
 
 import numpy as np
-from bluesky.plans import scan, rel_scan
-from bluesky.plan_stubs import mv
-from bluesky import RunEngine
-from bluesky.utils import short_uid
-from config.runengine import setup_runengine_with_databroker, LiveStatsPlot
-from utils.logger import append_metadata_to_csv
+from bluesky.callbacks import CallbackBase
+from config.runengine import get_session, LiveStatsPlot
+from config.counters import counters
+from config.detectors import eiger, configure_eiger_single
+from plans.adaptive import monitor_scan_plan, STATISTICS
+from plans.fly_scan import fly_monitor_plan, FlyMonitorCollector
+from plans.fitting import fast_fit, get_model
+from plans.optimize import simplex_optimize
+from plans.warm_start import propose_scan_range, feature_in_window
+from plans.concurrent_setup import concurrent_setup
+from utils.live_plot import GrowableBuffer
+from config.catalog import cat
 from time import strftime
-from databroker import catalog
-from lmfit.models import GaussianModel, PseudoVoigtModel
-import matplotlib.pyplot as plt
-
-cat = catalog['my_catalog']
 
 # -------------------------------
 # 1. Configure monitor
@@ -41,51 +42,109 @@ def configure_monitor(monitor, count_time=0.1):
 # -------------------------------
 def run_monitor_scan(
     motor, start, stop, steps, monitor, count_time=0.1,
-    relative=False, label=None, metadata=None
+    relative=False, label=None, metadata=None,
+    adaptive=False, target="com", tolerance=None,
 ):
-    RE, _ = setup_runengine_with_databroker()
+    """
+    Scan `monitor` vs `motor`. With adaptive=True the `steps`-point grid is
+    replaced by a coarse-to-fine scan that stops once `target` ("com", "peak",
+    "edge" or a callable(xs, ys)) converges within `tolerance`.
+    """
+    session = get_session()
     x_field, y_field = motor.name, monitor.name
     label = label or f"{y_field} vs {x_field}"
 
     configure_monitor(monitor, count_time)
 
     # Live plot
-    live_plot = LiveStatsPlot(y_field=y_field, x_field=x_field, label=label)
-    RE.subscribe(live_plot)
+    live_plot = LiveStatsPlot(y_field=y_field, x_field=x_field, label=label, sort_x=adaptive)
 
-    md = metadata or {}
+    md = metadata if metadata is not None else {}
     md.update({
         "plan": "alignment_scan",
         "monitor": y_field,
         "motor": x_field,
         "count_time": count_time,
         "timestamp": strftime("%Y%m%d_%H%M%S"),
-        "uid": short_uid(),
+        "relative": relative,
+        "position_before": motor.position,
     })
 
-    plan = rel_scan if relative else scan
-    RE(plan([monitor], motor, start, stop, steps), md)
+    plan = monitor_scan_plan(
+        [monitor], motor, start, stop, steps, signal=y_field,
+        relative=relative, adaptive=adaptive, target=target, tolerance=tolerance,
+    )
+    uids = session.run(plan, md, [live_plot])
+    md["uid"] = uids[0]
+    md["n_points"] = len(live_plot)
 
     return live_plot
 
 
+def run_monitor_fly_scan(
+    motor, start, stop, steps, monitor, count_time=0.1,
+    relative=False, label=None, metadata=None, velocity=None,
+):
+    """
+    Fly-scan variant of run_monitor_scan: one continuous sweep with the
+    counters monitored in the background. By default the velocity gives the
+    sweep the same total counting time as a `steps`-point step scan, and the
+    readings are averaged onto `steps` bins of interpolated motor position.
+    """
+    session = get_session()
+    x_field, y_field = motor.name, monitor.name
+    label = label or f"{y_field} vs {x_field} (fly)"
+
+    configure_monitor(monitor, count_time)
+
+    if relative:
+        start, stop = motor.position + start, motor.position + stop
+    if velocity is None:
+        velocity = abs(stop - start) / (steps * count_time)
+
+    readback = getattr(motor, "user_readback", motor)  # EpicsMotor: same name as motor
+    collector = FlyMonitorCollector(
+        y_field=y_field, x_field=readback.name, label=label,
+        latency=count_time / 2, bins=steps,
+    )
+
+    md = metadata or {}
+    md.update({
+        "plan": "alignment_fly_scan",
+        "monitor": y_field,
+        "motor": x_field,
+        "count_time": count_time,
+        "velocity": velocity,
+        "timestamp": strftime("%Y%m%d_%H%M%S"),
+    })
+
+    # Every beamline counter streams alongside the chosen monitor
+    signals = [monitor] + [c for c in counters if c is not monitor]
+    plan = fly_monitor_plan(motor, start, stop, signals, velocity=velocity)
+    uids = session.run(plan, md, [collector])
+    md["uid"] = uids[0]
+    md["n_points"] = len(collector)
+
+    return collector
+
+
 # -------------------------------
 # 3. Fit data (Gaussian or PVoigt)
 # -------------------------------
-def fit_data(xs, ys, model_type="gaussian"):
-    if model_type == "gaussian":
-        model = GaussianModel()
-    elif model_type == "pvoigt":
-        model = PseudoVoigtModel()
-    else:
+def fit_data(xs, ys, model_type="gaussian", dip=False):
+    """
+    Closed-form estimate first, cached lmfit model only if the estimate is
+    poor. A 2-D `ys` (one signal/run per row) returns a list of results.
+    """
+    if model_type not in ("gaussian", "pvoigt"):
         raise ValueError("Invalid model_type")
-
-    params = model.guess(ys, x=xs)
-    result = model.fit(ys, params, x=xs)
-    return model, result
+    result = fast_fit(xs, ys, model_type=model_type, dip=dip)
+    return get_model(model_type), result
 
 
 def plot_fit(xs, ys, model, result, ax=None, label="fit"):
+    import matplotlib.pyplot as plt
+
     if ax is None:
         _, ax = plt.subplots()
 
@@ -99,28 +158,283 @@ def plot_fit(xs, ys, model, result, ax=None, label="fit"):
 # -------------------------------
 # 4. Move motor to peak/COM/fit
 # -------------------------------
-def move_to_statistic(motor, xs, ys, mode="com", fit_result=None):
-    RE, _ = setup_runengine_with_databroker()
+def statistic_target(xs, ys, mode="com", fit_result=None):
+    # Adaptive scans visit points out of order and on a non-uniform grid
+    order = np.argsort(xs)
+    xs, ys = np.asarray(xs)[order], np.asarray(ys)[order]
 
     if mode == "peak":
         idx = np.argmax(ys)
-        target = xs[idx]
+        return xs[idx]
     elif mode == "com":
-        target = np.sum(xs * ys) / np.sum(ys)
+        return STATISTICS["com"](xs, ys)
     elif mode == "fit" and fit_result:
-        target = fit_result.params["center"].value
-    else:
-        raise ValueError("Invalid move mode or missing fit_result")
+        return fit_result.params["center"].value
+    raise ValueError("Invalid move mode or missing fit_result")
 
+
+def move_to_statistic(motor, xs, ys, mode="com", fit_result=None, *, moves=(), configure=(), settle=0.0):
+    """
+    Move to the statistic in one RunEngine call. Independent follow-up setup
+    can ride along: `moves` takes extra motor, position pairs, e.g.
+    (sy, 0.5, th, 0.1), and `configure` callables, all run concurrently with
+    the move (see concurrent_setup).
+    """
+    target = statistic_target(xs, ys, mode, fit_result)
     print(f"🔧 Moving {motor.name} to {target:.4f} ({mode})")
-    RE(mv(motor, target))
+    get_session().run(concurrent_setup(motor, target, *moves, configure=configure, settle=settle))
+    return target
 
 
 # -------------------------------
 # 5. Save metadata
 # -------------------------------
 def save_alignment_metadata(x_field, metadata):
+    """Queue the export of run metadata["uid"] and its log row; returns the export Future."""
+    exporter = get_session().exporter
     timestamp = metadata.get("timestamp", strftime("%Y%m%d_%H%M%S"))
     h5name = f"align_{x_field}_{timestamp}.h5"
-    cat[-1].export(h5name, fmt="hdf5")
-    append_metadata_to_csv("alignment_log.csv", metadata)
\ No newline at end of file
+    export = exporter.export(cat, metadata["uid"], h5name)
+    exporter.log_csv("alignment_log.csv", metadata)
+    return export
+
+# -------------------------------
+# 6. Single-pass multi-signal alignment
+# -------------------------------
+class MultiSignalCollector(CallbackBase):
+    """Buffers the motor position and every requested field from one scan."""
+
+    def __init__(self, x_field, y_fields):
+        self.x_field = x_field
+        self.y_fields = list(y_fields)
+        self._buffers = {f: GrowableBuffer() for f in [x_field] + self.y_fields}
+
+    def start(self, doc):
+        for buf in self._buffers.values():
+            buf.clear()
+
+    def event(self, doc):
+        data = doc["data"]
+        if self.x_field in data:
+            for field, buf in self._buffers.items():
+                buf.append(data.get(field, np.nan))
+
+    @property
+    def xs(self):
+        return self._buffers[self.x_field].data
+
+    def column(self, field):
+        return self._buffers[field].data
+
+
+MIN_ANALYZE_POINTS = 5
+
+
+def analyze_signals(xs, columns, model_type="gaussian"):
+    """
+    COM, peak, FWHM and fit center for every signal that shares the x axis
+    `xs`. Signals without NaNs are fitted in one batched call; a signal with
+    NaNs (e.g. missing readings) is analyzed on its finite points alone,
+    and one with fewer than MIN_ANALYZE_POINTS of them is left out with a
+    warning. Returns (table, fits); raises ValueError if no signal is left.
+    """
+    import pandas as pd
+
+    order = np.argsort(xs)
+    xs = np.asarray(xs, dtype=float)[order]
+    columns = {name: np.asarray(ys, dtype=float)[order] for name, ys in columns.items()}
+    finite = {name: np.isfinite(ys) for name, ys in columns.items()}
+    names = [name for name in columns if finite[name].sum() >= MIN_ANALYZE_POINTS]
+    skipped = [name for name in columns if name not in names]
+    if skipped:
+        print(f"⚠️ Fewer than {MIN_ANALYZE_POINTS} finite points, not analyzed: {skipped}")
+    if not names:
+        raise ValueError(f"No signal has {MIN_ANALYZE_POINTS} finite points to analyze")
+
+    whole = [name for name in names if finite[name].all()]
+    fits = {}
+    if whole:
+        fits.update(zip(whole, fast_fit(xs, np.stack([columns[n] for n in whole]), model_type=model_type)))
+    for name in names:
+        if name not in fits:
+            mask = finite[name]
+            fits[name] = fast_fit(xs[mask], columns[name][mask], model_type=model_type)
+
+    rows = []
+    for name in names:
+        mask, fit = finite[name], fits[name]
+        x, ys = xs[mask], columns[name][mask]
+        rows.append({
+            "signal": name,
+            "com": STATISTICS["com"](x, ys),
+            "peak": STATISTICS["peak"](x, ys),
+            "fwhm": fit.params["fwhm"].value,
+            "fit_center": fit.params["center"].value,
+            "fit_r2": fit.r2,
+            "fit_method": fit.method,
+        })
+    return pd.DataFrame(rows).set_index("signal"), fits
+
+
+def run_multi_signal_scan(
+    motor, start, stop, steps, signals=None, eiger_fields=(),
+    count_time=0.1, relative=False, drive="monitor", move_to=None,
+    model_type="gaussian", label=None, metadata=None,
+    adaptive=False, target="com", tolerance=None,
+):
+    """
+    One motor sweep that reads every counter (default: config.counters) plus
+    the requested Eiger stats fields (e.g. "eiger4M_stats1_total"; the
+    Eiger is then set to one `count_time` exposure per point), then returns
+    a per-signal result table.
+    `drive` names the signal used for the live plot, adaptive refinement and,
+    if `move_to` is "com", "peak" or "fit", the final move.
+    """
+    session = get_session()
+    signals = list(signals or counters)
+    eiger_fields = list(eiger_fields or [])
+    detectors = signals + ([eiger] if eiger_fields else [])
+    y_fields = [sig.name for sig in signals] + eiger_fields
+    if drive not in y_fields:
+        raise ValueError(f"drive signal '{drive}' is not one of {y_fields}")
+    x_field = motor.name
+
+    for sig in signals:
+        configure_monitor(sig, count_time)
+    if eiger_fields:
+        configure_eiger_single(count_time)   # not the last burst's hundreds of frames per point
+
+    live_plot = LiveStatsPlot(y_field=drive, x_field=x_field,
+                              label=label or f"{drive} vs {x_field}", sort_x=adaptive)
+    collector = MultiSignalCollector(x_field, y_fields)
+
+    md = metadata or {}
+    md.update({
+        "plan": "multi_signal_alignment",
+        "monitor": drive,
+        "signals": y_fields,
+        "motor": x_field,
+        "count_time": count_time,
+        "timestamp": strftime("%Y%m%d_%H%M%S"),
+    })
+
+    plan = monitor_scan_plan(
+        detectors, motor, start, stop, steps, signal=drive,
+        relative=relative, adaptive=adaptive, target=target, tolerance=tolerance,
+    )
+    uids = session.run(plan, md, [live_plot, collector])
+    md["uid"] = uids[0]
+    md["n_points"] = len(collector.xs)
+
+    table, fits = analyze_signals(
+        collector.xs, {f: collector.column(f) for f in y_fields}, model_type
+    )
+    print(f"\n📊 Single-pass results for {x_field}:")
+    print(table.to_string(float_format="{:.4f}".format))
+
+    if move_to:
+        if drive not in fits:
+            raise ValueError(f"Cannot move to {move_to}: drive signal '{drive}' was not analyzed")
+        ys = collector.column(drive)
+        mask = np.isfinite(ys)
+        move_to_statistic(motor, collector.xs[mask], ys[mask], mode=move_to, fit_result=fits[drive])
+
+    return table, collector
+
+
+# -------------------------------
+# 7. Multi-motor optimizer alignment
+# -------------------------------
+def optimize_alignment(
+    motors, monitor, initial_steps, limits=None, count_time=0.1,
+    max_evals=60, xtol=None, ftol=1e-3, metadata=None,
+):
+    """
+    Drive several coupled motors together (e.g. th and sy) to maximize
+    `monitor` with a Nelder-Mead simplex, instead of alternating 1-D scans.
+    Motors are left at the best point; returns the optimizer summary.
+    """
+    session = get_session()
+    configure_monitor(monitor, count_time)
+
+    md = metadata or {}
+    md.update({
+        "plan": "optimizer_alignment",
+        "monitor": monitor.name,
+        "motors": [m.name for m in motors],
+        "count_time": count_time,
+        "timestamp": strftime("%Y%m%d_%H%M%S"),
+    })
+
+    result = {}
+
+    def plan():
+        result.update((yield from simplex_optimize(
+            [monitor], motors, signal=monitor.name, initial_steps=initial_steps,
+            limits=limits, xtol=xtol, ftol=ftol, max_evals=max_evals,
+        )))
+
+    uids = session.run(plan(), md)
+    md["uid"] = uids[0]
+    md.update({f"best_{name}": pos for name, pos in result["position"].items()})
+    md["n_points"] = result["n_evals"]
+
+    best = ", ".join(f"{name}={pos:.4f}" for name, pos in result["position"].items())
+    print(f"🎯 Optimizer: {best} → {monitor.name}={result['value']:.4g} "
+          f"in {result['n_evals']} counts")
+    return result
+
+
+
+# -------------------------------
+# 8. History warm-started alignment
+# -------------------------------
+def run_warm_started_scan(
+    motor, start, stop, steps, monitor, *, target="com", sample_type=None,
+    sample_name=None, relative=False, count_time=0.1, max_widen=3, **scan_kwargs,
+):
+    """
+    run_monitor_scan over a window narrowed from past alignments of this motor
+    (same sample type/name, monitor and target). If the feature is not found inside the window, the
+    window is doubled (same step size) up to `max_widen` times, ending at the
+    default range. The result is logged to alignment_log for later warm starts.
+    Returns (live_plot, metadata).
+    """
+    w_start, w_stop, w_steps, info = propose_scan_range(
+        motor, start, stop, steps, monitor=monitor, target=target,
+        sample_type=sample_type, sample_name=sample_name, relative=relative,
+    )
+    lo, hi = min(start, stop), max(start, stop)
+    dx = (hi - lo) / (steps - 1)
+    sample_md = {k: v for k, v in (("sample_type", sample_type),
+                                   ("sample_name", sample_name)) if v is not None}
+    if info["warm_start"]:
+        print(f"🎯 Warm start for {motor.name}: {w_start:.4f}..{w_stop:.4f} ({w_steps} pts, "
+              f"{info['n_history']} past alignments)")
+
+    for n_widen in range(max_widen + 1):
+        md = dict(sample_md, warm_start=info["warm_start"], n_widen=n_widen)
+        live_plot = run_monitor_scan(
+            motor, w_start, w_stop, w_steps, monitor, count_time=count_time,
+            relative=relative, metadata=md, target=target, **scan_kwargs,
+        )
+        if not info["warm_start"] or feature_in_window(live_plot.xs, live_plot.ys, target):
+            break
+        center, half = 0.5 * (w_start + w_stop), w_stop - w_start
+        w_start, w_stop = max(lo, center - half), min(hi, center + half)
+        w_steps = int(round((w_stop - w_start) / dx)) + 1
+        info["warm_start"] = (w_stop - w_start) < (hi - lo)
+        print(f"↔️ Feature not inside window; widening {motor.name} to "
+              f"{w_start:.4f}..{w_stop:.4f} ({w_steps} pts)")
+
+    # Record where the feature was, for the next warm start
+    order = np.argsort(live_plot.xs)
+    xs, ys = live_plot.xs[order], live_plot.ys[order]
+    statistic = target if callable(target) else STATISTICS[target]
+    md["center"] = statistic(xs, ys)
+    md["center_target"] = getattr(target, "__name__", target)
+    if target in ("com", "peak"):
+        md["fwhm"] = fast_fit(xs, ys).params["fwhm"].value
+    get_session().exporter.log_csv("alignment_log.csv", md)
+
+    return live_plot, md
@@ -0,0 +1,183 @@
+# plans/burst.py
+
+import numpy as np
+import bluesky.plan_stubs as bps
+import bluesky.preprocessors as bpp
+from ophyd.status import Status, SubscriptionStatus
+from utils.burst_roi import extract_rois, eiger_rois, frame_times, EPICS_EPOCH
+
+SOURCES = ("timeseries", "hdf5")
+
+
+# -------------------------------
+# 1. Bulk per-frame readout
+# -------------------------------
+class BurstReadout:
+    """
+    Flyer for one Eiger burst that records every frame but reads them back
+    in bulk. kickoff() arms the stats plugins' time-series buffers and, in
+    Stream mode, HDF5 capture of nframes, then triggers the detector;
+    complete() is the acquisition and, when capturing, the plugin closing
+    the file; collect_pages() returns the whole burst as a single event
+    page.
+
+    source "timeseries": total/mean/max per frame from the NDStats TS
+    buffers of `stats` (one read per array, whatever the burst length),
+    stamped with the plugin's per-frame NDArray timestamps.
+    source "hdf5": ROI sum/mean per frame from the file the HDF5 plugin
+    wrote (utils.burst_roi), for the IOC's roi1/roi2 plus any `rois`,
+    stamped with the file's frame times.
+
+    Each page also holds the frame index and the time since the first
+    frame; per-field timestamps are the true frame times. If the TS
+    buffers come back short (their waveforms have a fixed length, 2048 on
+    most IOCs) the burst is read from the HDF5 file instead when the
+    plugin wrote one; otherwise, and whenever the file lacks frames or
+    frame times, the read raises rather than inventing timestamps.
+    """
+
+    def __init__(self, det, nframes, frame_time, source="timeseries",
+                 stats=("stats1", "stats2"), rois=None, stream_name="primary"):
+        if source not in SOURCES:
+            raise ValueError(f"Unknown source {source!r}; choose from {SOURCES}")
+        self.det = det
+        self.name = det.name
+        self.parent = None
+        self.nframes = int(nframes)
+        self.frame_time = frame_time
+        self.source = source
+        self.stats = [getattr(det, s) for s in stats]
+        self.rois = rois or {}
+        self.stream_name = stream_name
+        self.h5_file = None
+        self._acquiring = None
+        self._file_closed = None
+        self._page = None
+        self._read_source = source
+
+    def _arm_buffers(self):
+        if self.source == "timeseries":
+            for stats in self.stats:
+                stats.ts_num_points.set(self.nframes).wait(10)
+                stats.ts_control.set(0).wait(10)     # Erase/Start
+        hdf5 = self.det.hdf5
+        self._file_closed = None
+        if hdf5.enable.get() and hdf5.file_write_mode.get() == 2:   # Stream: nothing is written unless captured
+            hdf5.num_capture.set(self.nframes).wait(10)
+            hdf5.capture.set(1).wait(10)
+            # Capture drops back to 0 once nframes are written and the file is closed
+            self._file_closed = SubscriptionStatus(hdf5.capture, lambda value, **kwargs: value == 0,
+                                                   run=False)
+
+    def kickoff(self):
+        self._arm_buffers()
+        self._acquiring = self.det.trigger()
+        status = Status(obj=self)
+        status.set_finished()
+        return status
+
+    def complete(self):
+        if self._file_closed is None:
+            return self._acquiring
+        return self._acquiring & self._file_closed
+
+    def _read_timeseries(self):
+        """(data, times) from the TS buffers, or (None, reason) if they hold fewer than nframes."""
+        n = self.nframes
+        for stats in self.stats:
+            stats.ts_control.set(2).wait(10)         # Stop
+            stats.ts_read.set(1).wait(10)            # copy the buffers to the waveforms
+        counts = [int(stats.ts_current_point.get()) for stats in self.stats]
+        data = {}
+        for stats in self.stats:
+            # Same keys as a stats read, so live plots and fits see the usual fields
+            mean = getattr(stats, "mean_value", None) or stats.mean
+            for sig, ts in ((stats.total, stats.ts_total), (mean, stats.ts_mean_value),
+                            (stats.max_value, stats.ts_max_value)):
+                data[sig.name] = np.asarray(ts.get(), dtype=float)
+        times = np.asarray(self.stats[0].ts_timestamp.get(), dtype=float)
+        got = min(counts + [len(times)] + [len(v) for v in data.values()])
+        if got < n:
+            return None, f"the TS buffers hold {got} of {n} frames"
+        times = times[:n]
+        if not np.all(times > 0):
+            return None, "the TS buffers have no NDArray timestamps"
+        data = {key: values[:n] for key, values in data.items()}
+        return data, times + (EPICS_EPOCH if times[-1] < 1e9 else 0.0)
+
+    def _read_hdf5(self):
+        n = self.nframes
+        self.h5_file = self.det.hdf5.full_file_name.get()
+        rois = {**eiger_rois(self.det), **self.rois}
+        table = extract_rois(self.h5_file, rois, frame_time=self.frame_time)
+        times = frame_times(self.h5_file)
+        if len(table) < n:
+            raise RuntimeError(f"{self.name}: {self.h5_file} holds {len(table)} of {n} frames")
+        if times is None or len(times) < n or not np.all(times[:n] > 0):
+            raise RuntimeError(f"{self.name}: {self.h5_file} has no per-frame timestamps")
+        data = {f"{self.name}_{col}": table[col].to_numpy()[:n]
+                for col in table.columns if col not in ("frame", "time")}
+        return data, times[:n]
+
+    def _read(self):
+        if self._page is None:
+            self._read_source = self.source
+            if self.source == "timeseries":
+                data, times = self._read_timeseries()
+                if data is None:
+                    if not self.det.hdf5.enable.get():
+                        raise RuntimeError(f"{self.name}: {times} and the HDF5 plugin is off; "
+                                           f"use source='hdf5' or a shorter burst")
+                    print(f"⚠️ {self.name}: {times}; reading the burst from the HDF5 file instead")
+                    self._read_source = "hdf5"
+                    data, times = self._read_hdf5()
+            else:
+                data, times = self._read_hdf5()
+            n = len(times)
+            data[f"{self.name}_frame"] = np.arange(n)
+            data[f"{self.name}_frame_time"] = times - times[0]
+            self._page = data, times
+        return self._page
+
+    def describe_collect(self):
+        data, _ = self._read()
+        keys = {key: {"source": f"{self._read_source}:{key}", "dtype": "number", "shape": [],
+                      "units": "s" if key.endswith("_frame_time") else ""}
+                for key in data}
+        keys[f"{self.name}_frame"]["dtype"] = "integer"
+        return {self.stream_name: keys}
+
+    def collect_pages(self):
+        data, times = self._read()
+        yield {"data": {k: v.tolist() for k, v in data.items()},
+               "timestamps": {k: times.tolist() for k in data}}
+
+
+# -------------------------------
+# 2. Plan
+# -------------------------------
+def burst_timeseries_plan(readout, *, md=None):
+    """
+    One run with one event per frame of `readout` (a BurstReadout), emitted
+    as a single event page after the burst. The detector must already be
+    configured for the burst (e.g. configure_eiger_for_burst).
+    """
+    det = readout.det
+    _md = {
+        "plan_name": "burst_timeseries",
+        "detectors": [det.name],
+        "num_points": readout.nframes,
+        "frame_time": readout.frame_time,
+        "burst_source": readout.source,
+        "hints": {"dimensions": [([f"{det.name}_frame_time"], readout.stream_name)]},
+    }
+    _md.update(md or {})
+
+    @bpp.stage_decorator([det])
+    @bpp.run_decorator(md=_md)
+    def inner():
+        yield from bps.kickoff(readout, wait=True)
+        yield from bps.complete(readout, wait=True)
+        yield from bps.collect(readout)
+
+    return (yield from inner())
@@ -0,0 +1,96 @@
+# plans/concurrent_setup.py
+
+import threading
+from time import perf_counter
+import bluesky.plan_stubs as bps
+from bluesky.utils import short_uid
+from ophyd.status import Status
+
+
+# -------------------------------
+# 1. Non-motor actions as Movables
+# -------------------------------
+class BackgroundCall:
+    """
+    Wraps a blocking callable (detector/monitor configuration, a PV poke)
+    so set() runs it on a worker thread and returns a Status. That lets the
+    RunEngine wait on it in a group alongside motor moves.
+    """
+
+    def __init__(self, func, *args, name=None, **kwargs):
+        self.func, self.args, self.kwargs = func, args, kwargs
+        self.name = name or getattr(getattr(func, "func", func), "__name__", "call")  # partials too
+        self.parent = None
+
+    def __repr__(self):
+        return f"BackgroundCall({self.name})"
+
+    def set(self, _value=None):
+        status = Status(obj=self)
+
+        def work():
+            try:
+                self.func(*self.args, **self.kwargs)
+            except Exception as exc:
+                status.set_exception(exc)
+            else:
+                status.set_finished()
+
+        threading.Thread(target=work, name=f"setup-{self.name}", daemon=True).start()
+        return status
+
+
+class Settle:
+    """set(seconds) returns a Status that finishes after that long, without blocking the plan."""
+
+    def __init__(self, name="settle"):
+        self.name = name
+        self.parent = None
+
+    def set(self, seconds):
+        status = Status(obj=self)
+        threading.Timer(seconds, status.set_finished).start()
+        return status
+
+
+# -------------------------------
+# 2. Grouped setup plan
+# -------------------------------
+def concurrent_setup(*moves, configure=(), settle=0.0, group=None, verbose=True):
+    """
+    Start every independent setup action at once and wait for the slowest.
+
+    moves: motor, position pairs as for mv(m1, x1, m2, x2, ...).
+    configure: callables (or BackgroundCall objects) run on worker threads,
+        e.g. functools.partial(configure_eiger_for_burst, 500, 0.002).
+    settle: a settle wait in seconds that overlaps the moves/configuration.
+
+    Returns {action name: seconds} for the actions that finished.
+    """
+    if len(moves) % 2:
+        raise ValueError("moves must be motor, position pairs")
+    group = group or short_uid("setup")
+    durations, t0 = {}, perf_counter()
+
+    def record(name):
+        def done(status):
+            durations[name] = perf_counter() - t0
+        return done
+
+    actions = [(m, x) for m, x in zip(moves[::2], moves[1::2])]
+    actions += [(c if isinstance(c, BackgroundCall) else BackgroundCall(c), None)
+                for c in configure]
+    if settle:
+        actions.append((Settle(), settle))
+
+    for obj, value in actions:
+        status = yield from bps.abs_set(obj, value, group=group)
+        status.add_callback(record(obj.name))
+    yield from bps.wait(group=group)
+
+    if verbose and durations:
+        slowest = max(durations, key=durations.get)
+        print(f"⏱️ Setup: {len(durations)} actions in {perf_counter() - t0:.2f} s "
+              f"(slowest {slowest} {durations[slowest]:.2f} s, "
+              f"serial would be {sum(durations.values()):.2f} s)")
+    return durations
@@ -0,0 +1,220 @@
+# plans/fitting.py
+
+from collections import namedtuple
+import numpy as np
+
+SQRT_2PI = np.sqrt(2 * np.pi)
+FWHM_PER_SIGMA = 2 * np.sqrt(2 * np.log(2))
+
+Param = namedtuple("Param", ["name", "value"])
+
+
+# -------------------------------
+# 1. Line shapes (lmfit parameterization)
+# -------------------------------
+def gaussian(x, amplitude, center, sigma):
+    return amplitude / (SQRT_2PI * sigma) * np.exp(-(x - center) ** 2 / (2 * sigma ** 2))
+
+
+def pvoigt(x, amplitude, center, sigma, fraction):
+    sigma_g = sigma / np.sqrt(2 * np.log(2))
+    lorentz = amplitude / np.pi * sigma / ((x - center) ** 2 + sigma ** 2)
+    return (1 - fraction) * gaussian(x, amplitude, center, sigma_g) + fraction * lorentz
+
+
+SHAPES = {"gaussian": gaussian, "pvoigt": pvoigt}
+
+
+class FitResult:
+    """
+    Minimal stand-in for lmfit's ModelResult: params[name].value, eval(x=...),
+    best_fit. The line shape sits on a constant background, params["c"].
+    `method` is "closed_form" or "lmfit"; `r2` is the goodness of fit.
+    """
+
+    def __init__(self, model_type, values, xs, ys, method, lmfit_result=None):
+        self.model_type = model_type
+        self.method = method
+        self.lmfit_result = lmfit_result
+        values = dict(values)
+        values["fwhm"] = values["sigma"] * (FWHM_PER_SIGMA if model_type == "gaussian" else 2.0)
+        self.params = {k: Param(k, float(v)) for k, v in values.items()}
+        self.best_fit = self.eval(x=xs)
+        self.r2 = _r_squared(ys, self.best_fit)
+
+    def eval(self, x):
+        shape_args = {k: p.value for k, p in self.params.items() if k not in ("fwhm", "c")}
+        return SHAPES[self.model_type](np.asarray(x, dtype=float), **shape_args) + self.params["c"].value
+
+    def __repr__(self):
+        vals = ", ".join(f"{k}={p.value:.4g}" for k, p in self.params.items())
+        return f"<FitResult {self.model_type} [{self.method}] r2={self.r2:.4f} {vals}>"
+
+
+def _r_squared(ys, fit):
+    ss_res = np.sum((ys - fit) ** 2, axis=-1)
+    ss_tot = np.sum((ys - np.mean(ys, axis=-1, keepdims=True)) ** 2, axis=-1)
+    return 1 - ss_res / np.where(ss_tot > 0, ss_tot, np.inf)
+
+
+# -------------------------------
+# 2. Closed-form / moment estimates (vectorized over rows)
+# -------------------------------
+def _linear_terms(ys, basis):
+    """Least-squares coefficients of the `basis` rows (each shaped like ys) for every row of ys."""
+    B = np.stack(np.broadcast_arrays(*basis), axis=-1)
+    A = np.einsum("...ki,...kj->...ij", B, B)
+    b = np.einsum("...ki,...k->...i", B, ys)
+    coef = np.full(b.shape, np.nan)
+    ok = np.all(np.isfinite(A), axis=(-2, -1)) & np.all(np.isfinite(b), axis=-1)
+    ok[ok] = np.abs(np.linalg.det(A[ok])) > 0
+    coef[ok] = np.linalg.solve(A[ok], b[ok][..., None])[..., 0]
+    return np.moveaxis(coef, -1, 0)
+
+
+def estimate_gaussian(xs, ys, frac=0.2):
+    """
+    Log-parabola fit (Caruana, weighted by y^2) over points more than
+    frac of the way from the row's background (10th percentile) to its
+    maximum, for every row of `ys` at once; amplitude and background then
+    follow by linear least squares. Rows without a valid parabola give NaN.
+    """
+    xs = np.broadcast_to(xs, ys.shape)
+    lifted = ys - np.percentile(ys, 10, axis=-1, keepdims=True)
+    mask = lifted > frac * lifted.max(axis=-1, keepdims=True)
+    w = np.where(mask, lifted, 0.0) ** 2
+    logy = np.log(np.where(mask, lifted, 1.0))
+    # Center x per row to keep the normal equations well conditioned
+    x0 = xs.mean(axis=-1, keepdims=True)
+    u = xs - x0
+    powers = np.stack([np.ones_like(u), u, u * u], axis=-1)
+    A = np.einsum("...ki,...kj,...k->...ij", powers, powers, w)
+    b = np.einsum("...ki,...k->...i", powers, w * logy)
+    with np.errstate(all="ignore"):
+        ok = np.abs(np.linalg.det(A)) > 0
+        coef = np.full(b.shape, np.nan)
+        coef[ok] = np.linalg.solve(A[ok], b[ok][..., None])[..., 0]
+        a1, a2 = coef[..., 1], coef[..., 2]
+        a2 = np.where(a2 < 0, a2, np.nan)
+        sigma = np.sqrt(-1 / (2 * a2))
+        center = x0[..., 0] - a1 / (2 * a2)
+        amplitude, c = _linear_terms(ys, [gaussian(xs, 1.0, center[..., None], sigma[..., None]),
+                                          np.ones_like(ys)])
+    return {"amplitude": amplitude, "center": center, "sigma": sigma, "c": c}
+
+
+def estimate_peak_moments(xs, ys):
+    """
+    Pseudo-Voigt estimates for every row of `ys`: center and half-width from
+    moments of the half-max region, then the Gaussian/Lorentzian amplitudes
+    (hence amplitude and fraction) and the background by linear least
+    squares.
+    """
+    xs = np.broadcast_to(xs, ys.shape)
+    dx = np.gradient(xs, axis=-1)
+    lifted = ys - ys.min(axis=-1, keepdims=True)
+    with np.errstate(all="ignore"):
+        above = lifted >= 0.5 * lifted.max(axis=-1, keepdims=True)
+        w = np.where(above, lifted, 0.0) * dx
+        center = np.sum(xs * w, axis=-1) / np.sum(w, axis=-1)
+        hwhm = 0.5 * np.sum(np.where(above, dx, 0.0), axis=-1)
+
+        c, s = center[..., None], hwhm[..., None]
+        g = gaussian(xs, 1.0, c, s / np.sqrt(2 * np.log(2)))
+        l = s / np.pi / ((xs - c) ** 2 + s ** 2)
+        a_g, a_l, background = _linear_terms(ys, [g, l, np.ones_like(ys)])
+        amplitude = a_g + a_l
+        fraction = np.clip(a_l / amplitude, 0.0, 1.0)
+    return {"amplitude": amplitude, "center": center, "sigma": hwhm, "fraction": fraction,
+            "c": background}
+
+
+def noise_sigma(ys):
+    """Robust per-row noise level from second differences (insensitive to the peak)."""
+    d2 = ys[..., 2:] - 2 * ys[..., 1:-1] + ys[..., :-2]
+    return 1.4826 * np.median(np.abs(d2), axis=-1) / np.sqrt(6)
+
+
+# -------------------------------
+# 3. Cached lmfit fallback
+# -------------------------------
+_LMFIT_MODELS = {}
+
+
+def get_model(model_type):
+    """One lmfit model instance (line shape + constant background) per type, built on first use."""
+    if model_type not in _LMFIT_MODELS:
+        from lmfit.models import GaussianModel, PseudoVoigtModel, ConstantModel
+        models = {"gaussian": GaussianModel, "pvoigt": PseudoVoigtModel}
+        if model_type not in models:
+            raise ValueError("Invalid model_type")
+        _LMFIT_MODELS[model_type] = models[model_type]() + ConstantModel()
+    return _LMFIT_MODELS[model_type]
+
+
+def _lmfit(xs, ys, model_type, start):
+    """Parameter values fitted to a peak (dips are flipped by the caller), and the lmfit result."""
+    model = get_model(model_type)
+    if all(np.isfinite(v) for v in start.values()) and start["sigma"] > 0:
+        params = model.make_params(**start)
+    else:
+        c = float(np.min(ys))
+        guess = model.left.guess(ys - c, x=xs)
+        params = model.make_params(**{k: guess[k].value for k in start if k != "c"}, c=c)
+    res = model.fit(ys, params, x=xs)
+    return {k: res.params[k].value for k in start}, res
+
+
+# -------------------------------
+# 4. Public entry point
+# -------------------------------
+def fast_fit(xs, ys, model_type="gaussian", noise_tol=1.5, r2_min=0.999, r2_floor=0.98, dip=False):
+    """
+    Fit a peak (or, with dip=True, a dip such as the sample plateau in a
+    transmitted signal) on a constant background, with closed-form
+    estimates first and lmfit only when the estimate is not good enough:
+    its residual RMS must be within `noise_tol` times the data's noise
+    level (with R^2 of at least `r2_floor`, since sparse grids inflate the
+    noise estimate), or its R^2 above `r2_min`. A dip has a negative
+    amplitude. `ys` may be 1-D (returns a FitResult) or 2-D, one signal/run
+    per row (returns a list, estimated in one batch).
+    """
+    if model_type not in SHAPES:
+        raise ValueError("Invalid model_type")
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    if xs.ndim == 1:
+        # Adaptive/fly scans can deliver x out of order
+        order = np.argsort(xs)
+        xs, ys = xs[order], ys[..., order]
+    single = ys.ndim == 1
+    ys2 = np.atleast_2d(ys)
+    xs2 = np.broadcast_to(xs, ys2.shape)
+
+    # Dips are estimated (and refined) as peaks of -ys, then flipped back
+    sign = -1.0 if dip else 1.0
+    peaks = sign * ys2
+    if model_type == "gaussian":
+        est = estimate_gaussian(xs2, peaks)
+    else:
+        est = estimate_peak_moments(xs2, peaks)
+
+    shape = SHAPES[model_type]
+    with np.errstate(all="ignore"):
+        model_ys = sign * (shape(xs2, **{k: v[:, None] for k, v in est.items() if k != "c"})
+                           + est["c"][:, None])
+        rms = np.sqrt(np.mean((ys2 - model_ys) ** 2, axis=-1))
+    r2 = np.nan_to_num(_r_squared(ys2, model_ys), nan=-np.inf)
+    within_noise = np.nan_to_num(rms, nan=np.inf) <= noise_tol * noise_sigma(ys2)
+    good = (within_noise & (r2 >= r2_floor)) | (r2 >= r2_min)
+
+    results = []
+    for i in range(len(ys2)):
+        start = {k: v[i] for k, v in est.items()}
+        method, res = "closed_form", None
+        if not good[i]:
+            start, res = _lmfit(xs2[i], peaks[i], model_type, start)
+            method = "lmfit"
+        values = dict(start, amplitude=sign * start["amplitude"], c=sign * start["c"])
+        results.append(FitResult(model_type, values, xs2[i], ys2[i], method, lmfit_result=res))
+    return results[0] if single else results
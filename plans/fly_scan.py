@@ -0,0 +1,338 @@
+# plans/fly_scan.py
+
+import threading
+import time as ttime
+import numpy as np
+import bluesky.plan_stubs as bps
+import bluesky.preprocessors as bpp
+from ophyd.status import Status
+from utils.live_plot import ThrottledLivePlot, GrowableBuffer
+from plans.burst import BurstReadout
+
+ARM_LATENCY = 0.02   # s from the arm command to the Eiger's first exposure
+ARM_LOOKAHEAD = 0.1  # s of travel before the arm point from which the arm is timed, not polled
+
+
+# -------------------------------
+# 1. Continuous sweep plan
+# -------------------------------
+def fly_monitor_plan(motor, start, stop, signals, *, velocity=None, md=None):
+    """
+    Step to `start`, then sweep to `stop` in one continuous move while the
+    motor readback and every signal in `signals` are monitored. Each monitored
+    signal gets its own event stream ("<name>_monitor") with IOC timestamps;
+    positions are matched to readings afterwards by FlyMonitorCollector.
+    """
+    readback = getattr(motor, "user_readback", motor)
+    watched = [readback] + list(signals)
+
+    _md = {
+        "plan_name": "fly_monitor_scan",
+        "motors": [motor.name],
+        "detectors": [sig.name for sig in signals],
+        "fly": {"start": start, "stop": stop, "velocity": velocity},
+    }
+    _md.update(md or {})
+
+    @bpp.run_decorator(md=_md)
+    def inner():
+        yield from bps.mv(motor, start)
+        old_velocity = None
+        if velocity is not None and hasattr(motor, "velocity"):
+            old_velocity = motor.velocity.get()
+            yield from bps.mv(motor.velocity, velocity)
+        swept = False
+        try:
+            for sig in watched:
+                yield from bps.monitor(sig, name=f"{sig.name}_monitor")
+            yield from bps.mv(motor, stop)
+            swept = True
+            for sig in watched:
+                yield from bps.unmonitor(sig)
+        finally:
+            if not swept:
+                yield from _stop_motor(motor)
+            if old_velocity is not None:
+                yield from bps.mv(motor.velocity, old_velocity)
+
+    return (yield from inner())
+
+
+def _stop_motor(motor, poll=0.05):
+    """Stop a sweep cut short and wait until the motor is still: never change the velocity under it."""
+    yield from bps.stop(motor)
+    while getattr(motor, "motor_is_moving", None) is not None and motor.motor_is_moving.get():
+        yield from bps.sleep(poll)
+
+
+# -------------------------------
+# 2. Timestamp-correlating collector
+# -------------------------------
+class FlyMonitorCollector(ThrottledLivePlot):
+    """
+    Collects monitor streams from fly_monitor_plan. While flying, each reading
+    is plotted against the latest readback; at stop the positions are replaced
+    by the readback interpolated at the reading time (minus `latency`, e.g.
+    half the counter integration time). `bins` averages onto a regular grid.
+    xs/ys then hold the same form as LiveStatsPlot for fit_data and
+    move_to_statistic.
+    """
+
+    def __init__(self, y_field, x_field, label="Fly Scan", latency=0.0, bins=None, **kwargs):
+        self.x_field = x_field
+        self.y_field = y_field
+        self.latency = latency
+        self.bins = bins
+        self._times = {x_field: GrowableBuffer(), y_field: GrowableBuffer()}
+        self._values = {x_field: GrowableBuffer(), y_field: GrowableBuffer()}
+        super().__init__(label=label, xlabel=x_field, ylabel=y_field, style=".", **kwargs)
+
+    def start(self, doc):
+        super().start(doc)
+        for buf in list(self._times.values()) + list(self._values.values()):
+            buf.clear()
+
+    def event(self, doc):
+        for field in (self.x_field, self.y_field):
+            if field in doc["data"]:
+                self._times[field].append(doc["timestamps"][field])
+                self._values[field].append(doc["data"][field])
+        if self.y_field in doc["data"] and len(self._values[self.x_field]):
+            self.append(self._values[self.x_field].data[-1], doc["data"][self.y_field])
+
+    def stop(self, doc):
+        xs, ys = self.correlate()
+        self._x.clear()
+        self._y.clear()
+        self._x.extend(xs)
+        self._y.extend(ys)
+        self._limits = [np.inf, -np.inf, np.inf, -np.inf]
+        self._drawn = 0
+        self._pending = 1
+        super().stop(doc)
+
+    def correlate(self):
+        """Interpolate the readback at each reading's timestamp."""
+        t_pos = self._times[self.x_field].data
+        pos = self._values[self.x_field].data
+        t_sig = self._times[self.y_field].data
+        sig = self._values[self.y_field].data
+        if len(t_pos) < 2 or not len(t_sig):
+            return pos[:0], sig[:0]
+        order = np.argsort(t_pos)
+        xs = np.interp(t_sig - self.latency, t_pos[order], pos[order])
+        ys = sig.copy()
+        if self.bins:
+            edges = np.linspace(xs.min(), xs.max(), self.bins + 1)
+            idx = np.clip(np.digitize(xs, edges) - 1, 0, self.bins - 1)
+            counts = np.bincount(idx, minlength=self.bins)
+            keep = counts > 0
+            xs = (np.bincount(idx, xs, self.bins) / np.maximum(counts, 1))[keep]
+            ys = (np.bincount(idx, ys, self.bins) / np.maximum(counts, 1))[keep]
+        return xs, ys
+
+
+# -------------------------------
+# 3. Eiger series fly scan
+# -------------------------------
+class _SignalRecorder:
+    """(timestamp, value) of every update of some scalar signals, via ophyd subscriptions."""
+
+    def __init__(self, signals):
+        self.signals = list(signals)
+        self.times = {sig.name: GrowableBuffer() for sig in self.signals}
+        self.values = {sig.name: GrowableBuffer() for sig in self.signals}
+        self._cids = []
+
+    def start(self):
+        for sig in self.signals:
+            self._cids.append((sig, sig.subscribe(self._record, run=True)))
+
+    def stop(self):
+        for sig, cid in self._cids:
+            sig.unsubscribe(cid)
+        self._cids = []
+
+    def _record(self, value, timestamp=None, obj=None, **kwargs):
+        self.times[obj.name].append(timestamp if timestamp is not None else ttime.time())
+        self.values[obj.name].append(value)
+
+    def at(self, name, times):
+        """Value of `name` linearly interpolated at `times` (held flat outside the record)."""
+        t, v = self.times[name].data, self.values[name].data
+        if not len(t):
+            return np.full(len(times), np.nan)
+        order = np.argsort(t, kind="stable")
+        return np.interp(times, t[order], v[order])
+
+
+class FlyFrameReadout(BurstReadout):
+    """
+    BurstReadout for an Eiger series acquired while a motor sweeps: every
+    frame's page row also gets the motor position and each counter
+    interpolated at the middle of its exposure (frame time minus
+    `latency`), so the primary stream looks like a step scan with one
+    point per frame.
+
+    With `arm_at`, kickoff() triggers the detector when the motor, moving
+    in `direction` (+1/-1) at `velocity`, reaches that position. The
+    readback only updates every few ms, so once it is within
+    ARM_LOOKAHEAD of the arm point the trigger is timed from the
+    remaining distance instead of waiting for the next update. kickoff
+    fails after `arm_timeout` seconds if the motor never gets there.
+    """
+
+    def __init__(self, det, motor, signals, nframes, frame_time, latency=None,
+                 arm_at=None, direction=1, velocity=None, arm_timeout=None, **kwargs):
+        super().__init__(det, nframes, frame_time, **kwargs)
+        self.readback = getattr(motor, "user_readback", motor)  # EpicsMotor: same name as motor
+        self.recorder = _SignalRecorder([self.readback, *signals])
+        self.latency = frame_time / 2 if latency is None else latency
+        self.arm_at = arm_at
+        self.direction = 1 if direction >= 0 else -1
+        self.velocity = velocity
+        self.arm_timeout = arm_timeout
+
+    def kickoff(self):
+        if self.arm_at is None:
+            return super().kickoff()
+        self._arm_buffers()
+        status = Status(obj=self, timeout=self.arm_timeout)
+
+        def fire():
+            if status.done:
+                return
+            try:
+                self._acquiring = self.det.trigger()
+            except Exception as exc:
+                status.set_exception(exc)
+            else:
+                status.set_finished()
+
+        def on_position(value, **kwargs):
+            remaining = (self.arm_at - value) * self.direction
+            window = (self.velocity or 0.0) * ARM_LOOKAHEAD
+            if status.done or remaining > window:
+                return
+            self.readback.clear_sub(on_position)
+            if remaining > 0:
+                threading.Timer(remaining / self.velocity, fire).start()
+            else:
+                fire()
+
+        self.readback.subscribe(on_position, run=True)
+        status.add_callback(lambda st: self.readback.clear_sub(on_position))
+        return status
+
+    def _read(self):
+        if self._page is None:
+            data, times = super()._read()
+            stamps = times - self.latency
+            for sig in self.recorder.signals:
+                data[sig.name] = self.recorder.at(sig.name, stamps)
+            self._page = data, times
+        return self._page
+
+    def positions(self):
+        """Interpolated motor position of every frame (after collect)."""
+        return self._read()[0][self.readback.name]
+
+
+def eiger_fly_plan(det, motor, start, stop, nframes, frame_time, signals, *,
+                   velocity=None, source="timeseries", latency=None,
+                   arm_latency=ARM_LATENCY, md=None):
+    """
+    Sweep `motor` from `start` to `stop` once while `det` takes `nframes`
+    frames in series trigger (internal, or external pulses from the motion
+    controller), with `signals` monitored alongside. By default the
+    velocity spreads the frames evenly over the sweep. The motor starts
+    far enough back to finish accelerating (half of velocity x
+    acceleration time) plus `arm_latency` and ARM_LOOKAHEAD worth of
+    travel, and the detector is armed by position, `arm_latency` ahead of
+    `start`, so the first frame lands on `start`; it overshoots `stop` as
+    much.
+    The frames arrive as one event page in "primary" with interpolated
+    positions; the raw readback and signal updates are kept in
+    "<name>_monitor" streams. A warning is printed if the frames do not
+    cover [start, stop].
+    """
+    signals = list(signals)
+    if velocity is None:
+        period = max(det.cam.acquire_period.get(), frame_time)
+        velocity = abs(stop - start) / (nframes * period)
+    accel = motor.acceleration.get() if hasattr(motor, "acceleration") else 0.0
+    direction = 1 if stop >= start else -1
+    lead = velocity * arm_latency
+    runup = direction * (0.5 * velocity * accel + lead + velocity * ARM_LOOKAHEAD)
+    sweep_time = (abs(stop - start) + 2 * abs(runup)) / velocity + accel
+    readout = FlyFrameReadout(det, motor, signals, nframes, frame_time, latency, source=source,
+                              arm_at=start - direction * lead, direction=direction,
+                              velocity=velocity, arm_timeout=sweep_time + 10)
+
+    _md = {
+        "plan_name": "eiger_fly_scan",
+        "motors": [motor.name],
+        "detectors": [det.name] + [sig.name for sig in signals],
+        "num_points": int(nframes),
+        "frame_time": frame_time,
+        "burst_source": source,
+        "fly": {"start": start, "stop": stop, "velocity": velocity, "runup": float(runup),
+                "arm_latency": arm_latency},
+        "hints": {"dimensions": [([readout.readback.name], "primary")]},
+    }
+    _md.update(md or {})
+    watched = [readout.readback] + signals
+
+    @bpp.stage_decorator([det])
+    @bpp.run_decorator(md=_md)
+    def inner():
+        yield from bps.mv(motor, start - runup)
+        old_velocity = None
+        if hasattr(motor, "velocity"):
+            old_velocity = motor.velocity.get()
+            yield from bps.mv(motor.velocity, velocity)
+        swept = False
+        try:
+            readout.recorder.start()
+            for sig in watched:
+                yield from bps.monitor(sig, name=f"{sig.name}_monitor")
+            yield from bps.abs_set(motor, stop + runup, group="sweep")
+            yield from bps.kickoff(readout, wait=True)   # armed by position, not by a timer
+            yield from bps.complete(readout, wait=True)
+            yield from bps.wait("sweep")
+            swept = True
+            for sig in watched:
+                yield from bps.unmonitor(sig)
+            readout.recorder.stop()
+            yield from bps.collect(readout)
+            _check_coverage(readout.positions(), start, stop, nframes, velocity, arm_latency)
+        finally:
+            readout.recorder.stop()
+            if not swept:
+                yield from _stop_motor(motor)
+            if old_velocity is not None:
+                yield from bps.mv(motor.velocity, old_velocity)
+
+    return (yield from inner())
+
+
+def _check_coverage(positions, start, stop, nframes, velocity, arm_latency):
+    """
+    Warn if the frames' exposures (each one step wide) leave either end
+    of [start, stop] uncovered by more than a step; suggests the
+    arm_latency that would have put the first frame on `start`.
+    """
+    lo, hi = min(start, stop), max(start, stop)
+    step = (hi - lo) / max(nframes, 1)
+    if not len(positions):
+        print(f"⚠️ No frame positions; requested {lo:g} to {hi:g}")
+        return False
+    first, last = float(np.min(positions)), float(np.max(positions))
+    if first - step / 2 > lo + step or last + step / 2 < hi - step:
+        ideal = start + np.sign(stop - start) * step / 2
+        late = (positions[0] - ideal) * np.sign(stop - start) / velocity
+        print(f"⚠️ Frames cover {first:.4g} to {last:.4g}, requested {lo:g} to {hi:g}; "
+              f"the first frame was {abs(late) * 1e3:.0f} ms {'late' if late > 0 else 'early'}, "
+              f"try arm_latency={max(arm_latency + late, 0.0):.3f}")
+        return False
+    return True
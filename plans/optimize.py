@@ -0,0 +1,97 @@
+# plans/optimize.py
+
+import numpy as np
+import bluesky.plan_stubs as bps
+import bluesky.preprocessors as bpp
+
+
+# -------------------------------
+# Nelder-Mead over several motors
+# -------------------------------
+def simplex_optimize(detectors, motors, *, signal, initial_steps, limits=None,
+                     xtol=None, ftol=1e-3, max_evals=60, maximize=True, md=None):
+    """
+    Derivative-free Nelder-Mead search driving `motors` together to maximize
+    (or minimize) `signal`. Every function evaluation is a move plus
+    trigger_and_read, so each one is an event in the run.
+
+    initial_steps: per-motor size of the starting simplex.
+    limits: per-motor half-width around the start position; candidates are
+        clipped into that box, which bounds every step.
+    xtol: per-motor simplex size at which to stop (default initial_steps / 20).
+    ftol: relative spread of the objective over the simplex at which to stop.
+
+    Returns {"position": {motor: value}, "value": best signal, "n_evals": n}.
+    """
+    motors = list(motors)
+    readables = list(detectors) + motors
+    steps = np.asarray(initial_steps, dtype=float)
+    xtol = np.asarray(xtol if xtol is not None else steps / 20, dtype=float)
+    sign = -1.0 if maximize else 1.0
+
+    _md = {
+        "plan_name": "simplex_optimize",
+        "motors": [m.name for m in motors],
+        "detectors": [det.name for det in detectors],
+        "optimizer": {"method": "nelder-mead", "signal": signal, "max_evals": max_evals,
+                      "initial_steps": steps.tolist(), "maximize": maximize},
+    }
+    _md.update(md or {})
+
+    cache = {}
+    outcome = {}  # run_decorator returns the run uid, not the plan's value
+
+    def evaluate(point, lo, hi):
+        point = np.clip(point, lo, hi)
+        key = tuple(np.round(point, 9))
+        if key not in cache:
+            yield from bps.mv(*[arg for m, x in zip(motors, point) for arg in (m, x)])
+            reading = yield from bps.trigger_and_read(readables)
+            cache[key] = sign * reading[signal]["value"]
+        return point, cache[key]
+
+    @bpp.stage_decorator(readables)
+    @bpp.run_decorator(md=_md)
+    def inner():
+        x0 = np.array([m.position for m in motors], dtype=float)
+        half = np.asarray(limits, dtype=float) if limits is not None else np.full(len(motors), np.inf)
+        lo, hi = x0 - half, x0 + half
+
+        simplex, fs = [], []
+        for vertex in [x0] + [x0 + step * e for step, e in zip(steps, np.eye(len(motors)))]:
+            p, f = yield from evaluate(vertex, lo, hi)
+            simplex.append(p)
+            fs.append(f)
+        simplex, fs = np.array(simplex), np.array(fs)
+
+        while len(cache) < max_evals:
+            order = np.argsort(fs)
+            simplex, fs = simplex[order], fs[order]
+            size = np.abs(simplex - simplex[0]).max(axis=0)
+            if np.all(size <= xtol) or abs(fs[-1] - fs[0]) <= ftol * abs(fs[0]):
+                break
+
+            centroid = simplex[:-1].mean(axis=0)
+            xr, fr = yield from evaluate(2 * centroid - simplex[-1], lo, hi)
+            if fs[0] <= fr < fs[-2]:
+                simplex[-1], fs[-1] = xr, fr
+            elif fr < fs[0]:
+                xe, fe = yield from evaluate(centroid + 2 * (xr - centroid), lo, hi)
+                simplex[-1], fs[-1] = (xe, fe) if fe < fr else (xr, fr)
+            else:
+                toward = xr if fr < fs[-1] else simplex[-1]
+                xc, fc = yield from evaluate(centroid + 0.5 * (toward - centroid), lo, hi)
+                if fc < min(fr, fs[-1]):
+                    simplex[-1], fs[-1] = xc, fc
+                else:
+                    for i in range(1, len(simplex)):
+                        simplex[i], fs[i] = yield from evaluate(
+                            simplex[0] + 0.5 * (simplex[i] - simplex[0]), lo, hi)
+
+        best = np.argmin(fs)
+        yield from bps.mv(*[arg for m, x in zip(motors, simplex[best]) for arg in (m, x)])
+        outcome.update({"position": {m.name: float(x) for m, x in zip(motors, simplex[best])},
+                        "value": float(sign * fs[best]), "n_evals": len(cache)})
+
+    yield from inner()
+    return outcome
@@ -0,0 +1,155 @@
+# plans/peak_stats.py
+
+import numpy as np
+import bluesky.plan_stubs as bps
+import bluesky.preprocessors as bpp
+from bluesky.callbacks import CallbackBase
+from utils.live_plot import GrowableBuffer
+
+FWHM_PER_SIGMA = 2 * np.sqrt(2 * np.log(2))
+
+
+# -------------------------------
+# 1. Streaming peak statistics
+# -------------------------------
+class StreamingPeakStats(CallbackBase):
+    """
+    Running COM, max/position, baseline, FWHM and half-max crossings, updated
+    in O(1) per event (the rising crossing is located once, when the falling
+    one is seen). `peak_passed` turns True once the signal has crossed half-max
+    on the way down and then dropped below baseline + stop_fraction * height.
+    """
+
+    def __init__(self, x_field, y_field, stop_fraction=0.1, min_points=5):
+        self.x_field = x_field
+        self.y_field = y_field
+        self.stop_fraction = stop_fraction
+        self.min_points = min_points
+        self._x = GrowableBuffer()
+        self._y = GrowableBuffer()
+        self.reset()
+
+    def reset(self):
+        self._x.clear()
+        self._y.clear()
+        self.n = 0
+        self._s = np.zeros(6)  # sum x, x^2, y, xy, x^2 y, 1
+        self.max = -np.inf
+        self.peak = np.nan
+        self._i_peak = 0
+        self.baseline = np.inf
+        self.rising = np.nan
+        self.falling = np.nan
+        self.peak_passed = False
+
+    def start(self, doc):
+        self.reset()
+
+    def event(self, doc):
+        data = doc["data"]
+        if self.x_field in data and self.y_field in data:
+            self.update(data[self.x_field], data[self.y_field])
+
+    def update(self, x, y):
+        x, y = float(x), float(y)
+        prev = self._y.data[-1] if self.n else None
+        self._x.append(x)
+        self._y.append(y)
+        self._s += (x, x * x, y, x * y, x * x * y, 1.0)
+        self.n += 1
+        self.baseline = min(self.baseline, y)
+
+        if y > self.max:
+            # New maximum: any earlier falling crossing belonged to a sub-peak
+            self.max, self.peak, self._i_peak = y, x, self.n - 1
+            self.rising = self.falling = np.nan
+            self.peak_passed = False
+            return
+
+        half = self.half_max
+        if np.isnan(self.falling) and prev is not None and prev >= half > y:
+            self.falling = self._crossing(self.n - 2, half)
+            self.rising = self._rising_crossing(half)
+
+        height = self.max - self.baseline
+        if (not np.isnan(self.falling) and self._i_peak > 0
+                and self.n - 1 - self._i_peak >= self.min_points
+                and y < self.baseline + self.stop_fraction * height):
+            self.peak_passed = True
+
+    @property
+    def half_max(self):
+        return 0.5 * (self.max + self.baseline)
+
+    @property
+    def com(self):
+        sx, sxx, sy, sxy, sxxy, n = self._s
+        return sxy / sy if sy else np.nan
+
+    @property
+    def fwhm(self):
+        """From half-max crossings once both are known, else from the 2nd moment."""
+        if not (np.isnan(self.rising) or np.isnan(self.falling)):
+            return abs(self.falling - self.rising)
+        sx, sxx, sy, sxy, sxxy, n = self._s
+        b = self.baseline
+        w = sy - b * n
+        if w <= 0:
+            return np.nan
+        mean = (sxy - b * sx) / w
+        var = (sxxy - b * sxx) / w - mean ** 2
+        return FWHM_PER_SIGMA * np.sqrt(var) if var > 0 else np.nan
+
+    def _crossing(self, i, level):
+        """Interpolated x where the segment (i, i+1) crosses `level`."""
+        xs, ys = self._x.data, self._y.data
+        y0, y1 = ys[i], ys[i + 1]
+        if y1 == y0:
+            return xs[i]
+        return xs[i] + (level - y0) * (xs[i + 1] - xs[i]) / (y1 - y0)
+
+    def _rising_crossing(self, level):
+        ys = self._y.data
+        for i in range(self._i_peak - 1, -1, -1):
+            if ys[i] < level:
+                return self._crossing(i, level)
+        return np.nan
+
+    def summary(self):
+        return {"com": self.com, "peak": self.peak, "max": self.max,
+                "fwhm": self.fwhm, "n_points": self.n, "peak_passed": self.peak_passed}
+
+
+# -------------------------------
+# 2. Step scan with early stop
+# -------------------------------
+def scan_until_peak_passed(detectors, motor, start, stop, steps, *, stats,
+                           relative=False, md=None):
+    """Step scan that ends as soon as `stats.peak_passed` (checked after each point)."""
+    _md = {
+        "plan_name": "scan_until_peak_passed",
+        "motors": [motor.name],
+        "detectors": [det.name for det in detectors],
+        "num_points": steps,
+        "hints": {"dimensions": [([motor.name], "primary")]},
+    }
+    _md.update(md or {})
+
+    @bpp.stage_decorator(list(detectors) + [motor])
+    @bpp.run_decorator(md=_md)
+    def inner(offset):
+        for x in np.linspace(start, stop, steps) + offset:
+            yield from bps.mv(motor, x)
+            yield from bps.trigger_and_read(list(detectors) + [motor])
+            if stats.peak_passed:
+                print(f"⏹️ Peak passed at {motor.name}={x:.4f}; stopping early")
+                break
+
+    if not relative:
+        return (yield from inner(0.0))
+
+    @bpp.reset_positions_decorator([motor])
+    def rel_inner():
+        return (yield from inner(motor.position))
+
+    return (yield from rel_inner())
@@ -5,13 +5,9 @@ from bluesky.preprocessors import baseline_decorator
 from config.detectors import configure_eiger_for_burst
 from config.motors import motor
 from config.counters import counters
-from config.runengine import setup_live_callbacks
-from utils.logger import append_metadata_to_csv
+from config.runengine import get_session, setup_live_callbacks
+from config.catalog import cat
 from time import strftime
-from databroker import catalog
-
-# Use the default catalog
-cat = catalog['my_catalog']
 
 # Auto record all counters + motor state before/after
 baseline_devices = [motor] + counters
@@ -25,16 +21,14 @@ def run_burst_scan(
     frame_time: float = 0.002,
     file_prefix: str = "eiger_scan",
 ):
-    from bluesky import RunEngine
-    RE, _ = setup_runengine_with_databroker()
-    
+    session = get_session()
+
     # Configure Eiger
     eiger = configure_eiger_for_burst(nframes, frame_time, base_filename=file_prefix)
     
-    # Add live callbacks
-    for cb in setup_live_callbacks(eiger):
-        RE.subscribe(cb)
-    
+    # Live callbacks are scoped to this run only
+    live_callbacks = setup_live_callbacks(eiger, x_field=motor.name)
+
     # Build metadata
     timestamp = strftime("%Y%m%d_%H%M%S")
     md = {
@@ -52,13 +46,13 @@ def run_burst_scan(
         return scan([eiger], motor, motor_start, motor_stop, steps)
 
     # Run scan
-    RE(_scan(), md)
+    uids = session.run(_scan(), md, live_callbacks)
+    md["uid"] = uids[0]
 
-    # Export metadata
-    latest = cat[-1]
+    # Export + log in the background, keyed on this run's uid
     h5name = f"{file_prefix}_{sample_name}_{timestamp}.h5"
-    latest.export(h5name, fmt="hdf5")
-
-    append_metadata_to_csv("scan_log.csv", md)
+    export = session.exporter.export(cat, md["uid"], h5name)
+    session.exporter.log_csv("scan_log.csv", md)
 
-    print(f"✅ Scan '{sample_name}' complete. Metadata saved to {h5name}")
\ No newline at end of file
+    print(f"✅ Scan '{sample_name}' complete. Export to {h5name} queued")
+    return export
\ No newline at end of file
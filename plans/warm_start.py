@@ -0,0 +1,102 @@
+# plans/warm_start.py
+
+import numpy as np
+from utils.logger import get_run_log
+from plans.adaptive import STATISTICS
+from plans.fitting import noise_sigma
+
+
+# -------------------------------
+# 1. Predict from the alignment log
+# -------------------------------
+def alignment_history(motor_name, sample_type=None, sample_name=None, limit=20, monitor_name=None):
+    """Recent alignment_log rows for this motor (and sample type/name and monitor, if given)."""
+    filters = {}
+    if sample_type is not None:
+        filters["sample_type"] = sample_type
+    if monitor_name is not None:
+        filters["monitor"] = monitor_name
+    return get_run_log().query(log="alignment_log", motor=motor_name,
+                               sample_name=sample_name, limit=limit, **filters)
+
+
+def _past_center(row, target):
+    """The position `target` gave in a log row, or None if that row measured something else."""
+    if "center_target" in row:   # run_warm_started_scan rows
+        return row.get("center") if row["center_target"] == target else None
+    if target in ("com", "peak"):   # scan_monitor_vs_motor rows log both
+        return row.get(target)
+    return None
+
+
+def propose_scan_range(motor, start, stop, steps, *, monitor, target="com", sample_type=None,
+                       sample_name=None, relative=False, n_sigma=3.0, history=20,
+                       min_history=3, min_fraction=0.1):
+    """
+    Narrow [start, stop] around the position predicted from past alignments
+    of this motor with the same `monitor` (a signal or its name) and
+    `target` ("com", "peak", "edge" or a callable's name); rows that
+    located a different statistic or scanned another signal are ignored.
+    The half-width is n_sigma times the scatter of past results plus one
+    past FWHM, never below min_fraction of the default span; the default
+    step size is kept. For relative scans the prediction is the past offset
+    from the pre-scan position. Falls back to the defaults when fewer than
+    `min_history` usable rows exist.
+
+    Returns (start, stop, steps, info).
+    """
+    monitor_name = getattr(monitor, "name", monitor)
+    target = getattr(target, "__name__", target)
+    rows = alignment_history(motor.name, sample_type, sample_name, limit=history,
+                             monitor_name=monitor_name)
+    centers, widths = [], []
+    for row in rows:
+        center = _past_center(row, target)
+        if center is None or (relative and "position_before" not in row):
+            continue
+        centers.append(float(center) - (float(row["position_before"]) if relative else 0.0))
+        widths.append(float(row.get("fit_fwhm", row.get("fwhm", np.nan))))
+
+    defaults = (start, stop, steps, {"warm_start": False, "n_history": len(centers)})
+    if len(centers) < min_history:
+        return defaults
+
+    centers = np.array(centers)
+    predicted = float(np.median(centers))
+    scatter = 1.4826 * float(np.median(np.abs(centers - predicted)))
+    fwhm = float(np.nanmedian(widths)) if np.any(np.isfinite(widths)) else 0.0
+    span = abs(stop - start)
+    half = max(n_sigma * scatter + fwhm, 0.5 * min_fraction * span)
+
+    lo, hi = min(start, stop), max(start, stop)
+    new_start, new_stop = max(lo, predicted - half), min(hi, predicted + half)
+    if new_stop - new_start >= span:
+        return defaults
+
+    dx = span / (steps - 1)
+    new_steps = max(11, int(round((new_stop - new_start) / dx)) + 1)
+    info = {"warm_start": True, "n_history": len(centers), "predicted": predicted,
+            "half_width": half}
+    return new_start, new_stop, new_steps, info
+
+
+# -------------------------------
+# 2. Was the feature inside the window?
+# -------------------------------
+def feature_in_window(xs, ys, target="com", margin=0.1, min_snr=8.0):
+    """
+    True if the signal rises above the noise (peak-to-peak > min_snr times the
+    point-to-point noise) and the target (peak/COM/edge/fit position) sits
+    inside the window, away from its ends by `margin` of the width. A flat or
+    noise-only window, or a feature at the border, means widen and rescan.
+    """
+    order = np.argsort(xs)
+    xs, ys = np.asarray(xs)[order], np.asarray(ys)[order]
+    if len(xs) < 3:
+        return False
+    if np.ptp(ys) < min_snr * max(noise_sigma(ys), 1e-12):
+        return False
+    statistic = target if callable(target) else STATISTICS["peak" if target == "com" else target]
+    position = statistic(xs, ys)
+    inset = margin * (xs[-1] - xs[0])
+    return bool(xs[0] + inset <= position <= xs[-1] - inset)
@@ -2,7 +2,8 @@
 
 from bluesky.plans import scan, rel_scan
 from config.counters import counters
-from config.runengine import setup_runengine_with_databroker
+from plans.fly_scan import eiger_fly_plan
+from config.runengine import get_session
 from bluesky.callbacks.mpl_plotting import LivePlot
 from config.runengine import LiveStatsPlot
 
@@ -17,17 +18,56 @@ def run_scan_with_counters(
     live_signals=None,
     metadata=None,
 ):
-    RE, _ = setup_runengine_with_databroker()
+    session = get_session()
 
     all_detectors = counters + detectors  # counters always included
     md = metadata or {}
 
-    # Attach live plots if requested
+    # Attach live plots if requested (released when the scan ends)
+    live_plots = []
     if live_signals:
         for signal in live_signals:
             if hasattr(signal, "name"):
                 signal = signal.name
-            RE.subscribe(LiveStatsPlot(y_field=signal, x_field=motor.name))
+            live_plots.append(LiveStatsPlot(y_field=signal, x_field=motor.name))
 
     plan = rel_scan if relative else scan
-    RE(plan(all_detectors, motor, start, stop, steps), md)
\ No newline at end of file
+    return session.run(plan(all_detectors, motor, start, stop, steps), md, live_plots)
+
+def run_fly_scan_with_counters(
+    detector,
+    motor,
+    start,
+    stop,
+    nframes,
+    frame_time,
+    *,
+    relative=False,
+    velocity=None,
+    source="timeseries",
+    live_signals=None,
+    metadata=None,
+):
+    """
+    Fly counterpart of run_scan_with_counters: one sweep with `detector`
+    taking `nframes` frames in series trigger and every counter streaming
+    alongside. The run's primary stream has one row per frame with the
+    interpolated motor position, so it plots like a step scan. The
+    detector must already be configured for `nframes` frames.
+    """
+    session = get_session()
+
+    md = metadata or {}
+    if relative:
+        start, stop = motor.position + start, motor.position + stop
+
+    live_plots = []
+    if live_signals:
+        for signal in live_signals:
+            if hasattr(signal, "name"):
+                signal = signal.name
+            live_plots.append(LiveStatsPlot(y_field=signal, x_field=motor.name))
+
+    plan = eiger_fly_plan(detector, motor, start, stop, nframes, frame_time, counters,
+                          velocity=velocity, source=source)
+    return session.run(plan, md, live_plots)
@@ -0,0 +1,252 @@
+# utils/background_run.py
+
+import asyncio
+import threading
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from queue import Queue
+from bluesky.utils import DefaultDuringTask, DuringTask, RequestAbort, RunEngineInterrupted
+
+
+# -------------------------------
+# 1. Hand-off to the notebook's event loop
+# -------------------------------
+class MainLoopRelay:
+    """
+    Runs GUI work (plot redraws, BestEffortCallback) on the thread that
+    submitted a background run instead of the RunEngine worker. Calls are
+    queued in order; with an asyncio loop (Jupyter kernel) each call wakes
+    the loop, which drains the queue between cells. Without one (terminal
+    IPython) the queue is drained by RunHandle.wait()/result(). Outside a
+    background run every call happens immediately, as before.
+    """
+
+    def __init__(self):
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._owner = None   # thread ident that drains; None when no background run
+
+    def activate(self, loop):
+        self._loop = loop
+        self._owner = threading.get_ident()
+
+    def deactivate(self):
+        self._owner = None
+
+    def call(self, fn, *args):
+        if self._owner is None or threading.get_ident() == self._owner:
+            return fn(*args)
+        self._queue.append((fn, args))
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self.drain)
+            except RuntimeError:   # loop closed meanwhile; stays queued
+                pass
+
+    def wrap(self, callback):
+        """Document callback (name, doc) that runs `callback` through the relay."""
+        def relayed(name, doc):
+            self.call(callback, name, doc)
+        relayed.__wrapped__ = callback
+        return relayed
+
+    def drain(self):
+        """Run every queued call on this thread; returns how many ran."""
+        if not self._lock.acquire(blocking=False):
+            return 0   # already draining (wake-ups pile up while a redraw runs)
+        n = 0
+        try:
+            while self._queue:
+                fn, args = self._queue.popleft()
+                try:
+                    fn(*args)
+                except Exception as e:
+                    print(f"⚠️ Live callback {getattr(fn, '__qualname__', fn)} failed: {e!r}")
+                n += 1
+        finally:
+            self._lock.release()
+        return n
+
+    def __len__(self):
+        return len(self._queue)
+
+
+relay = MainLoopRelay()
+
+
+def ui_call(fn, *args):
+    """fn(*args) now, or on the notebook's thread if called from a background run."""
+    return relay.call(fn, *args)
+
+
+# -------------------------------
+# 2. RunEngine options for a worker thread
+# -------------------------------
+def _on_main_thread():
+    return threading.current_thread() is threading.main_thread()
+
+
+def main_thread_only(context_manager):
+    """
+    RunEngine context_managers entry that enters `context_manager` (e.g.
+    SigintHandler) for runs on the main thread only. Signal handlers cannot
+    be installed from a worker, so background runs do not pause on Ctrl-C:
+    use RunHandle.pause()/abort().
+    """
+    def factory(RE):
+        return context_manager(RE) if _on_main_thread() else nullcontext()
+    return factory
+
+
+class MainThreadDuringTask(DuringTask):
+    """The default during-task (Qt event loop) on the main thread; plain blocking on a worker."""
+
+    def __init__(self):
+        self._default = DefaultDuringTask()
+
+    def block(self, blocking_event):
+        if _on_main_thread():
+            self._default.block(blocking_event)
+        else:
+            blocking_event.wait()
+
+
+# -------------------------------
+# 3. Background run handle
+# -------------------------------
+_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="runengine")
+_current = threading.local()
+
+
+def current_handle():
+    """The RunHandle whose job is running on this thread, if any."""
+    return getattr(_current, "handle", None)
+
+
+class RunHandle:
+    """
+    One job (a plan, or a helper that runs plans) executing on the
+    RunEngine worker thread. pause()/resume()/abort() work while it runs
+    (Ctrl-C does not reach it); result() waits for it and returns its
+    return value or raises its error. state is "queued", "running",
+    "paused", "done", "failed" or "aborted". RE must be built with
+    context_managers=[main_thread_only(SigintHandler)] and
+    during_task=MainThreadDuringTask().
+    """
+
+    def __init__(self, RE, job, description=""):
+        self.RE = RE
+        self.description = description
+        self.state = "queued"
+        self._commands = Queue()
+        self._pause_requested = False
+        self._abort_reason = None
+        try:
+            loop = asyncio.get_running_loop()   # the kernel's loop when called from a notebook cell
+        except RuntimeError:
+            loop = None
+        relay.activate(loop)
+        self._future = _worker.submit(self._work, job)
+
+    def __repr__(self):
+        return f"<RunHandle {self.description!r} {self.state}>"
+
+    # --- worker side ---
+    def _work(self, job):
+        _current.handle = self
+        self.state = "running"
+        try:
+            result = job()
+            self.state = "done"
+            return result
+        except RequestAbort:
+            self.state = "aborted"
+            raise
+        except BaseException:
+            self.state = "failed"
+            raise
+        finally:
+            _current.handle = None
+            relay.deactivate()
+
+    def call(self, start):
+        """Run start() (one RunEngine call) on the worker, serving pause/resume/abort."""
+        if self._abort_reason is not None:
+            raise RequestAbort(self._abort_reason)
+        if self._pause_requested:
+            self._wait_for_command()
+        try:
+            return start()
+        except RunEngineInterrupted:
+            pass
+        while True:
+            if self._abort_reason is not None and self.RE.state == "idle":
+                raise RequestAbort(self._abort_reason)   # aborted while running
+            command = self._wait_for_command()
+            try:
+                if command == "abort":
+                    self.RE.abort(self._abort_reason)
+                    raise RequestAbort(self._abort_reason)
+                return self.RE.resume()
+            except RunEngineInterrupted:
+                continue
+
+    def _wait_for_command(self):
+        self.state = "paused"
+        print(f"⏸️ {self.description or 'Background run'} paused; resume() or abort()")
+        command = self._commands.get()
+        self._pause_requested = False
+        self.state = "running"
+        if command == "abort" and self.RE.state == "idle":
+            raise RequestAbort(self._abort_reason)   # paused between two plans
+        return command
+
+    # --- caller side ---
+    def pause(self, defer=False):
+        """Pause now (or at the next checkpoint with defer=True); between plans, before the next one."""
+        self._pause_requested = True
+        if self.RE.state == "running":
+            self.RE.request_pause(defer)
+
+    def resume(self):
+        if self.state != "paused":
+            raise RuntimeError(f"Cannot resume a {self.state} run")
+        self._commands.put("resume")
+
+    def abort(self, reason="aborted from RunHandle"):
+        """Stop the plan, marking its run aborted; later plans of the job are not started."""
+        if self.done():
+            return
+        self._abort_reason = reason
+        if self.state == "paused":
+            self._commands.put("abort")
+        elif self.RE.state == "running":
+            self.RE.abort(reason)
+
+    def done(self):
+        return self._future.done()
+
+    def wait(self, timeout=None, poll=0.05):
+        """Block until the job ends, running queued live-plot updates meanwhile; True if it ended."""
+        waited = 0.0
+        while True:
+            try:
+                self._future.exception(timeout=poll)
+                break
+            except FutureTimeout:
+                relay.drain()
+                waited += poll
+                if timeout is not None and waited >= timeout:
+                    return False
+        relay.drain()
+        return True
+
+    def result(self, timeout=None):
+        """Return value of the job (e.g. run uids) once it ends; re-raises its exception."""
+        if not self.wait(timeout):
+            raise TimeoutError(f"{self.description or 'Background run'} still {self.state}")
+        return self._future.result()
+
@@ -0,0 +1,98 @@
+# utils/catalog_writer.py
+
+import queue
+import threading
+from time import monotonic
+from event_model import pack_event_page, unpack_event_page
+
+_STOP = object()
+
+
+class BatchedCatalogWriter:
+    """
+    Document callback that takes catalog inserts off the RunEngine thread.
+
+    Events are collected per descriptor and packed into event pages of up to
+    `page_size` (or after `flush_interval` seconds); every document goes to
+    a single writer thread in order, so descriptors and datums always land
+    before the events that reference them. The queue holds at most
+    `max_queued` items: if the catalog falls behind, the RunEngine blocks on
+    the next put instead of buffering without bound. On a stop document the
+    pending pages are flushed and the call waits until everything is
+    written, so a run is fully readable when its plan returns.
+
+    event_pages=False unpacks pages back into events on the writer thread,
+    for inserts that only accept single events.
+    """
+
+    def __init__(self, insert, page_size=100, flush_interval=1.0, max_queued=64,
+                 event_pages=True):
+        self.insert = insert
+        self.page_size = page_size
+        self.flush_interval = flush_interval
+        self.event_pages = event_pages
+        self.errors = []
+        self._reported = 0
+        self._pending = {}        # descriptor uid -> [events]
+        self._oldest = None       # monotonic time of the oldest pending event
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._thread = threading.Thread(target=self._work, name="catalog-writer", daemon=True)
+        self._thread.start()
+
+    # --- RunEngine side ---
+    def __call__(self, name, doc):
+        if name == "event":
+            self._pending.setdefault(doc["descriptor"], []).append(doc)
+            if self._oldest is None:
+                self._oldest = monotonic()
+            if (len(self._pending[doc["descriptor"]]) >= self.page_size
+                    or monotonic() - self._oldest >= self.flush_interval):
+                self._flush_pages()
+            return
+        if name == "stop":
+            self._flush_pages()
+            self._queue.put((name, doc))
+            self.wait()
+            return
+        self._queue.put((name, doc))
+
+    def _flush_pages(self):
+        for events in self._pending.values():
+            if events:
+                self._queue.put(("event_page", pack_event_page(*events)))
+        self._pending = {}
+        self._oldest = None
+
+    def wait(self):
+        """Block until every queued document has been inserted; returns the errors so far."""
+        self._queue.join()
+        if len(self.errors) > self._reported:
+            print(f"⚠️ Catalog writer: {len(self.errors) - self._reported} inserts failed "
+                  f"(last: {self.errors[-1][0]} {self.errors[-1][1]!r})")
+            self._reported = len(self.errors)
+        return self.errors
+
+    def close(self):
+        """Flush anything pending (e.g. an aborted run without a stop) and stop the thread."""
+        self._flush_pages()
+        self._queue.put(_STOP)
+        self._thread.join()
+        return self.errors
+
+    # --- writer thread ---
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                name, doc = item
+                if name == "event_page" and not self.event_pages:
+                    for event in unpack_event_page(doc):
+                        self.insert("event", event)
+                else:
+                    self.insert(name, doc)
+            except Exception as exc:
+                self.errors.append((item[0], exc))
+            finally:
+                self._queue.task_done()
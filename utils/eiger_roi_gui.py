@@ -1,17 +1,155 @@
-import ipywidgets as widgets
-from IPython.display import display, clear_output
-import matplotlib.pyplot as plt
-from bluesky.callbacks import CallbackBase
+import numpy as np
+from utils.live_plot import ThrottledLivePlot
+from utils.burst_roi import summed_area_table, roi_sums, eiger_rois, sum_frames
+
+OVERLAY_SIZE = 128  # longest side of the downsampled preview, and of the block-max grid
+
+
+# -------------------------------
+# 1. Cached frame with O(1) box statistics
+# -------------------------------
+def grab_frame(eiger, source="image", frames=None):
+    """Latest frame from the IMAGE1 plugin, or the sum of the last `frames` (None: all) in the HDF5 file."""
+    if source == "image":
+        return np.asarray(eiger.image.image)
+    if source == "hdf5":
+        return sum_frames(eiger.hdf5.full_file_name.get(), frames)
+    raise ValueError(f"Unknown source {source!r}; use 'image' or 'hdf5'")
+
+
+def _sparse_table(grid):
+    """table[i][j][r, c] = max of grid[r:r + 2**i, c:c + 2**j]."""
+    table, level, i = [], grid, 0
+    while True:   # level i: maxima over 2**i rows
+        row, j = [level], 0
+        while 2 ** (j + 1) <= level.shape[1]:
+            row.append(np.maximum(row[-1][:, :-2 ** j], row[-1][:, 2 ** j:]))
+            j += 1
+        table.append(row)
+        if 2 ** (i + 1) > len(grid):
+            return table
+        level = np.maximum(level[:-2 ** i], level[2 ** i:])
+        i += 1
+
+
+class RoiPreview:
+    """
+    One frame (or summed stack) cached with its summed-area table, so the
+    sum and mean of any box are four lookups. The max comes from a sparse
+    table over `block`-pixel block maxima (four lookups for the whole
+    blocks inside the box) plus the partial blocks along its edges.
+    """
+
+    def __init__(self, frame, overlay_size=OVERLAY_SIZE):
+        frame = np.asarray(frame)
+        if frame.ndim == 3:
+            frame = frame.sum(axis=0)
+        self.frame = frame
+        self.shape = height, width = frame.shape
+        self.sat = summed_area_table(frame[None])[0]
+        self.block = b = max(1, -(-max(height, width) // overlay_size))
+        rows, cols = height // b, width // b
+        grid = frame[:rows * b, :cols * b].reshape(rows, b, cols, b).max(axis=(1, 3))
+        self._table = _sparse_table(grid) if rows and cols else None
+
+    def box(self, x, y, w, h):
+        """(x, y, width, height) clipped to the frame, as half-open (x0, y0, x1, y1)."""
+        height, width = self.shape
+        x0, y0 = min(max(int(x), 0), width), min(max(int(y), 0), height)
+        return x0, y0, min(x0 + max(int(w), 0), width), min(y0 + max(int(h), 0), height)
+
+    def stats(self, x, y, w, h):
+        x0, y0, x1, y1 = self.box(x, y, w, h)
+        area = (x1 - x0) * (y1 - y0)
+        if not area:
+            return {"sum": 0.0, "mean": 0.0, "max": 0.0, "area": 0}
+        total = float(roi_sums(self.sat[None], [(x0, y0, x1, y1)])[0, 0])
+        return {"sum": total, "mean": total / area, "max": float(self._max(x0, y0, x1, y1)),
+                "area": area}
+
+    def _max(self, x0, y0, x1, y1):
+        b, f = self.block, self.frame
+        r0, r1 = -(-y0 // b), y1 // b
+        c0, c1 = -(-x0 // b), x1 // b
+        if self._table is None or r1 <= r0 or c1 <= c0:
+            return f[y0:y1, x0:x1].max()   # under two blocks tall or wide
+        i, j = (r1 - r0).bit_length() - 1, (c1 - c0).bit_length() - 1
+        t = self._table[i][j]
+        inner = max(t[r0, c0], t[r1 - 2 ** i, c0], t[r0, c1 - 2 ** j], t[r1 - 2 ** i, c1 - 2 ** j])
+        edges = (f[y0:r0 * b, x0:x1], f[r1 * b:y1, x0:x1],
+                 f[r0 * b:r1 * b, x0:c0 * b], f[r0 * b:r1 * b, c1 * b:x1])
+        return max([inner] + [e.max() for e in edges if e.size])
+
+    def overlay(self):
+        """Block means on a grid of at most overlay_size per side, from the summed-area table."""
+        height, width = self.shape
+        ys = np.r_[0:height:self.block, height]
+        xs = np.r_[0:width:self.block, width]
+        s = self.sat
+        sums = s[ys[1:, None], xs[1:]] - s[ys[:-1, None], xs[1:]] - s[ys[1:, None], xs[:-1]] + s[ys[:-1, None], xs[:-1]]
+        return sums / (np.diff(ys)[:, None] * np.diff(xs))
+
+
+# -------------------------------
+# 2. ROI GUI
+# -------------------------------
+def create_eiger_roi_gui(eiger, roi_index=1, source="image", frames=None):
+    """
+    Sliders for ROI `roi_index` over a cached frame from `source` ("image",
+    or "hdf5" for the sum of the last `frames` of the last file). Sum, mean
+    and max of the box update as the sliders move, with the box drawn on a
+    downsampled frame; the ROI PVs are only written on Apply.
+    """
+    import ipywidgets as widgets
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Rectangle
+    from IPython.display import display, clear_output
 
-def create_eiger_roi_gui(eiger, roi_index=1):
     roi = getattr(eiger, f"roi{roi_index}")
     stats = getattr(eiger, f"stats{roi_index}")
-    x = widgets.IntSlider(min=0, max=2048, description="X")
-    y = widgets.IntSlider(min=0, max=2048, description="Y")
-    w = widgets.IntSlider(min=1, max=2048, value=100, description="Width")
-    h = widgets.IntSlider(min=1, max=2048, value=100, description="Height")
+    preview = RoiPreview(grab_frame(eiger, source, frames))
+    height, width = preview.shape
+    x0, y0, w0, h0 = (int(v) for v in eiger_rois(eiger, (roi_index,))[f"roi{roi_index}"])
+    x = widgets.IntSlider(min=0, max=width - 1, value=min(x0, width - 1), description="X")
+    y = widgets.IntSlider(min=0, max=height - 1, value=min(y0, height - 1), description="Y")
+    w = widgets.IntSlider(min=1, max=width, value=min(max(w0, 1), width), description="Width")
+    h = widgets.IntSlider(min=1, max=height, value=min(max(h0, 1), height), description="Height")
+    readout = widgets.HTML()
     apply_btn = widgets.Button(description="Apply ROI")
+    grab_btn = widgets.Button(description="Grab frame")
     output = widgets.Output()
+    plot = widgets.Output()
+
+    with plot:
+        fig, ax = plt.subplots(figsize=(4, 4))
+        image = ax.imshow(np.log1p(preview.overlay()), extent=(0, width, height, 0), cmap="viridis")
+        box = Rectangle((0, 0), 0, 0, fill=False, edgecolor="red", linewidth=1.5)
+        ax.add_patch(box)
+        ax.set_title(f"{eiger.name} ROI{roi_index} ({source})")
+        plt.show()
+    live_canvas = isinstance(fig.canvas, widgets.DOMWidget)   # ipympl redraws in place
+
+    def update(_=None):
+        st = preview.stats(x.value, y.value, w.value, h.value)
+        bx0, by0, bx1, by1 = preview.box(x.value, y.value, w.value, h.value)
+        box.set_bounds(bx0, by0, bx1 - bx0, by1 - by0)
+        readout.value = (f"Σ {st['sum']:.6g} &nbsp; mean {st['mean']:.4g} &nbsp; "
+                         f"max {st['max']:.6g} &nbsp; ({st['area']} px)")
+        if live_canvas:
+            fig.canvas.draw_idle()
+        else:
+            with plot:
+                clear_output(wait=True)
+                display(fig)
+
+    def grab(_):
+        nonlocal preview
+        preview = RoiPreview(grab_frame(eiger, source, frames))
+        shown = np.log1p(preview.overlay())
+        image.set_data(shown)
+        image.set_clim(shown.min(), shown.max())
+        update()
+
     def apply_roi(_):
         roi.min_xyz.min_x.put(x.value)
         roi.min_xyz.min_y.put(y.value)
@@ -20,26 +158,20 @@ def create_eiger_roi_gui(eiger, roi_index=1):
         with output:
             clear_output()
             print(f"✅ ROI set: X={x.value}, Y={y.value}, W={w.value}, H={h.value}")
+
+    for slider in (x, y, w, h):
+        slider.observe(update, names="value")
     apply_btn.on_click(apply_roi)
-    display(widgets.VBox([x, y, w, h, apply_btn, output]))
+    grab_btn.on_click(grab)
+    update()
+    display(widgets.HBox([widgets.VBox([x, y, w, h, readout, widgets.HBox([grab_btn, apply_btn]), output]),
+                          plot]))
     return stats
 
-class LiveRoiStatsPlot(CallbackBase):
-    def __init__(self, stats_signal, label="ROI Live Stats"):
-        self.xs, self.ys = [], []
+class LiveRoiStatsPlot(ThrottledLivePlot):
+    def __init__(self, stats_signal, label="ROI Live Stats", **kwargs):
         self.stats_signal = stats_signal
-        self.fig, self.ax = plt.subplots()
-        self.line, = self.ax.plot([], [], 'o-')
-        self.ax.set_title(label)
-        self.ax.set_xlabel("Point")
-        self.ax.set_ylabel(stats_signal.name)
-        plt.ion()
-        plt.show()
+        super().__init__(label=label, xlabel="Point", ylabel=stats_signal.name, **kwargs)
     def event(self, doc):
         if self.stats_signal.name in doc['data']:
-            self.xs.append(len(self.xs))
-            self.ys.append(doc['data'][self.stats_signal.name])
-            self.line.set_data(self.xs, self.ys)
-            self.ax.relim()
-            self.ax.autoscale_view()
-            plt.pause(0.01)
\ No newline at end of file
+            self.append(len(self), doc['data'][self.stats_signal.name])
@@ -0,0 +1,70 @@
+# utils/export_service.py
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from time import perf_counter
+from utils.logger import append_metadata_to_csv
+
+
+class ExportService:
+    """
+    Runs catalog exports and CSV log appends off the RunEngine thread.
+
+    Exports are keyed by run uid (never cat[-1]), so a queued export always
+    writes the run it was submitted for. CSV appends go through a single
+    worker so rows land in submission order, in the CSV file and in the
+    run log. Every submit returns a Future; wait(uid) blocks on a run's
+    export, flush() waits for everything and reports failures.
+    """
+
+    def __init__(self, max_workers=2):
+        self._export_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self._csv_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="csvlog")
+        self._pending = []  # (description, future)
+        self.futures = {}   # run uid -> export future
+        self.export_times = {}  # run uid -> seconds spent exporting
+
+    def export(self, cat, uid, filename, fmt="hdf5"):
+        """Queue cat[uid].export(filename); returns a Future resolving to filename."""
+        def job():
+            t0 = perf_counter()
+            cat[uid].export(filename, fmt=fmt)
+            self.export_times[uid] = perf_counter() - t0
+            return filename
+
+        fut = self._export_pool.submit(job)
+        self._pending.append((f"export {uid[:8]} -> {filename}", fut))
+        self.futures[uid] = fut
+        return fut
+
+    def log_csv(self, filepath, metadata):
+        """Queue one metadata row; the dict is copied so later edits don't leak in."""
+        fut = self._csv_pool.submit(append_metadata_to_csv, filepath, dict(metadata))
+        self._pending.append((f"log {filepath}", fut))
+        return fut
+
+    def wait(self, uid, timeout=None):
+        """Block until the export for run `uid` is written; returns its filename."""
+        return self.futures[uid].result(timeout)
+
+    def flush(self, timeout=None):
+        """Wait for all queued work; print and return any failures."""
+        pending, self._pending = self._pending, []
+        wait([fut for _, fut in pending], timeout=timeout)
+        failures = [(desc, fut.exception()) for desc, fut in pending
+                    if fut.done() and fut.exception() is not None]
+        unfinished = [desc for desc, fut in pending if not fut.done()]
+        if failures or unfinished:
+            print(f"⚠️ Export queue: {len(failures)} failed, {len(unfinished)} unfinished")
+            for desc, exc in failures:
+                print(f"  ❌ {desc}: {exc!r}")
+            for desc in unfinished:
+                print(f"  ⏳ {desc}")
+        elif pending:
+            print(f"✅ Export queue flushed ({len(pending)} jobs)")
+        return failures
+
+    def shutdown(self):
+        failures = self.flush()
+        self._export_pool.shutdown()
+        self._csv_pool.shutdown()
+        return failures
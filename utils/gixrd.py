@@ -0,0 +1,186 @@
+# utils/gixrd.py
+
+import os
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import numpy as np
+from scipy import sparse
+
+# distance and pixel_size in m, beam center in pixels (x = column, y = row),
+# wavelength in Å, shape = (rows, cols). Hashable, so it keys the cache.
+Geometry = namedtuple("Geometry", ["distance", "pixel_size", "center_x", "center_y",
+                                   "wavelength", "shape"])
+
+# Eiger 4M at 12.4 keV, 150 mm from the sample
+EIGER_4M = Geometry(0.150, 75e-6, 1035.0, 1083.0, 1.0, (2167, 2070))
+
+MODES = ("qxy_qz", "tth_chi")
+DATASET = "entry/data/data"  # areaDetector HDF5 plugin default
+
+
+# -------------------------------
+# 1. Pixel coordinates
+# -------------------------------
+def pixel_coordinates(geometry, incidence_deg, mode="qxy_qz"):
+    """
+    Per-pixel coordinates for a flat detector normal to the beam.
+    qxy_qz: (q_xy, q_z) in 1/Å for grazing incidence at `incidence_deg`
+    (sample th), q_xy signed by the in-plane direction.
+    tth_chi: (2θ, χ) in degrees; χ = 0 is straight up.
+    Also returns the solid-angle factor cos³(2θ) per pixel.
+    """
+    rows, cols = geometry.shape
+    row, col = np.indices((rows, cols), dtype=np.float64)
+    x = (col - geometry.center_x) * geometry.pixel_size          # horizontal
+    y = (geometry.center_y - row) * geometry.pixel_size          # up
+    z = geometry.distance
+    r = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+    solid_angle = (z / r) ** 3
+
+    if mode == "tth_chi":
+        tth = np.degrees(np.arccos(z / r))
+        chi = np.degrees(np.arctan2(x, y))
+        return tth.ravel(), chi.ravel(), solid_angle.ravel()
+    if mode != "qxy_qz":
+        raise ValueError(f"Unknown mode {mode!r}; choose from {MODES}")
+
+    k = 2 * np.pi / geometry.wavelength
+    alpha_i = np.radians(incidence_deg)
+    alpha_f = np.arctan2(y, np.hypot(x, z)) - alpha_i   # exit angle above the surface
+    two_theta_f = np.arctan2(x, z)                      # in-plane angle
+    qx = k * (np.cos(alpha_f) * np.cos(two_theta_f) - np.cos(alpha_i))
+    qy = k * np.cos(alpha_f) * np.sin(two_theta_f)
+    qz = k * (np.sin(alpha_f) + np.sin(alpha_i))
+    qxy = np.sign(qy) * np.hypot(qx, qy)
+    return qxy.ravel(), qz.ravel(), solid_angle.ravel()
+
+
+# -------------------------------
+# 2. Cached sparse lookup table
+# -------------------------------
+class ReductionTable:
+    """
+    Sparse (n_bins x n_pixels) matrix sending every unmasked pixel to one
+    bin of a regular (n0 x n1) grid, weighted by 1 / solid angle, with the
+    per-bin pixel count for normalization. reduce(frames) turns a
+    (n, rows, cols) stack into (n, n0, n1) mean intensities with one sparse
+    product.
+    """
+
+    def __init__(self, geometry, incidence_deg, mode="qxy_qz", bins=(500, 500),
+                 ranges=None, mask=None):
+        t0 = perf_counter()
+        a, b, solid_angle = pixel_coordinates(geometry, incidence_deg, mode)
+        keep = np.ones(a.size, bool) if mask is None else ~np.asarray(mask, bool).ravel()
+        if ranges is None:
+            ranges = ((a[keep].min(), a[keep].max()), (b[keep].min(), b[keep].max()))
+        (a0, a1), (b0, b1) = ranges
+        ia = np.floor((a - a0) / (a1 - a0) * bins[0]).astype(np.int64)
+        ib = np.floor((b - b0) / (b1 - b0) * bins[1]).astype(np.int64)
+        ia[ia == bins[0]] = bins[0] - 1   # include the upper edge
+        ib[ib == bins[1]] = bins[1] - 1
+        keep &= (ia >= 0) & (ia < bins[0]) & (ib >= 0) & (ib < bins[1])
+
+        pixels = np.flatnonzero(keep)
+        # Row = bin along the second axis fastest, so reshape gives (n1, n0)
+        rows = ib[pixels] * bins[0] + ia[pixels]
+        self.matrix = sparse.csr_matrix(
+            ((1.0 / solid_angle[pixels]).astype(np.float32), (rows, pixels)),
+            shape=(bins[0] * bins[1], a.size),
+        )
+        counts = np.bincount(rows, minlength=bins[0] * bins[1]).astype(np.float32)
+        with np.errstate(divide="ignore"):
+            self.norm = np.where(counts > 0, 1.0 / counts, 0.0).astype(np.float32)
+        self.bins, self.ranges, self.mode = tuple(bins), ranges, mode
+        self.axes = (np.linspace(a0, a1, bins[0] + 1), np.linspace(b0, b1, bins[1] + 1))
+        self.shape = geometry.shape
+        self.build_time = perf_counter() - t0
+
+    def reduce(self, frames):
+        """(n, rows, cols) -> (n, n1, n0): axis 1 is the second coordinate (q_z / χ)."""
+        flat = np.asarray(frames, dtype=np.float32).reshape(len(frames), -1)
+        binned = (self.matrix @ flat.T).T * self.norm
+        return binned.reshape(len(frames), self.bins[1], self.bins[0])
+
+
+_TABLES = OrderedDict()
+
+
+def get_table(geometry, incidence_deg, mode="qxy_qz", bins=(500, 500), ranges=None,
+              mask_key=None, mask=None, max_tables=8):
+    """
+    ReductionTable for this geometry and incidence angle, built once and
+    reused (th rounded to 1e-4°). Pass a hashable mask_key with a mask.
+    """
+    key = (geometry, round(float(incidence_deg), 4), mode, tuple(bins),
+           None if ranges is None else tuple(map(tuple, ranges)), mask_key)
+    if key not in _TABLES:
+        _TABLES[key] = ReductionTable(geometry, incidence_deg, mode, bins, ranges, mask)
+        while len(_TABLES) > max_tables:
+            _TABLES.popitem(last=False)
+    _TABLES.move_to_end(key)
+    return _TABLES[key]
+
+
+# -------------------------------
+# 3. Chunked reduction of Eiger files
+# -------------------------------
+_worker_table = None
+
+
+def _init_worker(table):
+    global _worker_table
+    _worker_table = table
+
+
+def _reduce_chunk(path, start, stop, dataset):
+    import h5py
+
+    with h5py.File(path, "r") as f:
+        frames = f[dataset][start:stop]
+    return start, _worker_table.reduce(frames)
+
+
+def reduce_file(path, table, chunk=50, workers=None, dataset=DATASET):
+    """
+    Reduce every frame of an Eiger HDF5 file with `table`. Chunks of frames
+    are read and reduced in a process pool (the table is sent to each worker
+    once); workers=0 reduces in this process. Returns ((n, n1, n0) array,
+    frames per second).
+    """
+    import h5py
+
+    with h5py.File(path, "r") as f:
+        n, rows, cols = f[dataset].shape
+    if (rows, cols) != tuple(table.shape):
+        raise ValueError(f"Frame shape {(rows, cols)} does not match the table's {table.shape}")
+
+    out = np.empty((n, table.bins[1], table.bins[0]), dtype=np.float32)
+    spans = [(i, min(i + chunk, n)) for i in range(0, n, chunk)]
+    t0 = perf_counter()
+    if workers == 0:
+        _init_worker(table)
+        for start, stop in spans:
+            out[start:stop] = _reduce_chunk(path, start, stop, dataset)[1]
+    else:
+        workers = workers or min(len(spans), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(table,)) as pool:
+            futures = [pool.submit(_reduce_chunk, path, start, stop, dataset)
+                       for start, stop in spans]
+            for fut in futures:
+                start, reduced = fut.result()
+                out[start:start + len(reduced)] = reduced
+    rate = n / (perf_counter() - t0)
+    return out, rate
+
+
+def reduce_eiger_file(eiger, geometry, th, mode="qxy_qz", bins=(500, 500), **kwargs):
+    """Reduce the last file written through eiger.hdf5 at incidence angle `th`."""
+    path = eiger.hdf5.full_file_name.get()
+    table = get_table(geometry, th, mode, bins)
+    reduced, rate = reduce_file(path, table, **kwargs)
+    print(f"🧮 Reduced {len(reduced)} frames from {path} at {rate:.0f} frames/s "
+          f"({mode}, {bins[0]}x{bins[1]} bins)")
+    return reduced, table
@@ -0,0 +1,201 @@
+# utils/live_plot.py
+
+from time import perf_counter
+import numpy as np
+from bluesky.callbacks import CallbackBase
+from utils.background_run import ui_call
+
+
+# -------------------------------
+# 1. Growable NumPy buffer
+# -------------------------------
+class GrowableBuffer:
+    """Preallocated float buffer that doubles its capacity when full."""
+
+    def __init__(self, capacity=256):
+        self._data = np.empty(capacity, dtype=float)
+        self._n = 0
+
+    def append(self, value):
+        if self._n == len(self._data):
+            grown = np.empty(2 * len(self._data), dtype=float)
+            grown[:self._n] = self._data
+            self._data = grown
+        self._data[self._n] = value
+        self._n += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=float)
+        needed = self._n + len(values)
+        if needed > len(self._data):
+            grown = np.empty(max(needed, 2 * len(self._data)), dtype=float)
+            grown[:self._n] = self._data[:self._n]
+            self._data = grown
+        self._data[self._n:needed] = values
+        self._n = needed
+
+    def clear(self):
+        self._n = 0
+
+    @property
+    def data(self):
+        return self._data[:self._n]
+
+    def __len__(self):
+        return self._n
+
+
+# -------------------------------
+# 2. Display decimation
+# -------------------------------
+def decimate(xs, ys, max_points=2000):
+    """Min/max decimation: keep the extremes of each bucket so peaks survive."""
+    n = len(xs)
+    if n <= max_points:
+        return xs, ys
+    n_buckets = max_points // 2
+    size = n // n_buckets
+    stop = n_buckets * size
+    buckets = ys[:stop].reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    idx = np.sort(np.concatenate([
+        offsets + buckets.argmin(axis=1),
+        offsets + buckets.argmax(axis=1),
+        np.arange(stop, n),
+    ]))
+    return xs[idx], ys[idx]
+
+
+# -------------------------------
+# 3. Throttled, blitted live plot
+# -------------------------------
+class ThrottledLivePlot(CallbackBase):
+    """
+    Base for live 1-D plots. Events only append to NumPy buffers; the line is
+    redrawn at most every `min_interval` seconds (or every `every` events),
+    using blitting when the canvas supports it. Nothing here sleeps, so the
+    document stream is never held up by the GUI. During a background run
+    (utils.background_run) the buffers still fill on the RunEngine thread,
+    but redraws are handed to the notebook's thread, at most one queued.
+    """
+
+    def __init__(self, label="Live Stats", xlabel="x", ylabel="y",
+                 min_interval=0.2, every=None, max_display=2000, style="o-",
+                 sort_x=False):
+        import matplotlib.pyplot as plt   # first live plot, not at import
+
+        self._x = GrowableBuffer()
+        self._y = GrowableBuffer()
+        self.min_interval = min_interval
+        self.every = every
+        self.max_display = max_display
+        self.sort_x = sort_x  # for scans that visit x out of order (adaptive)
+        self._pending = 0
+        self._drawn = 0
+        self._last_draw = 0.0
+        self._redraw_queued = False
+        self._limits = [np.inf, -np.inf, np.inf, -np.inf]
+        self._bg = None
+
+        self.fig, self.ax = plt.subplots()
+        self._blit = self.fig.canvas.supports_blit
+        self.line, = self.ax.plot([], [], style, animated=self._blit)
+        self.ax.set_title(label)
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+        if self._blit:
+            self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+        plt.ion()
+        plt.show(block=False)
+
+    @property
+    def xs(self):
+        return self._x.data
+
+    @property
+    def ys(self):
+        return self._y.data
+
+    def __len__(self):
+        return len(self._x)
+
+    def start(self, doc):
+        self._x.clear()
+        self._y.clear()
+        self._limits = [np.inf, -np.inf, np.inf, -np.inf]
+        self._pending = 0
+        self._drawn = 0
+        # A redraw queued by an earlier run may never have run (relay dropped, loop closed)
+        self._redraw_queued = False
+        self.line.set_animated(self._blit)
+
+    def append(self, x, y):
+        self._x.append(x)
+        self._y.append(y)
+        self._pending += 1
+        if self._due() and not self._redraw_queued:
+            self._redraw_queued = True
+            ui_call(self._queued_redraw)
+
+    def stop(self, doc):
+        ui_call(self._final_draw)
+
+    def _queued_redraw(self):
+        self._redraw_queued = False
+        self.redraw()
+
+    def _final_draw(self):
+        if self._pending:
+            self.redraw()
+        # Hand the final line back to normal drawing so saved/inline figures show it
+        self.line.set_animated(False)
+        self.fig.canvas.draw_idle()
+
+    def _due(self):
+        if self.every is not None:
+            return self._pending >= self.every
+        return perf_counter() - self._last_draw >= self.min_interval
+
+    def _on_draw(self, event):
+        self._bg = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.ax.draw_artist(self.line)
+
+    def _grow_limits(self, x, y):
+        """
+        Widen the axes only when new points fall outside them. Limits get 20%
+        headroom so a growing scan rescales (full redraw) only a few times.
+        """
+        lo_x, hi_x, lo_y, hi_y = self._limits
+        if x.min() >= lo_x and x.max() <= hi_x and y.min() >= lo_y and y.max() <= hi_y:
+            return False
+        x0, x1 = self.xs.min(), self.xs.max()
+        y0, y1 = self.ys.min(), self.ys.max()
+        pad_x = 0.2 * (x1 - x0) or 0.5
+        pad_y = 0.2 * (y1 - y0) or 0.5
+        self._limits = [x0 - pad_x, x1 + pad_x, y0 - pad_y, y1 + pad_y]
+        self.ax.set_xlim(self._limits[0], self._limits[1])
+        self.ax.set_ylim(self._limits[2], self._limits[3])
+        return True
+
+    def redraw(self):
+        n = min(len(self._x), len(self._y))   # the RunEngine thread may be mid-append
+        xs, ys = self._x.data[:n], self._y.data[:n]
+        self._pending = 0
+        self._last_draw = perf_counter()
+        if not len(xs):
+            return
+        rescaled = self._grow_limits(xs[self._drawn:], ys[self._drawn:])
+        self._drawn = len(xs)
+        if self.sort_x:
+            order = np.argsort(xs, kind="stable")
+            xs, ys = xs[order], ys[order]
+        self.line.set_data(*decimate(xs, ys, self.max_display))
+
+        canvas = self.fig.canvas
+        if not self._blit or rescaled or self._bg is None:
+            canvas.draw_idle()
+        else:
+            canvas.restore_region(self._bg)
+            self.ax.draw_artist(self.line)
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
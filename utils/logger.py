@@ -1,12 +1,223 @@
 import csv
+import json
+import sqlite3
+import threading
+import atexit
+from numbers import Integral, Real
 from pathlib import Path
+from time import time, monotonic
+
+DEFAULT_DB = Path.home() / "bluesky_data" / "run_log.sqlite"
+
+
+# -------------------------------
+# Indexed run-log store (SQLite)
+# -------------------------------
+class RunLogStore:
+    """
+    Embedded run log. Rows are buffered and committed in batches; every new
+    metadata key becomes a column on first sight; sample_name, motor, plan
+    and timestamp are indexed so history queries stay fast on large logs.
+    Reserved columns: _id, _log (which log the row belongs to), _ts (epoch),
+    _file (resolved path of the CSV the row was also written to).
+    """
+
+    INDEXED = ("sample_name", "motor", "plan")
+
+    def __init__(self, path=DEFAULT_DB, batch_size=50, flush_interval=2.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._buffer = []
+        self._last_flush = monotonic()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "_id INTEGER PRIMARY KEY, _log TEXT, _ts REAL, "
+            + ", ".join(f"{col} TEXT" for col in self.INDEXED) + ")"
+        )
+        for col in self.INDEXED + ("_ts",):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{col} ON runs({col})")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_log_motor_sample_ts ON runs(_log, motor, sample_name, _ts)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_log_motor_ts ON runs(_log, motor, _ts)")
+        self._conn.commit()
+        self._columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+
+    # --- writing ---
+    def append(self, log, metadata, file=None):
+        row = {key: _to_sql(value) for key, value in metadata.items()}
+        row.setdefault("plan", row.get("scan_type"))
+        row["_log"] = log
+        row["_ts"] = time()
+        if file is not None:
+            row["_file"] = str(file)
+        with self._lock:
+            self._buffer.append(row)
+            if (len(self._buffer) >= self.batch_size
+                    or monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._last_flush = monotonic()
+            if not rows:
+                return 0
+            for key in {k for row in rows for k in row} - self._columns:
+                self._conn.execute(f"ALTER TABLE runs ADD COLUMN {_quote(key)}")
+                self._columns.add(key)
+            # One executemany per distinct key set keeps the batch cheap
+            by_keys = {}
+            for row in rows:
+                by_keys.setdefault(tuple(row), []).append(tuple(row.values()))
+            for keys, values in by_keys.items():
+                cols = ", ".join(_quote(k) for k in keys)
+                marks = ", ".join("?" * len(keys))
+                self._conn.executemany(f"INSERT INTO runs ({cols}) VALUES ({marks})", values)
+            self._conn.commit()
+            return len(rows)
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    # --- reading ---
+    def query(self, log=None, motor=None, sample_name=None, plan=None,
+              since=None, until=None, limit=50, **columns):
+        """
+        Newest-first rows matching all given filters, as dicts without NULLs.
+        Extra keyword filters match any other (unindexed) column exactly.
+        """
+        clauses, args = [], []
+        filters = [("_log", log), ("motor", motor), ("sample_name", sample_name), ("plan", plan)]
+        for col, value in filters + list(columns.items()):
+            if value is not None:
+                clauses.append(f"{_quote(col)} = ?")
+                args.append(_to_sql(value))
+        if since is not None:
+            clauses.append("_ts >= ?")
+            args.append(since)
+        if until is not None:
+            clauses.append("_ts <= ?")
+            args.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM runs {where} ORDER BY _ts DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            self.flush()
+            if set(columns) - self._columns:
+                return []  # filtering on a key that was never logged
+            cur = self._conn.execute(sql, args)
+            names = [d[0] for d in cur.description]
+            return [{k: v for k, v in zip(names, row) if v is not None} for row in cur]
+
+    def export_csv(self, filepath, log=None, **columns):
+        """
+        Write one log (or everything) to CSV with the full, stable column set;
+        e.g. export_csv(path, _file=original) rebuilds one CSV from the store.
+        """
+        rows = list(reversed(self.query(log=log, limit=None, **columns)))
+        fields = [c for c in self._ordered_columns()
+                  if c != "_id" and any(c in row for row in rows)]
+        filepath = Path(filepath)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+        return filepath
+
+    def _ordered_columns(self):
+        with self._lock:
+            return [row[1] for row in self._conn.execute("PRAGMA table_info(runs)")]
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _to_sql(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, Integral):
+        return int(value)
+    if isinstance(value, Real):
+        return float(value)
+    return json.dumps(value, default=str)
+
+
+_store = None
+
+def get_run_log():
+    """Shared RunLogStore, flushed and closed at interpreter exit."""
+    global _store
+    if _store is None:
+        _store = RunLogStore()
+    return _store
+
+def _close_run_log():
+    if _store is not None:
+        _store.close()
+
+# Registered at import so it runs after the session's export queue is flushed
+atexit.register(_close_run_log)
+
+
+_csv_headers = {}   # resolved CSV path -> header of the file on disk
+_csv_lock = threading.Lock()
+
 
 def append_metadata_to_csv(filepath, metadata):
-    filepath = Path(filepath)
-    filepath.parent.mkdir(exist_ok=True)
-    is_new = not filepath.exists()
-    with open(filepath, "a", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=metadata.keys())
-        if is_new:
+    """
+    Append one row to the CSV at `filepath` and to the run-log store (log
+    name Path(filepath).stem, e.g. "alignment_log", for history queries;
+    _file the resolved path). Rows a CSV already held before the store
+    knew it are imported first. A row with keys the header lacks rewrites
+    the file once with the wider header; every other row is appended.
+    """
+    path = Path(filepath).expanduser().resolve()
+    store = get_run_log()
+    with _csv_lock:
+        header = _csv_headers.get(path) if path.exists() else []
+        if header is None:
+            header = _adopt_csv(store, path)
+        new_keys = [k for k in metadata if k not in header]
+        if header and new_keys:
+            with open(path, newline="") as f:
+                rows = list(csv.DictReader(f))
+            _write_csv(path, header + new_keys, rows + [metadata], "w")
+        else:
+            _write_csv(path, header or list(metadata), [metadata], "a" if header else "w")
+        _csv_headers[path] = header + new_keys
+        store.append(path.stem, metadata, file=path)
+
+
+def _adopt_csv(store, path):
+    """Header of an existing CSV; its rows go into the store unless it already holds them."""
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        header = list(reader.fieldnames or [])
+        rows = list(reader)
+    if rows and not store.query(_file=str(path), limit=1):
+        for row in rows:
+            store.append(path.stem, {k: v for k, v in row.items() if k and v != ""}, file=path)
+        print(f"📥 Imported {len(rows)} rows of {path} into the run log")
+    return header
+
+
+def _write_csv(path, fields, rows, mode):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, mode, newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        if mode == "w":
             writer.writeheader()
-        writer.writerow(metadata)
\ No newline at end of file
+        writer.writerows(rows)
@@ -1,16 +1,34 @@
 # utils/plot_tools.py
 
-import matplotlib.pyplot as plt
-import ipywidgets as widgets
-from IPython.display import display
+# matplotlib, ipywidgets, scipy and pandas are imported on first use, so
+# importing this module (e.g. from startup.py) stays cheap
 import numpy as np
-from scipy.signal import find_peaks
-import pandas as pd
+from utils.run_cache import read_fields, data_keys, run_uid
 
 
-def plot_multiple_signals(run, y_fields, x_field=None, title=None):
-    data = run.primary.read()
-    x_field = x_field or run.primary.metadata.get("motor", list(data.data_vars.keys())[0])
+def _x_field(run, x_field=None):
+    """Requested x, else the scanned motor, else the first scalar field; no data is read."""
+    if x_field:
+        return x_field
+    motor = run.primary.metadata.get("motor")
+    if motor:
+        return motor
+    start = run.metadata.get("start", {}) if hasattr(run, "metadata") else {}
+    if start.get("motors"):
+        return start["motors"][0]
+    keys = [k for k, v in data_keys(run).items() if not v.get("external")]
+    if not keys and hasattr(run.primary, "to_dask"):
+        keys = list(run.primary.to_dask().data_vars)   # lazy: names only, nothing computed
+    if not keys:
+        raise ValueError("Cannot tell which field to plot against; pass x_field")
+    return keys[0]
+
+
+def plot_multiple_signals(run, y_fields, x_field=None, title=None, fill=False):
+    import matplotlib.pyplot as plt
+
+    x_field = _x_field(run, x_field)
+    data = read_fields(run, [x_field, *y_fields], fill=fill)
 
     x = data[x_field]
 
@@ -28,9 +46,13 @@ def plot_multiple_signals(run, y_fields, x_field=None, title=None):
     plt.show()
 
 
-def interactive_signal_plot(run, signal_names, x_field=None):
-    data = run.primary.read()
-    x_field = x_field or run.primary.metadata.get("motor", list(data.data_vars.keys())[0])
+def interactive_signal_plot(run, signal_names, x_field=None, fill=False):
+    import matplotlib.pyplot as plt
+    import ipywidgets as widgets
+    from IPython.display import display
+
+    x_field = _x_field(run, x_field)
+    data = read_fields(run, [x_field, *signal_names], fill=fill)
     x = data[x_field]
 
     fig, ax = plt.subplots()
@@ -67,12 +89,36 @@ def interactive_signal_plot(run, signal_names, x_field=None):
     update_plot()  # Initial
     plt.show()
 
+
+def plot_signal_vs_motor(run, y_field, x_field=None, title=None):
+    import matplotlib.pyplot as plt
+
+    x_field = _x_field(run, x_field)
+    data = read_fields(run, [x_field, y_field])
+
+    fig, ax = plt.subplots()
+    ax.plot(data[x_field], data[y_field], "o-", label=y_field)
+    ax.set_xlabel(x_field)
+    ax.set_ylabel(y_field)
+    ax.set_title(title or f"{y_field} vs {x_field} ({(run_uid(run) or '')[:8]})")
+    ax.legend()
+    ax.grid(True)
+    plt.show()
+
     
 def plot_roi_time_series(roi_csv, fit_peak=True, save=True):
-    df = pd.read_csv(roi_csv)
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    from scipy.signal import find_peaks
+
+    if roi_csv.endswith((".h5", ".parquet")):
+        from utils.burst_roi import read_table  # tables from save_burst_roi_stats
+        df = read_table(roi_csv)
+    else:
+        df = pd.read_csv(roi_csv)
     t = df["frame"]
 
-    stats_fields = [col for col in df.columns if "stats1" in col]
+    stats_fields = [col for col in df.columns if "stats1" in col or col.endswith("_sum")]
     plt.figure(figsize=(10, 6))
 
     for col in stats_fields:
@@ -93,7 +139,7 @@ def plot_roi_time_series(roi_csv, fit_peak=True, save=True):
     plt.grid(True)
 
     if save:
-        fname = roi_csv.replace(".csv", "_plot.png")
+        fname = roi_csv.rsplit(".", 1)[0] + "_plot.png"
         plt.savefig(fname)
         print(f"🖼️ ROI stats plot saved to {fname}")
     plt.show()
\ No newline at end of file
@@ -0,0 +1,175 @@
+# utils/profiler.py
+
+from collections import defaultdict
+from time import perf_counter
+import numpy as np
+
+PHASES = ("motion", "settle", "configure", "trigger", "read", "emit", "callbacks",
+          "catalog", "stage", "run_docs", "other")
+
+# Which phase a message's processing time belongs to (waits are resolved by group)
+_COMMAND_PHASE = {
+    "set": "motion", "trigger": "trigger", "read": "read", "create": "read",
+    "declare_stream": "read", "save": "emit", "drop": "emit", "open_run": "run_docs",
+    "close_run": "run_docs", "stage": "stage", "unstage": "stage", "monitor": "stage",
+    "unmonitor": "stage", "sleep": "settle",
+}
+# A wait costs its slowest member; label it by the most informative kind present
+_WAIT_PRIORITY = ("trigger", "motion", "configure", "settle")
+
+
+class PhaseProfiler:
+    """
+    Attributes RunEngine wall time to phases (motion, settle, trigger, read,
+    live callbacks, catalog inserts, ...) for every point of every run.
+
+    install(RE) chains onto RE.msg_hook: the time between two messages is
+    charged to the first one's phase; a 'wait' takes the phase of what its
+    group started (set -> motion, trigger -> trigger, concurrent_setup's
+    Settle/BackgroundCall -> settle/configure). Callbacks wrapped with
+    timed() are measured directly and taken out of the interval they ran
+    in, so 'emit' is the RunEngine's own document work. A point ends after
+    each 'save'. The per-run record is kept in `runs` and appended to the
+    run log ("run_profile", keyed by uid): the start document is written
+    before any timing exists and stop documents do not accept extra keys.
+    Cost is one perf_counter() and a dict update per message.
+    """
+
+    def __init__(self, log="run_profile", keep=200):
+        self.log = log
+        self.keep = keep
+        self.runs = {}               # uid -> record
+        self.point_times = {}        # uid -> (n_points, len(PHASES)) array, seconds
+        self.callback_totals = defaultdict(float)
+        self._groups = {}            # group -> set of kinds
+        self._t_last = None
+        self._phase = None
+        self._cb_time = 0.0          # callback time inside the current interval
+        self._run = None
+        self._point = defaultdict(float)
+        self._prev_hook = None
+
+    # --- wiring ---
+    def install(self, RE):
+        self._prev_hook = RE.msg_hook
+        RE.msg_hook = self._on_msg
+        RE.subscribe(self._on_doc)
+        return self
+
+    def timed(self, callback, phase="callbacks", label=None):
+        """Wrap a document callback so its time is charged to `phase`."""
+        label = label or getattr(callback, "__qualname__", type(callback).__name__)
+
+        def wrapper(name, doc):
+            t0 = perf_counter()
+            try:
+                return callback(name, doc)
+            finally:
+                dt = perf_counter() - t0
+                self._cb_time += dt
+                self._charge(phase, dt)
+                self.callback_totals[label] += dt
+
+        wrapper.__wrapped__ = callback
+        return wrapper
+
+    # --- accounting ---
+    def _charge(self, phase, dt):
+        if self._run is not None:
+            self._point[phase] += dt
+
+    def _on_msg(self, msg):
+        now = perf_counter()
+        if self._t_last is not None and self._phase is not None:
+            self._charge(self._phase, max(now - self._t_last - self._cb_time, 0.0))
+            if self._phase == "emit" and self._run is not None:
+                self._close_point()
+        self._cb_time = 0.0
+        self._t_last = now
+        self._phase = self._phase_of(msg)
+        if self._prev_hook is not None:
+            self._prev_hook(msg)
+
+    def _phase_of(self, msg):
+        command, group = msg.command, msg.kwargs.get("group")
+        if command == "wait":
+            kinds = self._groups.pop(msg.kwargs.get("group"), set())
+            return next((k for k in _WAIT_PRIORITY if k in kinds), "other")
+        phase = _COMMAND_PHASE.get(command, "other")
+        if command == "set":
+            kind = type(msg.obj).__name__
+            phase = {"Settle": "settle", "BackgroundCall": "configure"}.get(kind, "motion")
+        if group is not None and command in ("set", "trigger"):
+            self._groups.setdefault(group, set()).add(phase)
+        return phase
+
+    def _close_point(self):
+        self._run["points"].append(dict(self._point))
+        for phase, dt in self._point.items():
+            self._run["totals"][phase] += dt
+        self._point = defaultdict(float)
+
+    def _on_doc(self, name, doc):
+        if name == "start":
+            self._point = defaultdict(float)
+            self._run = {"uid": doc["uid"], "plan_name": doc.get("plan_name"),
+                         "t0": perf_counter(), "totals": defaultdict(float), "points": []}
+        elif name == "stop" and self._run is not None:
+            if self._point:
+                self._close_point()  # trailing moves/unstage after the last point
+            self._finish(self._run, doc)
+            self._run = None
+
+    def _finish(self, run, stop_doc):
+        wall = perf_counter() - run["t0"]
+        per_point = np.array([[p.get(ph, 0.0) for ph in PHASES] for p in run["points"]]) \
+            if run["points"] else np.zeros((0, len(PHASES)))
+        record = {
+            "uid": run["uid"],
+            "plan_name": run["plan_name"],
+            "exit_status": stop_doc.get("exit_status"),
+            "n_points": stop_doc.get("num_events", {}).get("primary", len(run["points"])),
+            "wall_time": wall,
+            **{f"t_{ph}": run["totals"].get(ph, 0.0) for ph in PHASES},
+            **{f"per_point_{ph}": float(per_point[:, i].mean()) if len(per_point) else 0.0
+               for i, ph in enumerate(PHASES)},
+        }
+        record["t_unaccounted"] = wall - sum(record[f"t_{ph}"] for ph in PHASES)
+        self.runs[run["uid"]] = record
+        self.point_times[run["uid"]] = per_point
+        while len(self.runs) > self.keep:
+            oldest = next(iter(self.runs))
+            self.runs.pop(oldest)
+            self.point_times.pop(oldest, None)
+        try:
+            from utils.logger import get_run_log
+            get_run_log().append(self.log, record)
+        except Exception as exc:  # profiling must never break a run
+            print(f"⚠️ Run profile not logged: {exc!r}")
+
+    # --- reporting ---
+    def summary(self, last=10, export_times=None):
+        """
+        Print a per-run phase table (seconds) for the last `last` runs;
+        export_times (uid -> s, from ExportService) adds the background export.
+        Returns the records.
+        """
+        records = list(self.runs.values())[-last:]
+        if not records:
+            print("⏱️ No profiled runs yet")
+            return []
+        shown = [ph for ph in PHASES if any(r[f"t_{ph}"] > 5e-4 for r in records)]
+        export_times = export_times or {}
+        header = f"  {'run':<8} {'plan':<22} {'pts':>4} {'wall':>7} " + \
+                 " ".join(f"{ph:>9}" for ph in shown) + f" {'export*':>9}"
+        print("⏱️ Time per phase (s)")
+        print(header)
+        for r in records:
+            print(f"  {r['uid'][:8]:<8} {str(r['plan_name'])[:22]:<22} {r['n_points']:>4} "
+                  f"{r['wall_time']:7.2f} " + " ".join(f"{r[f't_{ph}']:9.3f}" for ph in shown)
+                  + (f" {export_times[r['uid']]:9.3f}" if r["uid"] in export_times else f" {'-':>9}"))
+        print("  * export runs in the background, off the RunEngine's wall time")
+        if self.callback_totals:
+            slowest = sorted(self.callback_totals.items(), key=lambda kv: -kv[1])[:5]
+            print("  callbacks: " + ", ".join(f"{name} {dt:.3f} s" for name, dt in slowest))
+        return records
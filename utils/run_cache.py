@@ -0,0 +1,125 @@
+# utils/run_cache.py
+
+from collections import OrderedDict
+import numpy as np
+
+MAX_CACHE_MB = 256
+
+_COLUMNS = OrderedDict()   # (run uid, stream, field) -> np.ndarray, least recently used first
+_cache_bytes = 0
+
+
+# -------------------------------
+# 1. What a stream holds
+# -------------------------------
+def _stream(run, stream_name):
+    return getattr(run, stream_name)
+
+
+def run_uid(run):
+    try:
+        return run.metadata["start"]["uid"]
+    except (AttributeError, KeyError, TypeError):
+        return None
+
+
+def is_finished(run):
+    """True once the run has its stop document; an open run's columns still grow."""
+    try:
+        return run.metadata.get("stop") is not None
+    except AttributeError:
+        return False
+
+
+def data_keys(run, stream_name="primary"):
+    """Merged data_keys of the stream's descriptors ({} if the catalog does not expose them)."""
+    try:
+        descriptors = _stream(run, stream_name).metadata.get("descriptors", [])
+    except AttributeError:
+        return {}
+    keys = {}
+    for descriptor in descriptors:
+        keys.update(descriptor.get("data_keys", {}))
+    return keys
+
+
+def is_external(run, field, stream_name="primary"):
+    """True for fields stored outside the events (e.g. eiger4M images in HDF5)."""
+    return bool(data_keys(run, stream_name).get(field, {}).get("external"))
+
+
+# -------------------------------
+# 2. Field-selective reads
+# -------------------------------
+def _load(stream, fields):
+    if hasattr(stream, "to_dask"):
+        # databroker 1.x: lazy dataset, external data stays delayed; only
+        # the selected variables are computed
+        ds = stream.to_dask()
+    else:
+        try:
+            ds = stream.read(variables=list(fields))   # tiled-backed databroker 2.x
+        except TypeError:
+            ds = stream.read()
+    out = {}
+    for f in fields:
+        if f in ds:
+            out[f] = np.asarray(ds[f].values)
+            out[f].setflags(write=False)
+    return out
+
+
+def read_fields(run, fields, stream_name="primary", fill=False):
+    """
+    {field: array} for just these fields of one stream, with "time" as a
+    field like any other. External (image) fields are skipped unless
+    fill=True. Columns of finished runs (with a stop document) are cached
+    per (run uid, stream, field), so repeated plots of the same run do not
+    touch the catalog again. The arrays are read-only, since cached ones
+    are shared between callers; copy one before changing it.
+    """
+    fields = list(dict.fromkeys(fields))
+    if not fill:
+        skipped = [f for f in fields if is_external(run, f, stream_name)]
+        if skipped:
+            print(f"⚠️ Not filling external fields {skipped}; pass fill=True to load them")
+            fields = [f for f in fields if f not in skipped]
+
+    uid = run_uid(run)
+    if uid is None or not is_finished(run):   # cannot key the cache, or still being written
+        return _load(_stream(run, stream_name), fields)
+
+    out, missing = {}, []
+    for field in fields:
+        key = (uid, stream_name, field)
+        if key in _COLUMNS:
+            _COLUMNS.move_to_end(key)
+            out[field] = _COLUMNS[key]
+        else:
+            missing.append(field)
+    if missing:
+        for field, values in _load(_stream(run, stream_name), missing).items():
+            _store((uid, stream_name, field), values)
+            out[field] = values
+    return {f: out[f] for f in fields if f in out}
+
+
+def _store(key, values):
+    global _cache_bytes
+    if values.nbytes > MAX_CACHE_MB * 2 ** 20:
+        return   # larger than the whole cache; hand it back uncached
+    _COLUMNS[key] = values
+    _cache_bytes += values.nbytes
+    while _cache_bytes > MAX_CACHE_MB * 2 ** 20:
+        _, evicted = _COLUMNS.popitem(last=False)
+        _cache_bytes -= evicted.nbytes
+
+
+def clear_cache():
+    global _cache_bytes
+    _COLUMNS.clear()
+    _cache_bytes = 0
+
+
+def cache_info():
+    return {"columns": len(_COLUMNS), "mb": _cache_bytes / 2 ** 20, "max_mb": MAX_CACHE_MB}
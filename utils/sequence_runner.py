@@ -0,0 +1,131 @@
+# utils/sequence_runner.py
+
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class SequenceRunner:
+    """
+    Queue-driven multi-sample runner. Each sample goes through two lanes:
+
+    acquire(sample, stage) -> handoff
+        Beam time (motion, alignment, acquisition). Runs on the calling
+        thread, which owns the RunEngine.
+    analyze(sample, handoff, stage) -> result
+        CPU/I/O work (catalog reads, ROI tables, CSV/log writes). Runs on a
+        worker thread while the next sample is being acquired.
+
+    Wrap sections in `with stage("name"):` to time them. At most
+    `max_pending` analyses are in flight; acquisition waits for a free slot,
+    so a slow analysis cannot pile up unbounded memory. pipelined=False
+    runs both lanes back to back on the calling thread (the old behaviour).
+    """
+
+    def __init__(self, acquire, analyze, *, pipelined=True, max_pending=2):
+        self.acquire = acquire
+        self.analyze = analyze
+        self.pipelined = pipelined
+        self.max_pending = max_pending
+        self.intervals = []  # (lane, stage, sample, start, end)
+        self.errors = []     # (sample, exception)
+        self.wall_time = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _stage(self, lane, sample, name):
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.intervals.append((lane, name, sample, t0, perf_counter()))
+
+    def _analyze(self, name, sample, handoff):
+        stage = lambda stage_name: self._stage("analysis", name, stage_name)
+        try:
+            return self.analyze(sample, handoff, stage)
+        except Exception as exc:
+            self.errors.append((name, exc))
+            print(f"❌ Analysis failed for {name}: {exc!r}")
+            return None
+
+    def run(self, samples):
+        """Process samples in order; returns the analysis results in order."""
+        self.intervals, self.errors = [], []
+        slots = threading.Semaphore(self.max_pending)
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis")
+        futures = []
+        t0 = perf_counter()
+        try:
+            for i, sample in enumerate(samples):
+                name = sample.get("sample_name", f"sample_{i}")
+                print(f"🧫 [{i + 1}/{len(samples)}] {name}")
+                stage = lambda stage_name: self._stage("beam", name, stage_name)
+                handoff = self.acquire(sample, stage)
+                if not self.pipelined:
+                    futures.append(_Done(self._analyze(name, sample, handoff)))
+                    continue
+                with self._stage("beam", name, "wait_for_analysis"):
+                    slots.acquire()
+                fut = pool.submit(self._analyze, name, sample, handoff)
+                fut.add_done_callback(lambda _: slots.release())
+                futures.append(fut)
+            results = [fut.result() for fut in futures]
+        finally:
+            pool.shutdown(wait=True)
+            self.wall_time = perf_counter() - t0
+        return results
+
+    # --- reporting ---
+    def utilization(self):
+        """Busy time per lane and per stage, as seconds and fraction of wall time."""
+        wall = self.wall_time or 1e-12
+        lanes, stages = defaultdict(list), defaultdict(float)
+        for lane, name, _, start, end in self.intervals:
+            if name != "wait_for_analysis":
+                lanes[lane].append((start, end))
+            stages[(lane, name)] += end - start
+        lane_busy = {lane: _union_length(spans) for lane, spans in lanes.items()}
+        return {
+            "wall_time": self.wall_time,
+            "lanes": {lane: (busy, busy / wall) for lane, busy in lane_busy.items()},
+            "stages": {key: (busy, busy / wall) for key, busy in stages.items()},
+        }
+
+    def samples_per_hour(self, n_samples):
+        return 3600.0 * n_samples / self.wall_time if self.wall_time else 0.0
+
+    def report(self, n_samples):
+        util = self.utilization()
+        mode = "pipelined" if self.pipelined else "serial"
+        print(f"⏱️ {n_samples} samples in {util['wall_time']:.1f} s ({mode}): "
+              f"{self.samples_per_hour(n_samples):.1f} samples/hour")
+        for lane, (busy, frac) in sorted(util["lanes"].items()):
+            print(f"  {lane:<9} busy {busy:7.2f} s  {frac:6.1%}")
+        for (lane, name), (busy, frac) in sorted(util["stages"].items()):
+            print(f"    {lane + '/' + name:<28} {busy:7.2f} s  {frac:6.1%}")
+        if self.errors:
+            print(f"  ⚠️ {len(self.errors)} analyses failed")
+        return util
+
+
+class _Done:
+    """Already-finished stand-in for a Future (serial mode)."""
+
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value
+
+
+def _union_length(spans):
+    total, end = 0.0, float("-inf")
+    for start, stop in sorted(spans):
+        if stop > end:
+            total += stop - max(start, end)
+            end = stop
+    return total